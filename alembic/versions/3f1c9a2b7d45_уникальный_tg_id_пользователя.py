@@ -0,0 +1,44 @@
+"""уникальный tg_id пользователя.
+
+Revision ID: 3f1c9a2b7d45
+Revises: 7823869fd788
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from collections.abc import Sequence
+from typing import Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c9a2b7d45"
+down_revision: Union[str, Sequence[str], None] = "7823869fd788"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # дубли появлялись при двойном нажатии /start. Оставляем самую раннюю запись, отзывы переносим на нее.
+    op.execute(
+        """
+        UPDATE feedback f
+        SET user_id = keep.id
+        FROM users u
+        JOIN (SELECT tg_id, MIN(id) AS id FROM users GROUP BY tg_id) keep ON keep.tg_id = u.tg_id
+        WHERE f.user_id = u.id AND u.id <> keep.id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM users u
+        USING users keep
+        WHERE u.tg_id = keep.tg_id AND u.id > keep.id
+        """
+    )
+    op.create_unique_constraint("uq_users_tg_id", "users", ["tg_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("uq_users_tg_id", "users", type_="unique")
@@ -0,0 +1,36 @@
+"""хранилище FSM.
+
+Revision ID: 5b2e8d1c4a90
+Revises: 3f1c9a2b7d45
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b2e8d1c4a90"
+down_revision: Union[str, Sequence[str], None] = "3f1c9a2b7d45"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table("fsm_storage",
+    sa.Column("key", sa.String(length=255), nullable=False),
+    sa.Column("state", sa.String(length=255), nullable=True),
+    sa.Column("data", postgresql.JSONB(astext_type=sa.Text()), server_default="{}", nullable=False),
+    sa.Column("update_dt", sa.DateTime(), server_default=sa.text("timezone('Europe/Moscow', now())"), nullable=False),
+    sa.PrimaryKeyConstraint("key")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("fsm_storage")
@@ -8,10 +8,81 @@ load_dotenv()
 
 ADMIN_IDS = ast.literal_eval(os.getenv("ADMIN_IDS"))  # tg id админа.
 
+# количество процессов-воркеров. Больше 1 - апдейты принимает фронт и раздает воркерам по chat_id.
+# Лимиты на весь бот (AI_MAX_CONCURRENCY, OUTBOUND_GLOBAL_RATE, UPDATE_CONCURRENCY) делятся между воркерами поровну.
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "1"))
+
 # токен для AI чата, общаемся с мозгом через https://openrouter.ai
 GPT_TOKEN = os.getenv("GPT_TOKEN")
 # урл для отравки заросов в OPENROUTER_URL
 OPENROUTER_URL = os.getenv("OPENROUTER_URL")
 
+# пул готовых ИИ пожеланий на каждое время суток: размер и порог, ниже которого пул пополняется фоном.
+WISH_POOL_SIZE = int(os.getenv("WISH_POOL_SIZE", "5"))
+WISH_POOL_WATERMARK = int(os.getenv("WISH_POOL_WATERMARK", "2"))
+
+# если пул пуст, показываем ответ ИИ по мере генерации, правя сообщение не чаще раза в N секунд.
+AI_STREAM = os.getenv("AI_STREAM", "True") == "True"
+AI_STREAM_EDIT_INTERVAL = float(os.getenv("AI_STREAM_EDIT_INTERVAL", "1"))
+
+# модели ИИ через запятую в порядке приоритета. Если модель не ответила за AI_HEDGE_DELAY секунд
+# (пока не накоплена статистика, дальше - p90 ее задержек), параллельно спрашиваем следующую.
+AI_MODELS = [model.strip() for model in os.getenv("AI_MODELS", "deepseek/deepseek-r1-0528:free").split(",")
+             if model.strip()]
+AI_HEDGE_DELAY = float(os.getenv("AI_HEDGE_DELAY", "5"))
+
+# запросы к ИИ: сколько одновременно, таймаут в секундах, после скольких ошибок подряд и на сколько секунд
+# перестаем ходить в ИИ (предохранитель).
+AI_MAX_CONCURRENCY = max(1, int(os.getenv("AI_MAX_CONCURRENCY", "4")) // SHARD_WORKERS)
+AI_TIMEOUT = float(os.getenv("AI_TIMEOUT", "30"))
+AI_QUEUE_TIMEOUT = float(os.getenv("AI_QUEUE_TIMEOUT", "10"))  # сколько ждем свободный слот запроса к ИИ, сек.
+AI_BREAKER_THRESHOLD = int(os.getenv("AI_BREAKER_THRESHOLD", "5"))
+AI_BREAKER_RESET = float(os.getenv("AI_BREAKER_RESET", "60"))
+
+# квота пожеланий ИИ на пользователя: сколько за скользящее окно в секундах.
+AI_QUOTA_LIMIT = int(os.getenv("AI_QUOTA_LIMIT", "10"))
+AI_QUOTA_WINDOW = float(os.getenv("AI_QUOTA_WINDOW", "3600"))
+
+# кеш карточек напитков/ингредиентов: количество записей и время жизни в секундах.
+DETAIL_CACHE_SIZE = int(os.getenv("DETAIL_CACHE_SIZE", "512"))
+DETAIL_CACHE_TTL = float(os.getenv("DETAIL_CACHE_TTL", "600"))
+
+# реестр отслеживаемых сообщений: максимум чатов и сообщений на чат.
+MESSAGE_REGISTRY_MAX_CHATS = int(os.getenv("MESSAGE_REGISTRY_MAX_CHATS", "10000"))
+MESSAGE_REGISTRY_MAX_PER_CHAT = int(os.getenv("MESSAGE_REGISTRY_MAX_PER_CHAT", "100"))
+
+# лимиты исходящих запросов к Bot API: общий и на чат (запросов в секунду), всплеск в чат и повторы после flood wait.
+OUTBOUND_GLOBAL_RATE = float(os.getenv("OUTBOUND_GLOBAL_RATE", "30")) / SHARD_WORKERS
+OUTBOUND_CHAT_RATE = float(os.getenv("OUTBOUND_CHAT_RATE", "1"))
+OUTBOUND_CHAT_BURST = float(os.getenv("OUTBOUND_CHAT_BURST", "3"))
+OUTBOUND_MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", "3"))
+
+# режим webhook: публичный адрес бота (пусто - polling), путь, секрет, адрес и порт aiohttp сервера
+# и сколько секунд ждем вызов хендлера, который можно отдать прямо в ответе на webhook.
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or None
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_REPLY_TIMEOUT = float(os.getenv("WEBHOOK_REPLY_TIMEOUT", "1"))
+
+# сколько апдейтов обрабатывается одновременно (0 - без ограничения) и сколько ждут в очереди.
+# При полной очереди первыми отбрасываются пожелания ИИ, навигация по меню продолжает работать.
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "0"))
+if UPDATE_CONCURRENCY:
+    UPDATE_CONCURRENCY = max(1, UPDATE_CONCURRENCY // SHARD_WORKERS)
+UPDATE_BACKLOG = int(os.getenv("UPDATE_BACKLOG", "100"))
+# сколько апдейтов одного чата ждут своей очереди, пока обрабатывается предыдущий. Лишние отбрасываются.
+CHAT_LANE_BACKLOG = int(os.getenv("CHAT_LANE_BACKLOG", "10"))
+# через сколько секунд без ответа хендлера убираем часики на кнопке пустым ответом.
+EARLY_ANSWER_DELAY = float(os.getenv("EARLY_ANSWER_DELAY", "0.3"))
+
+# хранилище FSM: memory, postgres (таблица fsm_storage) или redis (нужен пакет redis) и адрес redis.
+FSM_STORAGE = os.getenv("FSM_STORAGE", "memory")
+FSM_REDIS_URL = os.getenv("FSM_REDIS_URL", "redis://localhost:6379/0")
+
+# одна сессия БД на апдейт (DatabaseSessionMiddleware) вместо сессии на каждый запрос.
+DB_UNIT_OF_WORK = os.getenv("DB_UNIT_OF_WORK", "False") == "True"
+
 # Создаем контекстную переменную
 current_chat_id = contextvars.ContextVar("current_chat_id", default=None)
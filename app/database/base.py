@@ -1,8 +1,11 @@
 import os
+import time
+from typing import Any, TypedDict
 
 from dotenv import load_dotenv
 from sqlalchemy import URL
 from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
 
 load_dotenv()
 
@@ -14,4 +17,87 @@ url_object = URL.create(
     database=os.getenv("DATABASE", "postgres"),
 )
 
-async_engine = create_async_engine(url_object)
+# настройки пула соединений, подбираются под пиковое количество одновременных апдейтов.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # сколько ждем свободное соединение, сек.
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # пересоздаем соединения старше N секунд. -1 выкл.
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "False") == "True"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # 0 - без ограничения.
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))  # кеш prepared statements asyncpg.
+
+
+class PoolStatsHint(TypedDict):
+    """Хинт состояния пула соединений."""
+
+    size: int
+    checked_out: int
+    peak_checked_out: int
+    overflow: int
+    peak_overflow: int
+    checkouts: int
+    wait_total_ms: float
+    wait_max_ms: float
+    wait_avg_ms: float
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, который замеряет время ожидания соединения."""
+
+    wait_total = 0.0
+    wait_max = 0.0
+    checkouts = 0
+    peak_checked_out = 0
+    peak_overflow = 0
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        """Выдаем соединение из пула, замеряя ожидание."""
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checkedout())
+            self.peak_overflow = max(self.peak_overflow, self.overflow())
+
+
+def _connect_args() -> dict[str, Any]:
+    """Параметры драйвера asyncpg: кеш prepared statements и таймаут запросов."""
+    if "asyncpg" not in url_object.drivername:
+        return {}
+    connect_args: dict[str, Any] = {"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    if DB_STATEMENT_TIMEOUT_MS:
+        connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+    return connect_args
+
+
+async_engine = create_async_engine(
+    url_object,
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args=_connect_args(),
+)
+
+
+def get_pool_stats() -> PoolStatsHint:
+    """Состояние пула: занятые соединения, использование overflow и время ожидания соединения."""
+    pool: InstrumentedQueuePool = async_engine.pool  # type: ignore[assignment]
+    checkouts = pool.checkouts
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "peak_checked_out": pool.peak_checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "peak_overflow": max(pool.peak_overflow, 0),
+        "checkouts": checkouts,
+        "wait_total_ms": pool.wait_total * 1000,
+        "wait_max_ms": pool.wait_max * 1000,
+        "wait_avg_ms": pool.wait_total / checkouts * 1000 if checkouts else 0.0,
+    }
@@ -1,6 +1,7 @@
 from typing import Optional, TypedDict
 
 from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, String, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -49,7 +50,7 @@ class User(Base):
     __tablename__ = "users"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    tg_id = mapped_column(BigInteger)
+    tg_id = mapped_column(BigInteger, unique=True)
     name: Mapped[str] = mapped_column(String(200), nullable=True, comment="имя клиента из отзыва/предложения")
     phone: Mapped[str] = mapped_column(String(20), nullable=True)
     created_dt: Mapped[DateTime] = mapped_column(DateTime,
@@ -205,3 +206,16 @@ class Drink(Base):
                 for ingredient in self.ingredients
             ]
         return drink_dict
+
+
+class FSMRecord(Base):
+    """Состояние и данные FSM одного пользователя в чате. Ключ собирает DefaultKeyBuilder aiogram."""
+
+    __tablename__ = "fsm_storage"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    state: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default="{}")
+    update_dt: Mapped[DateTime] = mapped_column(DateTime,
+                                                nullable=False,
+                                                server_default=func.timezone("Europe/Moscow", func.now()))
@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database.models import Drink, Ingredient, Photo
 from app.database.requests.base import connection
+from app.services.catalog import refresh_catalog
 
 
 class IngredientHint(TypedDict):
@@ -19,6 +20,7 @@ class DrinkHint(IngredientHint):
     ingredient_ids: list[int]
 
 
+@refresh_catalog
 @connection
 async def set_ingredient(session: AsyncSession, data: IngredientHint) -> None:
     """Записываем ингредиент в БД.
@@ -34,6 +36,7 @@ async def set_ingredient(session: AsyncSession, data: IngredientHint) -> None:
     session.add(ingredient)
     await session.commit()
 
+@refresh_catalog
 @connection
 async def set_drink(session: AsyncSession, data: DrinkHint) -> None:
     """Записываем напиток в БД.
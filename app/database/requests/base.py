@@ -1,3 +1,4 @@
+import contextvars
 from collections.abc import Awaitable
 from typing import Callable, ParamSpec, TypeVar
 
@@ -12,9 +13,60 @@ P = ParamSpec("P")
 R = TypeVar("R")
 
 
+class UnitOfWork:
+    """Одна сессия и одна транзакция БД на весь апдейт телеграм.
+
+    Сессия открывается лениво, при первом запросе. Коммит/откат делает владелец (DatabaseSessionMiddleware).
+    Сессия не рассчитана на параллельные запросы, внутри апдейта запросы выполняются последовательно.
+    """
+
+    def __init__(self) -> None:
+        """Конструктор единицы работы."""
+        self._session: AsyncSession | None = None
+
+    @property
+    def is_started(self) -> bool:
+        """Была ли открыта сессия."""
+        return self._session is not None
+
+    async def get_session(self) -> AsyncSession:
+        """Возвращаем сессию апдейта, открывая ее и транзакцию при первом обращении."""
+        if self._session is None:
+            self._session = AsyncSession(async_engine)
+            await self._session.begin()
+        return self._session
+
+    async def commit(self) -> None:
+        """Фиксируем транзакцию, если сессия открывалась."""
+        if self._session is not None:
+            await self._session.commit()
+
+    async def rollback(self) -> None:
+        """Откатываем транзакцию, если сессия открывалась."""
+        if self._session is not None:
+            await self._session.rollback()
+
+    async def close(self) -> None:
+        """Закрываем сессию и возвращаем соединение в пул."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+# единица работы текущего апдейта. Выставляется в DatabaseSessionMiddleware.
+current_unit_of_work: contextvars.ContextVar[UnitOfWork | None] = contextvars.ContextVar(
+    "current_unit_of_work", default=None,
+)
+
+
 def connection(func: Callable[Concatenate[AsyncSession, P], Awaitable[R]]) -> Callable[P, Awaitable[R]]:
-    """Декоратор возвращающий асинхронное подключение к БД."""
+    """Декоратор возвращающий асинхронное подключение к БД.
+
+    Внутри апдейта с единицей работы используется ее общая сессия, иначе открывается своя сессия и транзакция.
+    """
     async def inner(*args: P.args, **kwargs: P.kwargs) -> R:
+        if (unit_of_work := current_unit_of_work.get()) is not None:
+            return await func(await unit_of_work.get_session(), *args, **kwargs)
         async with AsyncSession(async_engine) as session, session.begin():
             return await func(session, *args, **kwargs)
     return inner
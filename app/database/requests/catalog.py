@@ -0,0 +1,60 @@
+from typing import TypedDict
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.database.models import (
+    CoffeePoint,
+    CoffeePointResult,
+    Drink,
+    DrinkCoffeePointAssociation,
+    DrinkResult,
+    Ingredient,
+    IngredientResult,
+)
+from app.database.requests.base import connection
+from app.database.requests.keyboards import IngredientNamesHint
+
+
+class CatalogData(TypedDict):
+    """Хинт выгрузки каталога целиком."""
+
+    points: list[CoffeePointResult]
+    drink_names: dict[int, list[IngredientNamesHint]]
+    drinks: dict[int, DrinkResult]
+    ingredients: dict[int, IngredientResult]
+
+
+@connection
+async def load_catalog(session: AsyncSession) -> CatalogData:
+    """Выгружаем каталог (кофейни, меню точек, карточки напитков и ингредиентов) за одну сессию.
+
+    Args:
+        session: асинхронная сессия движка sqlalchemy
+    """
+    points_stmt = select(CoffeePoint).where(CoffeePoint.is_active.is_(True)).order_by(CoffeePoint.name)
+    points = (await session.execute(points_stmt)).scalars().all()
+
+    drinks_stmt = select(Drink).options(selectinload(Drink.photos), selectinload(Drink.ingredients))
+    drinks = (await session.execute(drinks_stmt)).scalars().all()
+
+    ingredients_stmt = select(Ingredient).options(selectinload(Ingredient.photos))
+    ingredients = (await session.execute(ingredients_stmt)).scalars().all()
+
+    names_stmt = (
+        select(DrinkCoffeePointAssociation.coffee_point_id, Drink.id, Drink.name)
+        .join(DrinkCoffeePointAssociation, Drink.id == DrinkCoffeePointAssociation.drink_id)
+        .order_by(Drink.name)
+    )
+    drink_names: dict[int, list[IngredientNamesHint]] = {point.id: [] for point in points}
+    for point_id, drink_id, name in await session.execute(names_stmt):
+        if point_id in drink_names:  # меню неактивных точек не нужно.
+            drink_names[point_id].append({"id": drink_id, "name": name})
+
+    return {
+        "points": [point.to_dict() for point in points],
+        "drink_names": drink_names,
+        "drinks": {drink.id: drink.drink_to_dict() for drink in drinks},
+        "ingredients": {ingredient.id: ingredient.ingredient_to_dict() for ingredient in ingredients},
+    }
@@ -32,7 +32,7 @@ class FeedbackContext:
             Photo(photo_string=photo, feedback=feedback)
 
         session.add(feedback)
-        await session.commit()
+        await session.flush()  # коммит делает владелец сессии.
 
     @staticmethod
     @connection
@@ -57,5 +57,4 @@ class FeedbackContext:
             data: новые параметры пользователя.
         """
         stmt = update(User).where(User.id == user_id).values(**data)
-        await session.execute(stmt)
-        await session.commit()
+        await session.execute(stmt)  # коммит делает владелец сессии.
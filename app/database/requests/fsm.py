@@ -0,0 +1,58 @@
+from typing import Any, TypedDict
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import FSMRecord
+from app.database.requests.base import connection
+
+
+class FSMRecordHint(TypedDict):
+    """Хинт записи хранилища FSM."""
+
+    state: str | None
+    data: dict[str, Any]
+
+
+class FSMStorageContext:
+    """запросы хранилища состояний FSM."""
+
+    @staticmethod
+    @connection
+    async def get_record(session: AsyncSession, key: str) -> FSMRecordHint | None:
+        """Получаем состояние и данные по ключу.
+
+        Args:
+            session: асинхронная сессия.
+            key: ключ хранилища, собранный KeyBuilder.
+        """
+        result = await session.execute(select(FSMRecord.state, FSMRecord.data).where(FSMRecord.key == key))
+        row = result.one_or_none()
+        return None if row is None else {"state": row.state, "data": row.data}
+
+    @staticmethod
+    @connection
+    async def set_record(session: AsyncSession, key: str, values: dict[str, Any]) -> None:
+        """Записываем состояние и/или данные одним запросом (INSERT ... ON CONFLICT DO UPDATE).
+
+        Args:
+            session: асинхронная сессия.
+            key: ключ хранилища, собранный KeyBuilder.
+            values: изменившиеся колонки, state и/или data.
+        """
+        stmt = insert(FSMRecord).values(key=key, **values)
+        stmt = stmt.on_conflict_do_update(index_elements=[FSMRecord.key],
+                                          set_={**values, "update_dt": func.timezone("Europe/Moscow", func.now())})
+        await session.execute(stmt)
+
+    @staticmethod
+    @connection
+    async def delete_record(session: AsyncSession, key: str) -> None:
+        """Удаляем запись, например после state.clear().
+
+        Args:
+            session: асинхронная сессия.
+            key: ключ хранилища, собранный KeyBuilder.
+        """
+        await session.execute(delete(FSMRecord).where(FSMRecord.key == key))
@@ -1,9 +1,11 @@
 from typing import TypedDict
 
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.configs import DETAIL_CACHE_SIZE, DETAIL_CACHE_TTL
 from app.database.models import (
     CoffeePoint,
     Drink,
@@ -15,9 +17,22 @@ from app.database.models import (
 )
 from app.database.requests.base import connection
 from app.database.requests.keyboards import IngredientNamesHint
+from app.services.cache import AsyncTTLCache, cached
+from app.services.catalog import catalog
 
 DrinkType = type[Drink]
 
+# карточки напитков и ингредиентов по id. Сбрасываются при каждой смене снимка каталога,
+# в том числе после записи админом в другом воркере.
+drink_detail_cache: AsyncTTLCache[int, DrinkResult] = AsyncTTLCache(
+    "drink_detail", maxsize=DETAIL_CACHE_SIZE, ttl=DETAIL_CACHE_TTL,
+)
+ingredient_detail_cache: AsyncTTLCache[int, IngredientResult] = AsyncTTLCache(
+    "ingredient_detail", maxsize=DETAIL_CACHE_SIZE, ttl=DETAIL_CACHE_TTL,
+)
+catalog.add_listener(drink_detail_cache.clear)
+catalog.add_listener(ingredient_detail_cache.clear)
+
 
 class CoffeePointHint(TypedDict):
     """Хинт для кофейной точки."""
@@ -82,17 +97,22 @@ class UserContext:
 
     @staticmethod
     @connection
-    async def set_user_to_db(session: AsyncSession, user_data: UserDataHint) -> None:
-        """Создаем пользователя при нажатии кнопки /start, его нет в БД.
+    async def upsert_user(session: AsyncSession, user_data: UserDataHint) -> None:
+        """Создаем пользователя при нажатии кнопки /start или обновляем его данные телеграм, одним запросом.
 
         Args:
             session: асинхронная сессия движка sqlalchemy
             user_data (UserDataHint): параметры пользователя.
         """
-        session.add(User(**user_data))
-        await session.commit()
+        stmt = insert(User).values(**user_data)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.tg_id],
+            set_={key: stmt.excluded[key] for key in user_data if key != "tg_id"},
+        )
+        await session.execute(stmt)  # коммит делает владелец сессии.
 
     @staticmethod
+    @cached(drink_detail_cache, key=int)
     @connection
     async def get_drink_detail_db(session: AsyncSession, item_id: str) -> DrinkResult:
         """Получаем напиток.
@@ -111,6 +131,7 @@ class UserContext:
         return drink
 
     @staticmethod
+    @cached(ingredient_detail_cache, key=lambda item_id: int(item_id.split("_")[-1]))
     @connection
     async def get_igredient_photo(session: AsyncSession, item_id: str) -> IngredientResult:
         """Получаем ингредиент с фотографией благодаря relationship.
@@ -6,6 +6,7 @@ from aiogram.types import CallbackQuery, Message
 from app.keyboards import back_to_start_keyboard, back_to_start_or_send_review_keyboard
 from app.logger import Logger
 from app.logic.feedback import LogicFeedback
+from app.middlewares.callback_answer_middleware import EARLY_ANSWER_FLAG
 from app.services.message_manager import MessageManager
 from app.states import FeedbackForm
 
@@ -17,7 +18,7 @@ NAME_FORM_MSG = "{name}, что бы оставить *{feedback_type_rus}*, п
 PHOTO_WRONG_MSG = "Пожалуйста, *прикрепите через скрепочку фотографию* или нажмите *Отправить без фото*\\."
 
 
-@feedback_router.callback_query(F.data == "feedback")
+@feedback_router.callback_query(F.data == "feedback", flags={EARLY_ANSWER_FLAG: False})  # отвечает своим текстом.
 async def start_feedback_form(
         callback: CallbackQuery,
         state: FSMContext,
@@ -34,7 +35,7 @@ async def start_feedback_form(
     """
     await logic_feedback.process_start_feedback_form(callback, state, message_manager)
 
-@feedback_router.callback_query(FeedbackForm.waiting_for_feedback_type)
+@feedback_router.callback_query(FeedbackForm.waiting_for_feedback_type, flags={EARLY_ANSWER_FLAG: False})
 async def feedback_type_form(
         callback: CallbackQuery,
         state: FSMContext,
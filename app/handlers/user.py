@@ -1,3 +1,5 @@
+from functools import partial
+
 from aiogram import F, Router
 from aiogram.filters import Command, CommandStart
 from aiogram.fsm.context import FSMContext
@@ -5,9 +7,10 @@ from aiogram.methods import EditMessageText
 from aiogram.types import CallbackQuery, Message, ReplyKeyboardRemove
 
 import app.keyboards as kb
-from app.helpers import delete_messages, wait_typing
+from app.helpers import delete_messages
 from app.logic.user_logic import UserLogic
 from app.services.message_manager import MessageManager
+from app.services.outbound import outbound_scheduler
 
 user_router = Router()
 
@@ -34,8 +37,9 @@ async def help_cmd(message: Message) -> None:
     Args:
         message: объект сообщения.
     """
-    await wait_typing(message)
-    await message.answer("Перейти в главное меню введите /start", reply_markup=ReplyKeyboardRemove())
+    await outbound_scheduler.submit(message.chat.id, partial(message.answer,
+                                                             "Перейти в главное меню введите /start",
+                                                             reply_markup=ReplyKeyboardRemove()))
 
 @user_router.callback_query(F.data.startswith(kb.CALLBACK_COFFEE_POINT_PREFIX))
 async def coffee_point_handler(callback: CallbackQuery,
@@ -77,18 +81,23 @@ async def ingredients(callback: CallbackQuery, state: FSMContext) -> None:
         state: Состояния памяти.
     """
     await callback.answer("Вы выбрали Ингредиенты.")
+    chat_id = callback.message.chat.id
     state_data = await state.get_data()
     if message_ids_to_delete := state_data.pop("ingredient_item_msgs_to_delete", None):
         await state.update_data(ingredient_item_msgs_to_delete=None)
         await delete_messages(callback, message_ids_to_delete)
-        await callback.bot.edit_message_reply_markup(chat_id=callback.message.chat.id,
-                                                     message_id=state_data["drink_msgs"]["desc_msg_id"],
-                                                     reply_markup=kb.back_to_drinks)
+        await outbound_scheduler.submit(chat_id, partial(callback.bot.edit_message_reply_markup,
+                                                         chat_id=chat_id,
+                                                         message_id=state_data["drink_msgs"]["desc_msg_id"],
+                                                         reply_markup=kb.back_to_drinks))
         if not state_data.get("drink_msgs"):
             await state.clear()
     else:
         names = state_data.get("ingredients") or []
-        await callback.message.edit_reply_markup(reply_markup=kb.inline_builder(names, item="ingredient_item_"))
+        await outbound_scheduler.submit(chat_id, partial(
+            callback.message.edit_reply_markup,
+            reply_markup=kb.inline_builder(names, item="ingredient_item_"),
+            ))
 
 @user_router.callback_query(F.data.startswith("drink_item_"))
 async def drink_item_handler(callback: CallbackQuery,
@@ -116,22 +125,27 @@ async def ingredient_item_handler(callback: CallbackQuery, state: FSMContext, us
         user_logic: логика работы с клиентом.
     """
     await callback.answer("Вы выбрали ингредиент")
-    await callback.message.edit_reply_markup()
+    chat_id = callback.message.chat.id
+    await outbound_scheduler.submit(chat_id, callback.message.edit_reply_markup)
     state_data = await state.get_data()
     if message_ids_to_delete := state_data.pop("ingredient_item_msgs_to_delete", None):
         await delete_messages(callback, message_ids_to_delete)
         await state.update_data(ingredient_item_msgs_to_delete=None)
         if not state_data.get("drink_msgs"):
             await state.clear()
-    ingredient = await user_logic.get_igredient_photo(item_id=callback.data)
-    photo_message = await callback.message.answer_photo(
+    ingredient = await user_logic.get_ingredient_from_db(callback.data)
+    photo_message = await outbound_scheduler.submit(chat_id, partial(
+        callback.message.answer_photo,
         photo=ingredient["photos"][0]["photo_string"],
         caption=f"Ингредиент: {ingredient["name"]}",
         show_caption_above_media=True,
-        )
-    description_message = await callback.message.answer(text=f"Описание ингредиента: {ingredient["description"]}",
-                                                        # reply_parameters={"message_id": photo_message.message_id},
-                                                       reply_markup=kb.back_to_ingredients)
+        ))
+    description_message = await outbound_scheduler.submit(chat_id, partial(
+        callback.message.answer,
+        text=f"Описание ингредиента: {ingredient["description"]}",
+        # reply_parameters={"message_id": photo_message.message_id},
+        reply_markup=kb.back_to_ingredients,
+        ))
     await state.update_data(ingredient_item_msgs_to_delete=[photo_message.message_id, description_message.message_id])
 
 @user_router.callback_query(F.data == "contacts")
@@ -1,15 +1,30 @@
 import asyncio
-import random
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from datetime import datetime
+from functools import partial
 
 import pytz
+from aiogram import Bot
 from aiogram.enums import ChatAction
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 
 from app.database.requests.admin import DrinkHint
+from app.services.message_manager import delete_message_ids
+from app.services.outbound import outbound_scheduler
+
+logger = logging.getLogger(__name__)
 
 MOSCOW_TZ = pytz.timezone("Europe/Moscow")  # кеширование часового пояса.
+TYPING_THRESHOLD = 0.3  # если работа заняла меньше, 'Печатает' не показываем, сек.
+TYPING_REFRESH = 4.5  # телеграм показывает действие 5 секунд, обновляем чуть раньше.
+# час начала утра, дня, вечера и ночи по Москве.
+MORNING_HOUR = 5
+DAY_HOUR = 12
+EVENING_HOUR = 17
+NIGHT_HOUR = 23
 
 
 async def delete_messages(callback: CallbackQuery, msg_ids_fro_delete: list[int]) -> None:
@@ -19,8 +34,7 @@ async def delete_messages(callback: CallbackQuery, msg_ids_fro_delete: list[int]
         callback: объект входящий запрос колбека кнопки обратного вызова на inline keyboard
         msg_ids_fro_delete: список id сообщений.
     """
-    for message_id in msg_ids_fro_delete:
-        await callback.bot.delete_message(chat_id=callback.message.chat.id, message_id=message_id)
+    await delete_message_ids(callback.bot, callback.message.chat.id, msg_ids_fro_delete)
 
 async def update_ingredient_ids(state: FSMContext, ingredient_id: int) -> list[int]:
     """обновляем значение ingredient_ids. в список добавляем id ингридиентов, которые мы добавили к напитку.
@@ -42,13 +56,46 @@ def get_moscow_time() -> str:
     moscow_time = datetime.now(MOSCOW_TZ)
     return moscow_time.strftime("%H:%M")
 
-async def wait_typing(message: Message | CallbackQuery) -> None:
-    """функция вызывает поп-ап 'Печатает'.
+def get_time_of_day() -> str:
+    """Время суток по Москве: 'утро', 'день', 'вечер' или 'ночь'."""
+    hour = datetime.now(MOSCOW_TZ).hour
+    if MORNING_HOUR <= hour < DAY_HOUR:
+        return "утро"
+    if DAY_HOUR <= hour < EVENING_HOUR:
+        return "день"
+    if EVENING_HOUR <= hour < NIGHT_HOUR:
+        return "вечер"
+    return "ночь"
+
+@asynccontextmanager
+async def typing_indicator(message: Message | CallbackQuery,
+                           threshold: float = TYPING_THRESHOLD) -> AsyncIterator[None]:
+    """Показывает поп-ап 'Печатает', пока выполняется тело блока with.
+
+    Действие отправляется фоновой задачей и только если работа длится дольше threshold,
+    быстрые ответы не ждут лишний запрос к телеграм.
 
     Args:
         message: объект сообщения или колбека.
+        threshold: через сколько секунд работы показывать 'Печатает'.
     """
-    if (bot := message.bot) and (user := message.from_user):
-        await bot.send_chat_action(chat_id=user.id,
-                                        action=ChatAction.TYPING)
-        await asyncio.sleep(random.uniform(0.1, 0.5))
+    if not ((bot := message.bot) and (user := message.from_user)):
+        yield
+        return
+    task = asyncio.create_task(_keep_typing(bot, user.id, threshold))
+    try:
+        yield
+    finally:
+        task.cancel()
+
+async def _keep_typing(bot: Bot, chat_id: int, threshold: float) -> None:
+    """Ждет threshold секунд и отправляет 'Печатает', пока задачу не отменят."""
+    await asyncio.sleep(threshold)
+    while True:
+        try:
+            await outbound_scheduler.submit(chat_id, partial(bot.send_chat_action,
+                                                             chat_id=chat_id,
+                                                             action=ChatAction.TYPING))
+        except Exception as e:
+            logger.debug(f"Failed to send typing action to {chat_id}: {e}")
+        await asyncio.sleep(TYPING_REFRESH)
@@ -5,6 +5,7 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from app.database.requests.keyboards import IngredientNamesHint
 from app.database.requests.user import CoffeePointHint
+from app.services.keyboard_cache import keyboard_cache
 
 TYPE_ITEM = Literal["drink_item_", "update_item_", "ingredient_item_"]
 # drink_item_ - в случае просто перечисления меню напитков.
@@ -96,7 +97,13 @@ async def make_back_to_drinks_kb(point_id: int) -> InlineKeyboardMarkup:
         point_id: ID кофейной точки.
     """
     callback_data = f"{CALLBACK_DRINKS}{point_id}"
-    return InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Назад", callback_data=callback_data)]])
+    return keyboard_cache.get_or_build(
+        "back_to_drinks",
+        lambda: InlineKeyboardMarkup(
+            inline_keyboard=[[InlineKeyboardButton(text="Назад", callback_data=callback_data)]],
+        ),
+        point_id=point_id,
+    )
 # back_to_drinks = InlineKeyboardMarkup(
 #     inline_keyboard=[
 #         # [InlineKeyboardButton(text="Ингредиенты", callback_data="ingredients")],
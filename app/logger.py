@@ -1,9 +1,16 @@
+import atexit
+import contextvars
 import json
 import logging
+import multiprocessing
 import os
+import queue
+import random
+import time
+from collections import Counter
 from datetime import datetime
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
-from typing import Any, Literal
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from typing import Any, Literal, TypedDict
 
 from aiogram.types import TelegramObject
 from colorlog import ColoredFormatter
@@ -12,6 +19,113 @@ from dotenv import load_dotenv
 load_dotenv()
 
 LEVELS = Literal["debug", "info", "warning", "error", "critical"]
+LEVEL_NUMBERS: dict[str, int] = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+
+
+class BlockingStats(TypedDict):
+    """Хинт времени, которое вызовы логгера занимают в event loop."""
+
+    calls: int
+    total_ms: float
+    max_ms: float
+    avg_ms: float
+    queue_size: int
+
+
+class LogContext:
+    """Контекст логирования одного апдейта: данные события, доп. сообщение и уровень."""
+
+    __slots__ = ("add_message", "context", "data", "event", "level", "raw_state")
+
+    def __init__(self, level: LEVELS = "info") -> None:
+        """Конструктор контекста.
+
+        Args:
+            level: уровень, с которым запишется итоговый лог апдейта.
+        """
+        self.context: dict[str, Any] | None = None
+        self.add_message = ""
+        self.level: LEVELS = level
+        # событие и данные хендлера. Контекст из них собирается только когда запись действительно пишется.
+        self.event: TelegramObject | None = None
+        self.data: dict[str, Any] = {}
+        self.raw_state: str | None = None  # состояние FSM до хендлера.
+
+
+def build_event_context(event: TelegramObject, data: dict[str, Any]) -> dict[str, Any]:
+    """Собираем контекст лога из атрибутов события, без полного model_dump.
+
+    Args:
+        event: объект хендлера.
+        data: содержание хендлера.
+    """
+    context: dict[str, Any] = {
+        "event_type": event.__class__.__name__,
+        "data": getattr(event, "data", None),
+    }
+
+    # Информация о пользователе
+    if user := getattr(event, "from_user", None) or data.get("event_from_user"):
+        context |= {
+            "user_tg_id": user.id,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "username": user.username,
+            "full_name": user.full_name,
+        }
+
+    # Текст сообщения или callback-данные
+    if (message := getattr(event, "message", None)) and hasattr(message, "message_id"):
+        reply_markup = getattr(message, "reply_markup", None)
+        context |= {
+            "msg_text": getattr(message, "text", None),
+            "msg_id": message.message_id,
+            "reply_markup": reply_markup.model_dump(exclude_none=True) if reply_markup else None,
+        }
+
+    # Данные callback-запроса (если это нажатие кнопки)
+    if callback := getattr(event, "callback_query", None) or data.get("event_callback_query"):
+        context |= {
+            "callback_data": callback.data,
+            "callback_button_text": getattr(callback.message, "text", None),
+        }
+
+    # Дополнительные данные из aiogram
+    if chat := getattr(event, "chat", None) or data.get("event_chat"):
+        context |= {
+            "chat_id": chat.id,
+            "chat_type": chat.type,
+        }
+    # сообщение от клиента
+    if text := getattr(event, "text", None):
+        context |= {"client_text": text}
+    return context
+
+
+# контекст текущего апдейта. У каждой задачи апдейта своя копия, поэтому логи чатов не смешиваются.
+current_log_context: contextvars.ContextVar[LogContext | None] = contextvars.ContextVar(
+    "current_log_context", default=None,
+)
+
+
+class LocalQueueHandler(QueueHandler):
+    """QueueHandler для очереди внутри процесса.
+
+    Форматирование и трейсбек переносим в поток слушателя: в очередь кладем запись как есть,
+    только фиксируем текст сообщения, что бы аргументы не поменялись до записи.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Подготовка записи к постановке в очередь."""
+        record.msg = record.getMessage()
+        record.args = None
+        return record
 
 
 class Logger:
@@ -25,6 +139,8 @@ class Logger:
             max_file_size: int = 10 * 1024 * 1024,  # 10 MB
             backup_count: int = 5,  # Количество backup-файлов
             when: str = "midnight",  # Ротация логов каждый день в полночь
+            log_format: str | None = None,
+            success_sample_rate: float | None = None,
             ):
         """Инициализация логгера.
 
@@ -33,27 +149,35 @@ class Logger:
         :param max_file_size: Максимальный размер файла (в байтах).
         :param backup_count: Количество backup-файлов.
         :param when: Периодичность ротации логов (например, "midnight", "D", "H").
+        :param log_format: "text" или "json" - одна JSON запись на строку. По умолчанию из LOG_FORMAT.
+        :param success_sample_rate: доля успешных апдейтов, которые пишутся в лог (от 0 до 1).
+            По умолчанию из LOG_SUCCESS_SAMPLE_RATE. Предупреждения и ошибки пишутся всегда.
         """
         self.log_dir = log_dir
+        if (process_name := multiprocessing.current_process().name) != "MainProcess":
+            # у воркера свои файлы: ротация общего файла из нескольких процессов теряет записи.
+            log_file = _process_file_name(log_file, process_name)
+            error_log_file = _process_file_name(error_log_file, process_name)
         self.log_file = log_file
         self.error_log_file = error_log_file
         self.max_file_size = max_file_size
         self.backup_count = backup_count
         self.when = when
-        # для хранения контекста. При каждом вызове хендлера, контекст создается зааново в middlewarer
-        self.context: dict[str, Any] | None = None
-        # дополнительные сообщение, предлагаю сюда добавлять сообщения конкатенацией.
-        # Например:
-        #   self.add_message += "\nДобавляем сообщение с новой строки, что бы было более читаемо."
-        self.add_message: str = ""
-        self.level: LEVELS = "info"
+        self.json_mode = (log_format or os.getenv("LOG_FORMAT", "text")).lower() == "json"
+        if success_sample_rate is None:
+            success_sample_rate = float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", "1"))
+        self.success_sample_rate = success_sample_rate
+        # счетчики апдейтов по хендлерам: (хендлер, исход) -> количество. Считаются без сэмплирования.
+        self.handler_counters: Counter[tuple[str, str]] = Counter()
+        # контекст вне апдейта (старт бота, фоновые задачи). Контекст апдейта создается в middleware.
+        self._default_context = LogContext()
 
         # Создаем директорию для логов, если она не существует
-        os.makedirs("app/logs", exist_ok=True)
+        os.makedirs(self.log_dir, exist_ok=True)
 
         # Настройка основного логгера
         self.logger = logging.getLogger("bot_logger")
-        self.logger.setLevel(logging.DEBUG)
+        self.logger.setLevel(os.getenv("LOG_LEVEL", "DEBUG").upper())
 
         # Настройка логгера ошибок
         self.error_logger = logging.getLogger("bot_error_logger")
@@ -74,18 +198,18 @@ class Logger:
         )
 
         # Форматтер для логов
-        formatter = logging.Formatter(
+        formatter: logging.Formatter = logging.Formatter(
             "\n======================================================================================================\n"
             "%(asctime)s - %(name)s - %(levelname)s"
             "\n======================================================================================================\n"
             "Message: %(message)s\n"
             "Exception: %(exc_info)s\n"
         )
+        if self.json_mode:
+            formatter = JsonFormatter()
 
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(console_formatter)
-        self.logger.addHandler(console_handler)
-        self.error_logger.addHandler(console_handler)
 
         # Обработчик для обычных логов (ротация по размеру)
         log_handler = RotatingFileHandler(
@@ -94,7 +218,7 @@ class Logger:
             backupCount=self.backup_count,
         )
         log_handler.setFormatter(formatter)
-        self.logger.addHandler(log_handler)
+        log_handler.addFilter(logging.Filter(self.logger.name))
 
         # Обработчик для логов ошибок (ротация по времени)
         error_handler = TimedRotatingFileHandler(
@@ -103,7 +227,24 @@ class Logger:
             backupCount=self.backup_count,
         )
         error_handler.setFormatter(formatter)
-        self.error_logger.addHandler(error_handler)
+        error_handler.addFilter(logging.Filter(self.error_logger.name))
+
+        # Запись на диск и в консоль делает фоновый поток, event loop только кладет запись в очередь.
+        self.queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        self.queue_handler = LocalQueueHandler(self.queue)
+        self.listener = QueueListener(
+            self.queue, console_handler, log_handler, error_handler, respect_handler_level=True,
+        )
+        self.logger.addHandler(self.queue_handler)
+        self.error_logger.addHandler(self.queue_handler)
+        self.listener.start()
+        self._stopped = False
+        atexit.register(self.stop)
+
+        # время, которое вызовы log/log_error провели в event loop.
+        self._blocking_calls = 0
+        self._blocking_total = 0.0
+        self._blocking_max = 0.0
 
         # Добавление фильтра
         duplicate_filter = DuplicateFilter()
@@ -115,24 +256,69 @@ class Logger:
         :param message: Сообщение для логирования.
         :param level: Уровень логирования (info, warning, error, critical).
         """
-        level = level or self.level
+        start = time.perf_counter()
+        try:
+            self._log(message, level)
+        finally:
+            self._track_blocking(time.perf_counter() - start)
+
+    def _log(self, message: str, level: str | None = None) -> None:
+        """Формирование и постановка записи в очередь. Для отфильтрованного уровня контекст не собирается."""
+        level = (level or self.level).lower()
+        if level not in LEVEL_NUMBERS:
+            raise ValueError(f"Неизвестный уровень логирования: {level}")
+        if not self.is_enabled(level):
+            return
         if self.add_message:
             message += self.add_message
-        if self.context:
-            message = f"{message}\nContext: {json.dumps(self.context, indent=2, ensure_ascii=False)}"
-
-        if level.lower() == "debug":
-            self.logger.debug(message)
-        elif level.lower() == "info":
-            self.logger.info(message)
-        elif level.lower() == "warning":
-            self.logger.warning(message)
-        elif level.lower() == "error":
-            self.error_logger.error(message)
-        elif level.lower() == "critical":
-            self.error_logger.critical(message)
-        else:
-            raise ValueError(f"Неизвестный уровень логирования: {level}")
+        self._emit(self._target(level), LEVEL_NUMBERS[level], message, self.context)
+
+    def _emit(self,
+              logger: logging.Logger,
+              levelno: int,
+              message: str,
+              context: dict[str, Any] | None,
+              exc_info: Any = None) -> None:
+        """Запись в логгер. В JSON режиме контекст идет отдельным полем, а не текстом сообщения."""
+        if self.json_mode:
+            logger.log(levelno, message, exc_info=exc_info, extra={"context": context})
+            return
+        if context:
+            message = f"{message}\nContext: {dump_context(context)}"
+        logger.log(levelno, message, exc_info=exc_info)
+
+    def should_log_success(self) -> bool:
+        """Сэмплирование успешных апдейтов: True, если этот апдейт нужно записать."""
+        return self.success_sample_rate >= 1 or random.random() < self.success_sample_rate
+
+    def count_handler(self, handler_name: str, outcome: str) -> None:
+        """Учитываем апдейт в агрегированных счетчиках хендлеров.
+
+        Args:
+            handler_name: имя функции хендлера.
+            outcome: исход обработки, например "success" или "error".
+        """
+        self.handler_counters[(handler_name, outcome)] += 1
+
+    def handler_stats(self) -> dict[str, dict[str, int]]:
+        """Агрегированные счетчики: хендлер -> исход -> количество."""
+        stats: dict[str, dict[str, int]] = {}
+        for (handler_name, outcome), count in self.handler_counters.items():
+            stats.setdefault(handler_name, {})[outcome] = count
+        return stats
+
+    def _target(self, level: str) -> logging.Logger:
+        """Логгер для уровня: ошибки пишутся в отдельный логгер."""
+        return self.error_logger if LEVEL_NUMBERS[level] >= logging.ERROR else self.logger
+
+    def is_enabled(self, level: str) -> bool:
+        """Будет ли запись этого уровня выведена.
+
+        Args:
+            level: уровень логирования (debug, info, warning, error, critical).
+        """
+        level = level.lower()
+        return self._target(level).isEnabledFor(LEVEL_NUMBERS[level])
 
     def log_error(self, message: str,
                   exc_info: dict[str, Any] | bool | None = None,
@@ -142,9 +328,42 @@ class Logger:
         :param message: Сообщение об ошибке.
         :param exc_info: Информация об исключении (если есть).
         """
-        if context := context or self.context:
-            message = f"{message}\nContext: {json.dumps(context, indent=2, ensure_ascii=False)}"
-        self.error_logger.error(message, exc_info=exc_info)
+        start = time.perf_counter()
+        try:
+            self._emit(self.error_logger, logging.ERROR, message, context or self.context, exc_info=exc_info)
+        finally:
+            self._track_blocking(time.perf_counter() - start)
+
+    def _track_blocking(self, elapsed: float) -> None:
+        """Учитываем время вызова логгера в event loop."""
+        self._blocking_calls += 1
+        self._blocking_total += elapsed
+        self._blocking_max = max(self._blocking_max, elapsed)
+
+    def blocking_stats(self) -> BlockingStats:
+        """Сколько вызовы логгера блокируют event loop: количество, суммарное, максимальное и среднее время."""
+        calls = self._blocking_calls
+        return {
+            "calls": calls,
+            "total_ms": self._blocking_total * 1000,
+            "max_ms": self._blocking_max * 1000,
+            "avg_ms": self._blocking_total / calls * 1000 if calls else 0.0,
+            "queue_size": self.queue.qsize(),
+        }
+
+    def stop(self) -> None:
+        """Останавливаем фоновую запись, предварительно дописав все записи из очереди."""
+        if self._stopped:
+            return
+        self._stopped = True
+        if self.handler_counters:  # итог счетчиков пишем всегда, даже если успешные апдейты сэмплировались.
+            levelno = max(self.logger.getEffectiveLevel(), logging.INFO)
+            self._emit(self.logger, levelno, "Счетчики хендлеров", self.handler_stats())
+        self.logger.removeHandler(self.queue_handler)
+        self.error_logger.removeHandler(self.queue_handler)
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
 
     def cleanup_old_logs(self) -> None:
         """Очистка старых лог-файлов."""
@@ -159,65 +378,116 @@ class Logger:
                     self.log(f"Удален старый лог-файл: {filename}", level="info")
 
     async def create_log_context(self, event: TelegramObject, data: dict[str, Any]) -> None:
-        """парсим данные сообщения хендлера.
+        """Запоминаем событие хендлера. Сам контекст соберется лениво, при записи лога.
 
         Args:
             event: объект хендлера.
             data: содержание хендлера.
         """
-        event_dump = event.model_dump()
-        self.context = {
-        "event_type": event_dump.get("_") if hasattr(event, "_") else event.__class__.__name__,
-        "data": event_dump.get("data"),
-    }
-
-        # Информация о пользователе
-        if user := event_dump.get("from_user") or data.get("event_from_user"):
-            self.context |= {
-                "user_tg_id": user.get("id"),
-                "first_name": user.get("first_name"),
-                "last_name": user.get("last_name"),
-                "username": user.get("username"),
-                "full_name": user.get("full_name")
+        current = self._current
+        current.event = event
+        current.data = data
+        current.raw_state = data.get("raw_state")  # хендлер может сменить состояние, запоминаем то, с которым пришли.
+        current.context = None
+
+    async def load_state_context(self) -> None:
+        """Дополняем контекст состоянием памяти (FSM). Вызываем только если запись будет выведена."""
+        current = self._current
+        if (context := self.context) is None or "state" in context:
+            return
+        state_data = await state.get_data() if (state := current.data.get("state")) else None
+        if state_data or current.raw_state:
+            context |= {
+                "state_data": state_data,
+                "state": current.raw_state,  # Состояние, в котором пришел апдейт
             }
 
-        # Текст сообщения или callback-данные
-        if message := event_dump.get("message") or data.get("event_message"):
-            self.context |= {
-                "msg_text": message.get("text"),
-                "msg_id": message.get("message_id"),
-                "reply_markup": message.get("reply_markup")
-            }
+    @property
+    def _current(self) -> LogContext:
+        """Контекст логирования текущего апдейта."""
+        return current_log_context.get() or self._default_context
+
+    @property
+    def context(self) -> dict[str, Any] | None:
+        """Данные события текущего апдейта. При каждом вызове хендлера контекст создается заново в middleware."""
+        current = self._current
+        if current.context is None and current.event is not None:
+            current.context = build_event_context(current.event, current.data)
+        return current.context
+
+    @context.setter
+    def context(self, value: dict[str, Any] | None) -> None:
+        self._current.context = value
+
+    @property
+    def add_message(self) -> str:
+        """Дополнительные сообщения апдейта, предлагаю добавлять их конкатенацией.
+
+        Например:
+            logger.add_message += "\nДобавляем сообщение с новой строки, что бы было более читаемо."
+        """
+        return self._current.add_message
 
-        # Данные callback-запроса (если это нажатие кнопки)
-        if callback := event_dump.get("callback_query") or data.get("event_callback_query"):
-            self.context |= {
-                "callback_data": callback.get("data"),
-                "callback_button_text": callback.get("message", {}).get("text"),
-            }
+    @add_message.setter
+    def add_message(self, value: str) -> None:
+        self._current.add_message = value
 
-        # Состояние памяти (FSM)
-        if (state := data.get("state")) and (state_data := await state.get_data()):  # Получаем данные из состояния
-            self.context |= {
-                "state_data": state_data,
-                "state": await state.get_state(),  # Текущее состояние
-            }
+    @property
+    def level(self) -> LEVELS:
+        """Уровень итогового лога апдейта."""
+        return self._current.level
 
-        # Дополнительные данные из aiogram
-        if chat := event_dump.get("chat") or data.get("event_chat"):
-            chat = chat.model_dump() if hasattr(chat, "model_dump") else chat
-            self.context |= {
-                "chat_id": chat.get("id"),
-                "chat_type": chat.get("type"),
-            }
-        # сообщение от клиента
-        if text := event_dump.get("text"):
-            self.context |= {"client_text": text}
+    @level.setter
+    def level(self, value: LEVELS) -> None:
+        self._current.level = value
+
+    def reset_logger_params(self) -> contextvars.Token[LogContext | None]:
+        """Создаем чистый контекст логирования для нового апдейта.
 
-    def reset_logger_params(self) -> None:
-        self.add_message = ""  # обнуляем доп сообщение.
+        Returns:
+            токен, которым контекст сбрасывается в release_logger_params.
+        """
         # если режим не указан в env, то будет инфо
-        self.level = "debug" if os.getenv("DEBUG", None) == "True" else "info"
+        level: LEVELS = "debug" if os.getenv("DEBUG", None) == "True" else "info"
+        return current_log_context.set(LogContext(level))
+
+    @staticmethod
+    def release_logger_params(token: contextvars.Token[LogContext | None]) -> None:
+        """Возвращаем контекст логирования, который был до апдейта.
+
+        Args:
+            token: токен из reset_logger_params.
+        """
+        current_log_context.reset(token)
+
+def _process_file_name(file_name: str, process_name: str) -> str:
+    """Имя файла лога процесса: bot.log -> bot-worker-0.log."""
+    stem, ext = os.path.splitext(file_name)
+    return f"{stem}-{process_name}{ext}"
+
+
+def dump_context(context: dict[str, Any]) -> str:
+    """Компактная однострочная сериализация контекста."""
+    return json.dumps(context, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class JsonFormatter(logging.Formatter):
+    """Структурированный формат: одна JSON запись на строку."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Сериализуем запись лога."""
+        payload: dict[str, Any] = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        if context := getattr(record, "context", None):
+            payload["context"] = context
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return dump_context(payload)
+
 
 class DuplicateFilter(logging.Filter):
     def __init__(self) -> None:
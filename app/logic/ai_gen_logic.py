@@ -1,10 +1,51 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from functools import partial
+
 from aiogram.enums.parse_mode import ParseMode
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, AsyncStream
+from openai.types.chat import ChatCompletionChunk
 
-from app.helpers import get_moscow_time, wait_typing
+from app.configs import (
+    AI_BREAKER_RESET,
+    AI_BREAKER_THRESHOLD,
+    AI_HEDGE_DELAY,
+    AI_MAX_CONCURRENCY,
+    AI_MODELS,
+    AI_QUEUE_TIMEOUT,
+    AI_QUOTA_LIMIT,
+    AI_QUOTA_WINDOW,
+    AI_STREAM,
+    AI_STREAM_EDIT_INTERVAL,
+    AI_TIMEOUT,
+    WISH_POOL_SIZE,
+    WISH_POOL_WATERMARK,
+)
+from app.helpers import get_time_of_day, typing_indicator
 from app.keyboards import back_to_start_keyboard
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError, GuardBusyError, GuardedCall
+from app.services.hedging import HedgedRequest
+from app.services.message_manager import MessageManager
+from app.services.outbound import outbound_scheduler
+from app.services.quota import SlidingWindowQuota
+from app.services.wish_pool import WishPool
+
+# открытый поток ответа модели, итератор по его чанкам и первый полученный текст.
+OpenedStream = tuple[AsyncStream[ChatCompletionChunk], AsyncIterator[ChatCompletionChunk], str]
+
+WISH_PLACEHOLDER = "✨ Генерирую особенное пожелание для тебя..."
+WISH_ERROR = "❌ Произошла ошибка при генерации. Попробуй еще раз!"
+
+# пожелания на случай, когда ИИ недоступен, а полученных от него еще нет.
+FALLBACK_WISHES = {
+    "утро": "Доброе утро! Пусть первая чашка кофе задаст тон всему дню ☕",
+    "день": "Отличного дня! Пусть кофе бодрит, а дела складываются легко ☕",
+    "вечер": "Добрый вечер! Пусть чашка кофе станет уютным завершением дня ☕",
+    "ночь": "Доброй ночи! Пусть завтрашний кофе будет еще вкуснее ☕",
+}
 
 
 class AIGeneratorLogic:
@@ -17,34 +58,188 @@ class AIGeneratorLogic:
             ai_client: клиент.
         """
         self.ai_client = ai_client
+        # ограничиваем одновременные запросы к ИИ, время ответа и перестаем ходить в ИИ, пока он лежит.
+        self.ai_guard = GuardedCall("openrouter",
+                                    max_concurrency=AI_MAX_CONCURRENCY,
+                                    timeout=AI_TIMEOUT,
+                                    queue_timeout=AI_QUEUE_TIMEOUT,
+                                    breaker=CircuitBreaker(AI_BREAKER_THRESHOLD, AI_BREAKER_RESET))
+        # модели в порядке приоритета, медленную подстраховываем следующей. Слот ai_guard берет каждый запрос
+        # к модели. Задержки полного ответа и первого токена потока считаем раздельно.
+        self.hedger = HedgedRequest(AI_MODELS, initial_delay=AI_HEDGE_DELAY, guard=self.ai_guard)
+        self.stream_hedger = HedgedRequest(AI_MODELS, initial_delay=AI_HEDGE_DELAY, guard=self.ai_guard)
+        # не больше AI_QUOTA_LIMIT пожеланий пользователю за AI_QUOTA_WINDOW секунд.
+        self.ai_quota = SlidingWindowQuota(AI_QUOTA_LIMIT, AI_QUOTA_WINDOW)
+        self._last_wishes: dict[str, str] = {}  # время суток -> последнее полученное от ИИ пожелание.
+        # готовые пожелания, что бы не ждать ИИ на каждое нажатие кнопки.
+        self.wish_pool = WishPool(self.generate_wish, size=WISH_POOL_SIZE, watermark=WISH_POOL_WATERMARK)
 
-    async def gpt_text(self, callback: CallbackQuery, state: FSMContext) -> None:
-        """Функция отправляет сообщение к ИИ для запроса отличного дня.
+    @staticmethod
+    def wish_prompt(time_of_day: str) -> str:
+        """Промпт для пожелания отличного дня.
 
         Args:
-            callback: объект входящий запрос колбека кнопки обратного вызова на inline keyboard
-            state: Состояния памяти.
+            time_of_day: время суток по Москве, от него зависит приветствие в пожелании.
         """
-        await wait_typing(callback)
-        msc_time = get_moscow_time()
-        msg_for_chat = ("Доброе пожелание, на русском языке, человеку, который любит кофе. "
-                        "Пожелание обезличенно, так как не изветно, это будет читать мужчина или женщина. "
-                        "Не более 200 символов и сразу выдай финальный ответ. "
-                        "ВАЖНО, клиент ддолжен лолучить чистый текст, без своих технических дополнений от себя!"
-                        f"Учитывай время: сейчас {msc_time}, от этого зависит в ответе исользуем утро, день или вечер. "
-                        "Используй markdown для приложения teleram")
-        completion = await self.ai_client.chat.completions.create(
-            messages=[{
-                "role": "user",
-                "content": msg_for_chat,
-                }],
-            model="deepseek/deepseek-r1-0528:free",
+        return ("Доброе пожелание, на русском языке, человеку, который любит кофе. "
+                "Пожелание обезличенно, так как не изветно, это будет читать мужчина или женщина. "
+                "Не более 200 символов и сразу выдай финальный ответ. "
+                "ВАЖНО, клиент ддолжен лолучить чистый текст, без своих технических дополнений от себя!"
+                f"Учитывай время суток: сейчас {time_of_day}, от этого зависит приветствие в ответе. "
+                "Используй markdown для приложения teleram")
+
+    def fallback_wish(self, time_of_day: str) -> str:
+        """Пожелание без ИИ: последнее полученное для этого времени суток или заготовленное.
+
+        Args:
+            time_of_day: время суток по Москве.
+        """
+        return self._last_wishes.get(time_of_day) or FALLBACK_WISHES.get(time_of_day, FALLBACK_WISHES["день"])
+
+    async def generate_wish(self, time_of_day: str) -> str:
+        """Запрашиваем у ИИ пожелание отличного дня.
+
+        Args:
+            time_of_day: время суток по Москве, от него зависит приветствие в пожелании.
+        """
+        completion = await self.hedger.run(
+            lambda model: self.ai_client.chat.completions.create(
+                messages=[{
+                    "role": "user",
+                    "content": self.wish_prompt(time_of_day),
+                    }],
+                model=model,
+                ),
             )
         text = completion.choices[0].message.content
-        await callback.message.delete()  # удаляем сообщение от генерируемое функцией create_main_keyboard
-        message_for_user = await callback.message.answer(
+        if text:
+            self._last_wishes[time_of_day] = text
+        return text
+
+    async def gpt_text(self, callback: CallbackQuery, state: FSMContext, message_manager: MessageManager) -> None:
+        """Функция отправляет пожелание отличного дня.
+
+        Пока пожелание готовится, в сообщении колбека висит заглушка. Отдельной защиты от параллельной генерации
+        в одном чате нет: апдейты чата обрабатываются по очереди (ChatSerializationMiddleware), а повторное
+        нажатие той же кнопки не доходит до хендлера.
+
+        Args:
+            callback: объект входящий запрос колбека кнопки обратного вызова на inline keyboard
+            state: Состояния памяти.
+            message_manager: Сервис для управления сообщениями с безопасной обработкой ошибок.
+        """
+        chat_id = callback.message.chat.id
+        message_id = callback.message.message_id
+        await message_manager.safe_edit_text(chat_id, message_id, WISH_PLACEHOLDER, reply_markup=None)
+        try:
+            await self.send_wish(callback, state, message_manager)
+        except Exception:
+            await message_manager.safe_edit_text(chat_id, message_id, WISH_ERROR)
+            raise
+
+    async def send_wish(self, callback: CallbackQuery, state: FSMContext, message_manager: MessageManager) -> None:
+        """Отправляем пожелание пользователю.
+
+        Пожелание берем из пула готовых, в ИИ идем только если пул пуст. Квоту пользователя тратит
+        только запрос в ИИ. Если квота исчерпана или предохранитель ИИ разомкнут,
+        отдаем последнее полученное или заготовленное пожелание.
+
+        Args:
+            callback: объект входящий запрос колбека кнопки обратного вызова на inline keyboard
+            state: Состояния памяти.
+            message_manager: Сервис для управления сообщениями с безопасной обработкой ошибок.
+        """
+        time_of_day = get_time_of_day()
+        text = self.wish_pool.take(time_of_day)  # готовое пожелание из пула не тратит ни ИИ, ни квоту.
+        if text is None and not self.ai_quota.acquire(callback.from_user.id):
+            text = self.fallback_wish(time_of_day)  # квота исчерпана, ИИ не тратим.
+        elif text is None:
+            try:
+                if AI_STREAM:
+                    await self.stream_wish(callback, time_of_day, message_manager)
+                    await state.update_data(msg_for_delete=[callback.message.message_id])
+                    return
+                async with typing_indicator(callback):  # 'Печатает' пока ждем ответ ИИ.
+                    text = await self.generate_wish(time_of_day)
+            except (CircuitOpenError, GuardBusyError):
+                text = self.fallback_wish(time_of_day)  # ИИ недоступен или занят, не ждем его.
+        chat_id = callback.message.chat.id
+        # удаляем сообщение от генерируемое функцией create_main_keyboard
+        await outbound_scheduler.submit(chat_id, callback.message.delete)
+        message_for_user = await outbound_scheduler.submit(chat_id, partial(
+            callback.message.answer,
             text,
             reply_markup=back_to_start_keyboard,
             parse_mode=ParseMode.MARKDOWN,
-            )
+            ))
         await state.update_data(msg_for_delete=[message_for_user.message_id])
+
+    async def stream_wish(self, callback: CallbackQuery, time_of_day: str, message_manager: MessageManager) -> str:
+        """Генерируем пожелание потоком и показываем его по мере получения токенов.
+
+        Заглушкой служит сообщение колбека, его текст правим не чаще AI_STREAM_EDIT_INTERVAL секунд.
+        Пока текст не полный, markdown не применяем, иначе телеграм отклонит незакрытую разметку.
+
+        Args:
+            callback: объект входящий запрос колбека кнопки обратного вызова на inline keyboard
+            time_of_day: время суток по Москве.
+            message_manager: Сервис для управления сообщениями с безопасной обработкой ошибок.
+        """
+        chat_id = callback.message.chat.id
+        message_id = callback.message.message_id
+        shown = ""
+        last_edit = 0.0
+        async with typing_indicator(callback):  # 'Печатает' до первого токена, дальше текст виден в сообщении.
+            (stream, chunks, text), slot = await self.stream_hedger.run_held(
+                lambda model: self._open_stream(model, time_of_day),
+                cleanup=lambda opened: opened[0].close(),  # поток модели, ответившей одновременно с победителем.
+                )
+        # слот ai_guard занят, пока поток не дочитан. Таймаут на весь поток, ошибки чтения учитывает предохранитель.
+        with slot:
+            async with asyncio.timeout_at(slot.deadline), stream:
+                while True:
+                    if time.monotonic() - last_edit >= AI_STREAM_EDIT_INTERVAL and text.strip() != shown:
+                        shown = text.strip()
+                        await message_manager.safe_edit_text(chat_id, message_id, shown)
+                        last_edit = time.monotonic()
+                    if (chunk := await anext(chunks, None)) is None:
+                        break
+                    if chunk.choices and (delta := chunk.choices[0].delta.content):
+                        text += delta
+
+        if not text.strip():
+            raise RuntimeError("AI returned an empty wish")
+        if not await message_manager.safe_edit_text(chat_id, message_id, text, reply_markup=back_to_start_keyboard,
+                                                    parse_mode=ParseMode.MARKDOWN):
+            # ИИ мог вернуть невалидный markdown, показываем как есть.
+            await message_manager.safe_edit_text(chat_id, message_id, text, reply_markup=back_to_start_keyboard)
+        self._last_wishes[time_of_day] = text
+        return text
+
+    async def _open_stream(self, model: str, time_of_day: str) -> OpenedStream:
+        """Открываем поток ответа модели и ждем первый текст.
+
+        Победителем подстраховки считается модель, первой приславшая текст, а не просто открывшая поток.
+
+        Args:
+            model: модель ИИ.
+            time_of_day: время суток по Москве.
+        """
+        stream = await self.ai_client.chat.completions.create(
+            messages=[{
+                "role": "user",
+                "content": self.wish_prompt(time_of_day),
+                }],
+            model=model,
+            stream=True,
+            )
+        chunks = aiter(stream)
+        try:
+            async for chunk in chunks:
+                if chunk.choices and (delta := chunk.choices[0].delta.content):
+                    return stream, chunks, delta
+        except BaseException:
+            await stream.close()  # проигравшую модель отменяют, отпускаем ее соединение.
+            raise
+        await stream.close()
+        raise RuntimeError(f"AI model {model} returned an empty stream")
@@ -6,7 +6,6 @@ from aiogram.types import CallbackQuery, Message
 
 from app.configs import ADMIN_IDS
 from app.database.requests.feedback import FeedbackContext
-from app.helpers import wait_typing
 from app.keyboards import (
     CALLBACK_BACK_TO_START,
     back_to_start_keyboard,
@@ -56,8 +55,6 @@ class LogicFeedback(FeedbackContext):
             state: Состояния памяти.
             message_manager: Сервис для управления сообщениями с безопасной обработкой ошибок.
         """
-        await wait_typing(callback)
-
         chat_id = callback.message.chat.id
         message_id = callback.message.message_id
 
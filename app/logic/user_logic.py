@@ -7,7 +7,7 @@ from app.configs import ADMIN_IDS, current_chat_id
 from app.database.models import Drink
 from app.database.requests.keyboards import get_names
 from app.database.requests.user import CoffeePointHint, UserContext, UserDataHint
-from app.helpers import delete_messages, wait_typing
+from app.helpers import delete_messages, typing_indicator
 from app.keyboards import (
     CALLBACK_COFFEE_POINT_PREFIX,
     CALLBACK_DRINKS,
@@ -46,21 +46,21 @@ class UserLogic(UserModel):
             state: состояние памяти.
             message_manager: Сервис для управления сообщениями с безопасной обработкой ошибок.
         """
-        await wait_typing(message)
-        msg = "Добро пожаловать в Coffee Point!"
-        await self.set_user(message)
+        async with typing_indicator(message):
+            msg = "Добро пожаловать в Coffee Point!"
+            await self.set_user(message)
 
-        if await state.get_data() or await state.get_state():
-            await state.clear()
+            if await state.get_data() or await state.get_state():
+                await state.clear()
 
-        await message_manager.cleanup_chat_messages(self.chat_id)
+            await message_manager.cleanup_chat_messages(self.chat_id)
 
-        # Получаем список кофейных точек
-        coffee_points = await self.get_coffee_points()
+            # Получаем список кофейных точек
+            coffee_points = await self.get_coffee_points()
 
-        main_keyboard = await self.get_main_keyboard(message, coffee_points)
+            main_keyboard = await self.get_main_keyboard(message, coffee_points)
 
-        await message_manager.safe_send_message(self.chat_id, msg, reply_markup=main_keyboard)
+            await message_manager.safe_send_message(self.chat_id, msg, reply_markup=main_keyboard)
 
     async def get_all_drinks(self,
                              callback: CallbackQuery,
@@ -73,55 +73,53 @@ class UserLogic(UserModel):
             state: Состояние памяти
             message_manager: Сервис для управления сообщениями с безопасной обработкой ошибок.
         """
-        await wait_typing(callback)
-
-        message_id = callback.message.message_id
-        point_id = int(callback.data.replace(CALLBACK_DRINKS, ""))
+        async with typing_indicator(callback):
+            message_id = callback.message.message_id
+            point_id = int(callback.data.replace(CALLBACK_DRINKS, ""))
 
-        await state.update_data(point_id=point_id)
+            await state.update_data(point_id=point_id)
 
-        # if message_ids_to_delete := state_data.get("drink_msgs"):  # назад к списку напитков.
-        #     await delete_messages(callback, [message_ids_to_delete["photo_msg_id"]])
-        #     await state.clear()
+            # if message_ids_to_delete := state_data.get("drink_msgs"):  # назад к списку напитков.
+            #     await delete_messages(callback, [message_ids_to_delete["photo_msg_id"]])
+            #     await state.clear()
 
-        names = await self.get_names_from_db(coffee_point_id=point_id)
-        drink_names_keyboard = self.collect_names_with_inline_bld(names, point_id)
+            names = await self.get_names_from_db(coffee_point_id=point_id)
+            drink_names_keyboard = self.collect_names_with_inline_bld(names, point_id)
 
-        await message_manager.safe_edit_message(self.chat_id, message_id, "Выберете напиток", drink_names_keyboard)
+            await message_manager.safe_edit_message(self.chat_id, message_id, "Выберете напиток", drink_names_keyboard)
 
     async def get_drink_detail(self, callback: CallbackQuery, state: FSMContext, message_manager: MessageManager) -> None:
-        await wait_typing(callback)
-
-        state_data = await state.get_data()
-        # if message_ids_to_delete := state_data.get("drink_msgs"):  # возвращаемся к списку напитков.
-        #     await delete_messages(callback, list(message_ids_to_delete.values()))
-        #     await state.clear()
-        message_id = callback.message.message_id
-        point_id = state_data["point_id"]
-
-        drink_detail = await self.get_drink_detail_from_db(callback.data)
-        # await state.update_data(ingredients=result["ingredients"])
-
-        # Удаляем сообщение со списком напитков
-        # await callback.message.delete()
-
-        # photo_message = await self.media_service.safe_send_photo(
-        #     callback,
-        #     photo_string=result["photos"][0]["photo_string"],
-        #     caption=f"Напиток: {result["name"]}",
-        #     show_caption_above_media=True,
-        # )
-        drink_text = f"Напиток: **{drink_detail['name']}**\n\nОписание напитка: {drink_detail['description']}"
-        back_to_drinks = await make_back_to_drinks_kb(point_id)
-
-        await message_manager.safe_edit_message(self.chat_id,
-                                                message_id,
-                                                drink_text,
-                                                back_to_drinks,
-                                                parse_mode=ParseMode.MARKDOWN)
-        # await state.update_data(drink_msgs={"photo_msg_id": photo_message.message_id,
-        #                                     "desc_msg_id": description_message.message_id},
-        #                                     ingredients=result["ingredients"])
+        async with typing_indicator(callback):
+            state_data = await state.get_data()
+            # if message_ids_to_delete := state_data.get("drink_msgs"):  # возвращаемся к списку напитков.
+            #     await delete_messages(callback, list(message_ids_to_delete.values()))
+            #     await state.clear()
+            message_id = callback.message.message_id
+            point_id = state_data["point_id"]
+
+            drink_detail = await self.get_drink_detail_from_db(callback.data)
+            # await state.update_data(ingredients=result["ingredients"])
+
+            # Удаляем сообщение со списком напитков
+            # await callback.message.delete()
+
+            # photo_message = await self.media_service.safe_send_photo(
+            #     callback,
+            #     photo_string=result["photos"][0]["photo_string"],
+            #     caption=f"Напиток: {result["name"]}",
+            #     show_caption_above_media=True,
+            # )
+            drink_text = f"Напиток: **{drink_detail['name']}**\n\nОписание напитка: {drink_detail['description']}"
+            back_to_drinks = await make_back_to_drinks_kb(point_id)
+
+            await message_manager.safe_edit_message(self.chat_id,
+                                                    message_id,
+                                                    drink_text,
+                                                    back_to_drinks,
+                                                    parse_mode=ParseMode.MARKDOWN)
+            # await state.update_data(drink_msgs={"photo_msg_id": photo_message.message_id,
+            #                                     "desc_msg_id": description_message.message_id},
+            #                                     ingredients=result["ingredients"])
 
     # async def execute_start_command(self, message: Message, state: FSMContext, message_manager: MessageManager):
     #     """Логика командыы '/start'.
@@ -209,29 +207,28 @@ class UserLogic(UserModel):
             callback: объект входящий запрос колбека кнопки обратного вызова на inline keyboard
             message_manager: Сервис для управления сообщениями с безопасной обработкой ошибок.
         """
-        await wait_typing(callback)
+        async with typing_indicator(callback):
+            msg = "Кофейная точка не найдена"
 
-        msg = "Кофейная точка не найдена"
-
-        message_id = callback.message.message_id
+            message_id = callback.message.message_id
 
-        point_id = int(callback.data.replace(CALLBACK_COFFEE_POINT_PREFIX, ""))
+            point_id = int(callback.data.replace(CALLBACK_COFFEE_POINT_PREFIX, ""))
 
-        point_info = await self.get_coffee_point_info_from_db(point_id)
+            point_info = await self.get_coffee_point_info_from_db(point_id)
 
-        if not point_info:
-            await message_manager.safe_edit_message(self.chat_id, message_id, msg)
-            return
+            if not point_info:
+                await message_manager.safe_edit_message(self.chat_id, message_id, msg)
+                return
 
-        # Формируем сообщение с информацией о точке
-        message_text = f"🏪 {point_info['name']}\n\n📍 Адрес: {point_info['address']}\n"
-        if point_info["metro_station"]:
-            message_text += f"🚇 Метро: {point_info['metro_station']}\n"
+            # Формируем сообщение с информацией о точке
+            message_text = f"🏪 {point_info['name']}\n\n📍 Адрес: {point_info['address']}\n"
+            if point_info["metro_station"]:
+                message_text += f"🚇 Метро: {point_info['metro_station']}\n"
 
-        point_keyboard = await self.collect_coffee_point_kb(point_id)
+            point_keyboard = await self.collect_coffee_point_kb(point_id)
 
-        await message_manager.safe_edit_message(self.chat_id,
-                                                message_id,
-                                                message_text,
-                                                reply_markup=point_keyboard,
-                                                parse_mode=ParseMode.MARKDOWN)
+            await message_manager.safe_edit_message(self.chat_id,
+                                                    message_id,
+                                                    message_text,
+                                                    reply_markup=point_keyboard,
+                                                    parse_mode=ParseMode.MARKDOWN)
@@ -4,16 +4,30 @@ from aiogram import Dispatcher, Router
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
 
-from app.configs import GPT_TOKEN, OPENROUTER_URL
+from app.configs import (
+    CHAT_LANE_BACKLOG,
+    DB_UNIT_OF_WORK,
+    EARLY_ANSWER_DELAY,
+    GPT_TOKEN,
+    OPENROUTER_URL,
+    UPDATE_CONCURRENCY,
+)
 from app.logger import Logger
 from app.logic.ai_gen_logic import AIGeneratorLogic
 from app.logic.feedback import LogicFeedback
 from app.logic.user_logic import UserLogic
 from app.middlewares.ai_gen_middleware import AIGenLogicMiddleware
+from app.middlewares.callback_answer_middleware import EarlyCallbackAnswerMiddleware
+from app.middlewares.chat_serialization_middleware import ChatSerializationMiddleware
+from app.middlewares.db_session_middleware import DatabaseSessionMiddleware
 from app.middlewares.feedback import LogicFeedbackMiddleware
+from app.middlewares.fsm_storage_middleware import FSMWriteCoalescingMiddleware
+from app.middlewares.load_shedding_middleware import LoadSheddingMiddleware
 from app.middlewares.logger_middleware import LoggingMiddleware
 from app.middlewares.message_manager_middleware import MessageManagerMiddleware
 from app.middlewares.user_middleware import UserLogicMiddleware
+from app.services.admission import update_admission
+from app.services.fsm_storage import CoalescingStorage
 
 load_dotenv()
 
@@ -35,6 +49,8 @@ user_logic = UserLogic()
 ai_generator_logic = AIGeneratorLogic(ai_connection)
 
 message_manager_middleware = MessageManagerMiddleware()
+chat_serialization_middleware = ChatSerializationMiddleware(backlog=CHAT_LANE_BACKLOG)
+early_callback_answer_middleware = EarlyCallbackAnswerMiddleware(delay=EARLY_ANSWER_DELAY)
 
 
 def activate_middlewares(dp: Dispatcher, routers: Any) -> None:
@@ -52,8 +68,28 @@ def activate_middlewares(dp: Dispatcher, routers: Any) -> None:
 
     routers.ai_router.callback_query.middleware(AIGenLogicMiddleware(ai_generator_logic))
 
+    if DB_UNIT_OF_WORK:  # хендлеры с несколькими запросами выполняют их в одной транзакции.
+        for router in (routers.feedback_router, routers.user_router):
+            router.message.middleware(DatabaseSessionMiddleware())
+            router.callback_query.middleware(DatabaseSessionMiddleware())
+
+    dp.callback_query.middleware(early_callback_answer_middleware)  # первым: флаг хендлера отменяет ранний ответ.
     dp.callback_query.middleware(LoggingMiddleware(logger))
     dp.message.middleware(LoggingMiddleware(logger))
 
     dp.callback_query.middleware(message_manager_middleware)
     dp.message.middleware(message_manager_middleware)
+
+    # до очереди чата и ограничения нагрузки, что бы часики на кнопке убирались, пока апдейт ждет.
+    dp.update.outer_middleware(early_callback_answer_middleware)
+    # апдейты чата по очереди, повторные нажатия кнопки не обрабатываем. FSM читаем уже в очереди чата,
+    # поэтому диспетчер создается с disable_fsm=True и FSMContextMiddleware регистрируется здесь.
+    dp.update.outer_middleware(chat_serialization_middleware)
+    if dp.fsm not in dp.update.outer_middleware:
+        dp.update.outer_middleware(dp.fsm)
+
+    if UPDATE_CONCURRENCY:  # ограничиваем одновременные апдейты, при перегрузке отбрасываем низкоприоритетные.
+        dp.update.outer_middleware(LoadSheddingMiddleware(update_admission))
+
+    if isinstance(dp.fsm.storage, CoalescingStorage):  # записи FSM за апдейт уходят в хранилище одной записью.
+        dp.update.outer_middleware(FSMWriteCoalescingMiddleware(dp.fsm.storage))
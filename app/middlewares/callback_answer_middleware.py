@@ -0,0 +1,162 @@
+import asyncio
+import contextlib
+import contextvars
+import logging
+from collections.abc import Awaitable
+from typing import Any, Callable, TypedDict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.dispatcher.flags import get_flag
+from aiogram.methods import AnswerCallbackQuery, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import CallbackQuery, TelegramObject, Update
+
+logger = logging.getLogger(__name__)
+
+# флаг хендлера: flags={EARLY_ANSWER_FLAG: False} - хендлер отвечает на callback сам (свой текст или alert).
+EARLY_ANSWER_FLAG = "early_answer"
+
+
+class _PendingAnswer:
+    """Callback текущего апдейта и был ли на него уже ответ."""
+
+    __slots__ = ("answered", "callback", "finished", "opted_out")
+
+    def __init__(self, callback: CallbackQuery) -> None:
+        """Конструктор ожидающего ответа."""
+        self.callback = callback
+        self.answered = False
+        self.opted_out = False
+        self.finished = asyncio.Event()  # апдейт обработан, ждать задержку больше незачем.
+
+
+# callback апдейта, на который еще может понадобиться ранний ответ. Выставляется на время апдейта.
+_pending_answer: contextvars.ContextVar[_PendingAnswer | None] = contextvars.ContextVar("pending_answer", default=None)
+# True внутри задачи раннего ответа: ее запрос RepeatedAnswerFilter пропускает.
+_early_call: contextvars.ContextVar[bool] = contextvars.ContextVar("early_call", default=False)
+
+
+class EarlyAnswerStats(TypedDict):
+    """Хинт счетчиков ранних ответов на callback."""
+
+    answered: int
+    preempted: int
+    opted_out: int
+    failed: int
+    dropped: int
+
+
+class EarlyCallbackAnswerMiddleware(BaseMiddleware):
+    """Middleware раннего ответа на callback: если за delay секунд на callback никто не ответил, убираем часики.
+
+    Регистрируется дважды. На апдейты - до ChatSerializationMiddleware, что бы часики убирались и пока апдейт
+    ждет очереди чата или места в LoadSheddingMiddleware. Внутренним middleware callback_query - что бы
+    прочитать флаг хендлера EARLY_ANSWER_FLAG: такой хендлер отвечает сам, ранний ответ отменяется.
+
+    Первый ответ на callback ("попробуйте еще раз" при перегрузке, ответ на повторное нажатие, текст хендлера)
+    отменяет ранний. Ответы хендлера после раннего ответа не отправляются, их отбрасывает RepeatedAnswerFilter.
+    """
+
+    def __init__(self, delay: float = 0.3) -> None:
+        """Конструктор middleware.
+
+        Args:
+            delay: сколько секунд ждем ответа хендлера, прежде чем ответить без текста.
+        """
+        self.delay = delay
+        self.answered = 0
+        self.preempted = 0
+        self.opted_out = 0
+        self.failed = 0
+        self.dropped = 0
+
+    @property
+    def stats(self) -> EarlyAnswerStats:
+        """Ранние ответы, ответы хендлеров до раннего, отключенные флагом, ошибки и отброшенные ответы."""
+        return {
+            "answered": self.answered,
+            "preempted": self.preempted,
+            "opted_out": self.opted_out,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+    async def __call__(self,
+                       handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject,
+                       data: dict[str, Any]) -> Any:
+        """Вызов middleware."""
+        if isinstance(event, CallbackQuery):  # внутренний middleware: хендлер уже выбран.
+            if get_flag(data, EARLY_ANSWER_FLAG) is False:
+                self._opt_out()
+            return await handler(event, data)
+        if not isinstance(event, Update) or (callback := event.callback_query) is None:
+            return await handler(event, data)
+        pending = _PendingAnswer(callback)
+        token = _pending_answer.set(pending)
+        answer = asyncio.create_task(self._answer_later(pending))
+        try:
+            return await handler(event, data)
+        finally:
+            _pending_answer.reset(token)
+            pending.finished.set()  # апдейт обработан без ответа - отвечаем сразу, не дожидаясь задержки.
+            await answer
+
+    def _opt_out(self) -> None:
+        """Хендлер отвечает сам: ранний ответ не нужен, если еще не ушел."""
+        if (pending := _pending_answer.get()) is not None and not pending.answered:
+            pending.opted_out = True
+            self.opted_out += 1
+
+    async def _answer_later(self, pending: _PendingAnswer) -> None:
+        """Через delay секунд или по окончании апдейта отвечаем на callback без текста, если ответа еще не было."""
+        with contextlib.suppress(TimeoutError):
+            async with asyncio.timeout(self.delay):
+                await pending.finished.wait()
+        if pending.answered or pending.opted_out:
+            return
+        pending.answered = True
+        _early_call.set(True)  # контекст задачи свой, на хендлер не влияет.
+        try:
+            await pending.callback.answer()
+            self.answered += 1
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"Failed to answer callback early: {e}")
+
+
+class RepeatedAnswerFilter(BaseRequestMiddleware):
+    """Middleware сессии бота: первый ответ на callback отменяет ранний, ответы после раннего не отправляем."""
+
+    def __init__(self, early_answer: EarlyCallbackAnswerMiddleware) -> None:
+        """Конструктор.
+
+        Args:
+            early_answer: middleware раннего ответа, для счетчиков.
+        """
+        self.early_answer = early_answer
+
+    async def __call__(self,
+                       make_request: NextRequestMiddlewareType[TelegramType],
+                       bot: Bot,
+                       method: TelegramMethod[TelegramType]) -> Any:
+        """Вызов middleware."""
+        if (not isinstance(method, AnswerCallbackQuery)
+                or _early_call.get()
+                or (pending := _pending_answer.get()) is None
+                or method.callback_query_id != pending.callback.id):
+            return await make_request(bot, method)
+        if pending.answered:
+            self.early_answer.dropped += 1
+            if method.text:
+                logger.debug(f"Callback already answered, text dropped: {method.text}")
+            return True
+        pending.answered = True
+        if not pending.opted_out:
+            self.early_answer.preempted += 1
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            pending.answered = False  # ответ не ушел, часики уберет ранний ответ.
+            raise
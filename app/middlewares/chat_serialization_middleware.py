@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from collections import Counter
+from collections.abc import Awaitable
+from typing import Any, Callable, TypedDict
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Chat, TelegramObject, Update, User
+
+from app.middlewares.load_shedding_middleware import BUSY_TEXT
+
+logger = logging.getLogger(__name__)
+
+# нажатие кнопки: (id сообщения с кнопкой, id пользователя, callback_data).
+TapKey = tuple[int | None, int, str]
+
+
+class ChatSerializationStats(TypedDict):
+    """Хинт счетчиков последовательной обработки чатов."""
+
+    chats: int
+    queued: int
+    max_queued: int
+    coalesced: int
+    coalesced_by_data: dict[str, int]
+    shed: int
+
+
+class _ChatLane:
+    """Очередь апдейтов одного чата и нажатия кнопок, которые в ней уже есть."""
+
+    __slots__ = ("callbacks", "lock", "pending")
+
+    def __init__(self) -> None:
+        """Конструктор очереди чата."""
+        self.lock = asyncio.Lock()  # asyncio.Lock отдает блокировку ожидающим в порядке очереди.
+        self.pending = 0
+        self.callbacks: Counter[TapKey] = Counter()
+
+
+class ChatSerializationMiddleware(BaseMiddleware):
+    """Middleware последовательной обработки: апдейты одного чата обрабатываются по очереди, в порядке поступления.
+
+    Регистрируется до FSMContextMiddleware, что бы следующий апдейт чата читал состояние FSM,
+    записанное предыдущим.
+
+    Повторное нажатие той же кнопки того же сообщения тем же пользователем, пока предыдущее нажатие еще ждет
+    или обрабатывается, хендлер не запускает: на callback сразу отвечаем и считаем его в coalesced.
+    Если в очереди чата уже backlog апдейтов, новые отбрасываем: callback получает ответ "попробуйте еще раз".
+    """
+
+    def __init__(self, backlog: int = 10) -> None:
+        """Конструктор middleware.
+
+        Args:
+            backlog: сколько апдейтов одного чата ждут, пока обрабатывается предыдущий.
+        """
+        self.backlog = backlog
+        self._lanes: dict[int, _ChatLane] = {}
+        self.queued = 0
+        self.max_queued = 0
+        self.coalesced: Counter[str] = Counter()
+        self.shed = 0
+
+    @property
+    def stats(self) -> ChatSerializationStats:
+        """Чаты с апдейтами в работе, ждущие апдейты, объединенные повторные нажатия и отброшенные апдейты."""
+        return {
+            "chats": len(self._lanes),
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "coalesced": sum(self.coalesced.values()),
+            "coalesced_by_data": dict(self.coalesced),
+            "shed": self.shed,
+        }
+
+    async def __call__(self,
+                       handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject,
+                       data: dict[str, Any]) -> Any:
+        """Вызов middleware."""
+        chat: Chat | None = data.get("event_chat")
+        user: User | None = data.get("event_from_user")
+        if (chat_id := chat.id if chat else user.id if user else None) is None:
+            return await handler(event, data)
+
+        callback = event.callback_query if isinstance(event, Update) else None
+        tap = self._tap_key(callback) if callback is not None else None
+        lane = self._lanes.setdefault(chat_id, _ChatLane())
+        if tap is not None and lane.callbacks[tap]:
+            await self._coalesce(callback, tap[2])
+            return None
+        if lane.pending > self.backlog:  # один апдейт обрабатывается, backlog ждут.
+            await self._shed(chat_id, callback)
+            return None
+
+        lane.pending += 1
+        if tap is not None:
+            lane.callbacks[tap] += 1
+        try:
+            await self._wait(lane)
+            try:
+                return await handler(event, data)
+            finally:
+                lane.lock.release()
+        finally:
+            lane.pending -= 1
+            if tap is not None:
+                lane.callbacks[tap] -= 1
+                if not lane.callbacks[tap]:
+                    del lane.callbacks[tap]
+            if not lane.pending:
+                del self._lanes[chat_id]
+
+    async def _wait(self, lane: _ChatLane) -> None:
+        """Ждем своей очереди в чате."""
+        if not lane.lock.locked():
+            await lane.lock.acquire()
+            return
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await lane.lock.acquire()
+        finally:
+            self.queued -= 1
+
+    @staticmethod
+    def _tap_key(callback: CallbackQuery) -> TapKey | None:
+        """Ключ нажатия: та же кнопка на другом сообщении или от другого пользователя - другое нажатие."""
+        if callback.data is None:
+            return None
+        message_id = callback.message.message_id if callback.message is not None else None
+        return message_id, callback.from_user.id, callback.data
+
+    async def _shed(self, chat_id: int, callback: CallbackQuery | None) -> None:
+        """Очередь чата переполнена: апдейт не обрабатываем, на callback отвечаем "попробуйте еще раз"."""
+        self.shed += 1
+        if self.shed % 100 == 1:
+            logger.warning(f"Chat {chat_id} lane is full, shedding updates: {self.stats}")
+        if callback is None:
+            return
+        try:
+            await callback.answer(BUSY_TEXT)
+        except Exception as e:
+            logger.warning(f"Failed to answer shed callback: {e}")
+
+    async def _coalesce(self, callback: CallbackQuery, callback_data: str) -> None:
+        """Отвечаем на повторное нажатие, не запуская хендлер."""
+        self.coalesced[callback_data.rstrip("0123456789")] += 1  # drink_item_12 -> drink_item_, без id.
+        try:
+            await callback.answer()
+        except Exception as e:
+            logger.warning(f"Failed to answer coalesced callback: {e}")
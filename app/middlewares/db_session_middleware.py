@@ -0,0 +1,34 @@
+from collections.abc import Awaitable
+from typing import Any, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from app.database.requests.base import UnitOfWork, current_unit_of_work
+
+
+class DatabaseSessionMiddleware(BaseMiddleware):
+    """Middleware единицы работы: одна сессия БД и один коммит на апдейт.
+
+    Все запросы, обернутые в декоратор connection, внутри хендлера идут через общую сессию.
+    Сессия открывается лениво, апдейты без запросов в БД соединение из пула не берут.
+    """
+
+    async def __call__(self,
+                       handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject,
+                       data: dict[str, Any]) -> Any:
+        """Вызов middleware."""
+        unit_of_work = UnitOfWork()
+        token = current_unit_of_work.set(unit_of_work)
+        data["unit_of_work"] = unit_of_work
+        try:
+            result = await handler(event, data)
+            await unit_of_work.commit()
+            return result
+        except BaseException:
+            await unit_of_work.rollback()
+            raise
+        finally:
+            await unit_of_work.close()
+            current_unit_of_work.reset(token)
@@ -0,0 +1,27 @@
+from collections.abc import Awaitable
+from typing import Any, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from app.services.fsm_storage import CoalescingStorage
+
+
+class FSMWriteCoalescingMiddleware(BaseMiddleware):
+    """Middleware объединения записей FSM: все изменения состояния за апдейт уходят в хранилище одной записью."""
+
+    def __init__(self, storage: CoalescingStorage) -> None:
+        """Конструктор middleware.
+
+        Args:
+            storage: хранилище FSM диспетчера.
+        """
+        self.storage = storage
+
+    async def __call__(self,
+                       handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject,
+                       data: dict[str, Any]) -> Any:
+        """Вызов middleware."""
+        async with self.storage.coalesce():
+            return await handler(event, data)
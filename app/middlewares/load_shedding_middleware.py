@@ -0,0 +1,48 @@
+import logging
+from collections.abc import Awaitable
+from typing import Any, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from app.keyboards import CALLBACK_GOOD_WISH
+from app.services.admission import AdmissionController
+
+logger = logging.getLogger(__name__)
+
+LOW_PRIORITY_CALLBACKS = (CALLBACK_GOOD_WISH,)  # callback_data, которые отбрасываем первыми при нагрузке.
+BUSY_TEXT = "Бот сейчас перегружен, попробуйте еще раз через минуту."
+
+
+class LoadSheddingMiddleware(BaseMiddleware):
+    """Middleware ограничения нагрузки: апдейты ждут свободного места, при переполнении очереди отбрасываются.
+
+    Отброшенный callback получает быстрый ответ "попробуйте еще раз", сообщения отбрасываются молча.
+    """
+
+    def __init__(self, controller: AdmissionController) -> None:
+        """Конструктор middleware.
+
+        Args:
+            controller: ограничитель одновременных апдейтов.
+        """
+        self.controller = controller
+
+    async def __call__(self,
+                       handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject,
+                       data: dict[str, Any]) -> Any:
+        """Вызов middleware."""
+        callback = event.callback_query if isinstance(event, Update) else None
+        low_priority = callback is not None and callback.data in LOW_PRIORITY_CALLBACKS
+        if not await self.controller.acquire(low_priority):
+            if callback is not None:
+                try:
+                    await callback.answer(BUSY_TEXT)
+                except Exception as e:
+                    logger.warning(f"Failed to answer shed callback: {e}")
+            return None
+        try:
+            return await handler(event, data)
+        finally:
+            self.controller.release()
@@ -30,7 +30,19 @@ class LoggingMiddleware(BaseMiddleware):
             data: dict[str, Any],
             ) -> Any:
         """Логируем входящее событие."""
-        self.logger.reset_logger_params()
+        token = self.logger.reset_logger_params()
+        try:
+            return await self._handle(handler, event, data)
+        finally:
+            self.logger.release_logger_params(token)
+
+    async def _handle(
+            self,
+            handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: dict[str, Any],
+            ) -> Any:
+        """Обработка события в контексте логирования апдейта."""
         await self.logger.create_log_context(event, data)
 
         # TODO: первая итерация и вторая итерация с логами не отличается.
@@ -40,17 +52,33 @@ class LoggingMiddleware(BaseMiddleware):
         # )
 
         data["logger"] = self.logger
+        handler_name = self._handler_name(data)
         try:
             # Продолжаем выполнение цепочки middleware и обработчиков
             result = await handler(event, data)
 
-            # Логируем успешное завершение обработки
-            self.logger.log(f"Событие успешно обработано: {event.__class__.__name__}")
+            # Логируем успешное завершение обработки. Если уровень отключен, контекст даже не собираем.
+            # Успешные апдейты сэмплируются, предупреждения из хендлеров пишутся всегда.
+            level = self.logger.level
+            is_success = level in ("debug", "info")
+            self.logger.count_handler(handler_name, "success" if is_success else level)
+            if self.logger.is_enabled(level) and (not is_success or self.logger.should_log_success()):
+                await self.logger.load_state_context()
+                self.logger.log(f"Событие успешно обработано: {event.__class__.__name__}")
             return result
         except Exception as e:
             # Логируем ошибки
+            self.logger.count_handler(handler_name, "error")
+            await self.logger.load_state_context()
             self.logger.log_error(
                 f"Ошибка при обработке события: {event.__class__.__name__}, "
                 f"ошибка: {e}", exc_info=True
             )
             raise
+
+    @staticmethod
+    def _handler_name(data: dict[str, Any]) -> str:
+        """Имя функции хендлера, который обработает событие."""
+        if (handler_object := data.get("handler")) is not None:
+            return getattr(handler_object.callback, "__name__", "unknown")
+        return "unknown"
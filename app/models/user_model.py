@@ -1,7 +1,7 @@
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
 
 from app.configs import ADMIN_IDS
-from app.database.models import DrinkResult
+from app.database.models import DrinkResult, IngredientResult
 from app.database.requests.keyboards import IngredientNamesHint
 from app.database.requests.user import CoffeePointHint, UserContext, UserDataHint
 from app.keyboards import (
@@ -12,6 +12,12 @@ from app.keyboards import (
     create_point_keyboard,
     inline_builder,
 )
+from app.services.catalog import catalog
+from app.services.keyboard_cache import keyboard_cache
+
+# tg id пользователей, уже записанных в БД этим процессом. Для них /start в БД не ходит.
+KNOWN_TG_IDS_LIMIT = 100_000
+known_tg_ids: set[int] = set()
 
 
 class UserModel(UserContext):
@@ -29,12 +35,17 @@ class UserModel(UserContext):
                                     "full_name": message.from_user.full_name,
                                     "last_name": message.from_user.last_name,
                                     "been_deleted": False}
-        user = await self.get_user(user_id=message.from_user.id)
-        if not user:
-            await self.set_user_to_db(user_data=user_data)
+        if (tg_id := message.from_user.id) in known_tg_ids:
+            return
+        await self.upsert_user(user_data=user_data)
+        if len(known_tg_ids) >= KNOWN_TG_IDS_LIMIT:
+            known_tg_ids.clear()  # редкий сброс дешевле учета давности, следующий /start просто обновит запись.
+        known_tg_ids.add(tg_id)
 
     async def get_coffee_points(self) -> list[CoffeePointHint]:
         """Логика олучения кофейных точек."""
+        if snapshot := catalog.snapshot:
+            return snapshot.points
         return await self.get_coffee_points_db()
 
     async def get_main_keyboard(self,
@@ -47,6 +58,12 @@ class UserModel(UserContext):
             coffee_points (list[CoffeePointHint]): список кофейных точек
         """
         is_admin_user = message.from_user.id in ADMIN_IDS  # Проверяем, является ли пользователь админом
+        if (snapshot := catalog.snapshot) and coffee_points is snapshot.points:
+            return keyboard_cache.get_or_build(
+                "main",
+                lambda: create_main_keyboard_with_points(is_admin_user, coffee_points),
+                is_admin=is_admin_user,
+            )
         return create_main_keyboard_with_points(is_admin_user, coffee_points)
 
     async def get_coffee_point_info_from_db(self, point_id: int) -> CoffeePointHint | None:
@@ -55,6 +72,8 @@ class UserModel(UserContext):
         Args:
             point_id: id кофейной точки.
         """
+        if snapshot := catalog.snapshot:
+            return snapshot.points_by_id.get(point_id)
         return await self.get_coffee_point_info_db(point_id)
 
     @staticmethod
@@ -65,7 +84,11 @@ class UserModel(UserContext):
             point_id: id кофейной точки.
         """
         prev_step = {"text": "Вернуться в начало", "callback_data": CALLBACK_BACK_TO_START}
-        return create_point_keyboard(point_id, prev_step=prev_step)
+        return keyboard_cache.get_or_build(
+            "point",
+            lambda: create_point_keyboard(point_id, prev_step=prev_step),
+            point_id=point_id,
+        )
 
     @staticmethod
     def collect_names_with_inline_bld(names: list[IngredientNamesHint], point_id: int) -> InlineKeyboardMarkup:
@@ -76,6 +99,12 @@ class UserModel(UserContext):
             point_id: id кофейной точки.
         """
         prev_callback = f"{CALLBACK_COFFEE_POINT_PREFIX}{point_id}"
+        if (snapshot := catalog.snapshot) and names is snapshot.drink_names.get(point_id):
+            return keyboard_cache.get_or_build(
+                "drinks",
+                lambda: inline_builder(names, prev_callback_data=prev_callback),
+                point_id=point_id,
+            )
         return inline_builder(names, prev_callback_data=prev_callback)
 
     async def get_names_from_db(self, coffee_point_id: int) -> list[IngredientNamesHint]:
@@ -84,6 +113,8 @@ class UserModel(UserContext):
         Args:
             coffee_point_id: id кофейной точки.
         """
+        if snapshot := catalog.snapshot:
+            return snapshot.drink_names.get(coffee_point_id, [])
         return await self.get_names_db(coffee_point_id=coffee_point_id)
 
     async def get_drink_detail_from_db(self, callback_data: str) -> DrinkResult:
@@ -93,4 +124,17 @@ class UserModel(UserContext):
             callback_data: значение, отлавливаемое хендлером колбека.
         """
         item_id = int(callback_data.replace(CALLBACK_ITEM_PREFIX, ""))
+        if (snapshot := catalog.snapshot) and (drink := snapshot.drinks.get(item_id)):
+            return drink
         return await self.get_drink_detail_db(item_id=item_id)
+
+    async def get_ingredient_from_db(self, callback_data: str) -> IngredientResult:
+        """логика выборки карточки ингредиента.
+
+        Args:
+            callback_data: значение, отлавливаемое хендлером колбека, например ingredient_item_3
+        """
+        ingredient_id = int(callback_data.rsplit("_", maxsplit=1)[-1])
+        if (snapshot := catalog.snapshot) and (ingredient := snapshot.ingredients.get(ingredient_id)):
+            return ingredient
+        return await self.get_igredient_photo(item_id=callback_data)
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+from collections import deque
+from typing import TypedDict
+
+from app.configs import UPDATE_BACKLOG, UPDATE_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionStats(TypedDict):
+    """Хинт счетчиков ограничителя обработки апдейтов."""
+
+    running: int
+    waiting: int
+    max_waiting: int
+    admitted: int
+    shed: int
+    shed_low_priority: int
+
+
+class AdmissionController:
+    """Ограничение одновременно обрабатываемых апдейтов с ограниченной очередью и приоритетами.
+
+    Не больше limit апдейтов обрабатываются одновременно, не больше backlog ждут. Освободившееся место
+    получают сначала обычные апдейты (навигация по меню), затем низкоприоритетные (ИИ).
+    При полной очереди низкоприоритетные апдейты отбрасываются первыми: новый обычный апдейт
+    вытесняет последний ждущий низкоприоритетный.
+    """
+
+    def __init__(self, limit: int, backlog: int) -> None:
+        """Конструктор ограничителя.
+
+        Args:
+            limit: сколько апдейтов обрабатывается одновременно.
+            backlog: сколько апдейтов может ждать обработки.
+        """
+        self.limit = limit
+        self.backlog = backlog
+        self.running = 0
+        self._normal: deque[asyncio.Future[bool]] = deque()
+        self._low: deque[asyncio.Future[bool]] = deque()
+        self.max_waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.shed_low_priority = 0
+
+    @property
+    def waiting(self) -> int:
+        """Сколько апдейтов ждут обработки."""
+        return len(self._normal) + len(self._low)
+
+    @property
+    def stats(self) -> AdmissionStats:
+        """Обрабатываемые и ждущие апдейты, допущенные и отброшенные (из них низкоприоритетные)."""
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "shed_low_priority": self.shed_low_priority,
+        }
+
+    async def acquire(self, low_priority: bool = False) -> bool:
+        """Ждем места для обработки апдейта.
+
+        Args:
+            low_priority: апдейт можно отбросить первым при нагрузке.
+
+        Returns:
+            True - апдейт можно обрабатывать, после обработки нужно вызвать release. False - апдейт отброшен.
+        """
+        if self.running < self.limit and not self.waiting:
+            self.running += 1
+            self.admitted += 1
+            return True
+        if self.waiting >= self.backlog and (low_priority or not self._evict_low_priority()):
+            self._count_shed(low_priority)
+            return False
+        waiter: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+        queue = self._low if low_priority else self._normal
+        queue.append(waiter)
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            admitted = await waiter
+        except asyncio.CancelledError:
+            if not waiter.cancelled() and waiter.result():
+                self.release()  # место уже передали нам, отдаем следующему.
+            elif waiter in queue:
+                queue.remove(waiter)
+            raise
+        if admitted:
+            self.admitted += 1
+        return admitted
+
+    def release(self) -> None:
+        """Обработка апдейта закончена, передаем место следующему ждущему."""
+        for queue in (self._normal, self._low):
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.done():
+                    waiter.set_result(True)
+                    return
+        self.running -= 1
+
+    def _evict_low_priority(self) -> bool:
+        """Отбрасываем последний ждущий низкоприоритетный апдейт, что бы освободить место в очереди."""
+        while self._low:
+            waiter = self._low.pop()
+            if not waiter.done():
+                waiter.set_result(False)
+                self._count_shed(True)
+                return True
+        return False
+
+    def _count_shed(self, low_priority: bool) -> None:
+        """Считаем отброшенный апдейт."""
+        self.shed += 1
+        if low_priority:
+            self.shed_low_priority += 1
+        if self.shed % 100 == 1:
+            logger.warning(f"Shedding updates under load: {self.stats}")
+
+
+update_admission = AdmissionController(limit=UPDATE_CONCURRENCY, backlog=UPDATE_BACKLOG)
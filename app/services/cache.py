@@ -0,0 +1,155 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Hashable
+from typing import Callable, Generic, ParamSpec, TypedDict, TypeVar
+
+P = ParamSpec("P")
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class _LoadCancelled(Exception):
+    """Загрузку отменили у вызвавшего ее, ожидающие загружают значение сами."""
+
+
+class CacheStats(TypedDict):
+    """Хинт счетчиков кеша."""
+
+    size: int
+    hits: int
+    misses: int
+    coalesced: int
+    evictions: int
+
+
+class AsyncTTLCache(Generic[K, V]):
+    """Ограниченный по размеру и времени жизни (LRU + TTL) кеш для асинхронных выборок.
+
+    Параллельные промахи по одному ключу выполняют один запрос (single-flight),
+    остальные ждут его результат. Ошибки загрузки не кешируются. Если вызвавшего загрузку отменили,
+    ожидающие повторяют загрузку сами.
+    """
+
+    def __init__(self,
+                 name: str,
+                 maxsize: int = 256,
+                 ttl: float = 300.0,
+                 timer: Callable[[], float] = time.monotonic) -> None:
+        """Конструктор кеша.
+
+        Args:
+            name: имя кеша, для логов и метрик.
+            maxsize: максимальное количество ключей, при переполнении вытесняется самый давний.
+            ttl: время жизни записи в секундах.
+            timer: источник монотонного времени.
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._pending: dict[K, asyncio.Future[V]] = {}
+        # растет при инвалидации, что бы не положить в кеш результат запроса, начатого до нее.
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        """Количество закешированных ключей."""
+        return len(self._data)
+
+    @property
+    def stats(self) -> CacheStats:
+        """Счетчики попаданий, промахов и вытеснений."""
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
+
+    async def get_or_load(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        """Отдаем значение из кеша, при промахе загружаем его через loader.
+
+        Args:
+            key: ключ записи.
+            loader: корутина-функция, загружающая значение при промахе.
+        """
+        if (item := self._data.get(key)) is not None:
+            expires_at, value = item
+            if expires_at > self._timer():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+            self.evictions += 1
+
+        if (future := self._pending.get(key)) is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)  # отмена ожидающего не должна отменять общий запрос.
+            except _LoadCancelled:
+                return await self.get_or_load(key, loader)  # отменили только вызвавшего загрузку, ожидающих - нет.
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        generation = self._generation
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.set_exception(_LoadCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # помечаем исключение полученным, даже если ожидающих нет.
+            raise
+        finally:
+            self._pending.pop(key, None)
+
+        future.set_result(value)
+        if generation == self._generation:
+            self._store(key, value)
+        return value
+
+    def invalidate(self, key: K) -> None:
+        """Удаляем одну запись из кеша.
+
+        Args:
+            key: ключ записи.
+        """
+        self._generation += 1
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Полностью очищаем кеш."""
+        self._generation += 1
+        self._data.clear()
+
+    def _store(self, key: K, value: V) -> None:
+        """Кладем значение в кеш, вытесняя самые давние записи при переполнении."""
+        self._data[key] = (self._timer() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+
+def cached(cache: AsyncTTLCache[K, V],
+           key: Callable[P, K]) -> Callable[[Callable[P, Awaitable[V]]], Callable[P, Awaitable[V]]]:
+    """Декоратор read-through кеша для асинхронной выборки.
+
+    Args:
+        cache: кеш, в котором храним результаты.
+        key: функция, вычисляющая ключ по аргументам декорируемой функции.
+    """
+    def decorator(func: Callable[P, Awaitable[V]]) -> Callable[P, Awaitable[V]]:
+        async def inner(*args: P.args, **kwargs: P.kwargs) -> V:
+            return await cache.get_or_load(key(*args, **kwargs), lambda: func(*args, **kwargs))
+        return inner
+    return decorator
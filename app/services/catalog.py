@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Mapping
+from types import MappingProxyType
+from typing import Callable, ParamSpec, TypeVar
+
+from app.database.models import CoffeePointResult, DrinkResult, IngredientResult
+from app.database.requests.catalog import load_catalog
+from app.database.requests.keyboards import IngredientNamesHint
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+class CatalogSnapshot:
+    """Неизменяемый снимок каталога: кофейни, меню точек, карточки напитков и ингредиентов.
+
+    Снимок разделяется между всеми апдейтами, поэтому возвращаемые структуры только для чтения.
+    """
+
+    __slots__ = ("drink_names", "drinks", "ingredients", "points", "points_by_id", "version")
+
+    def __init__(self,
+                 version: int,
+                 points: list[CoffeePointResult],
+                 drink_names: dict[int, list[IngredientNamesHint]],
+                 drinks: dict[int, DrinkResult],
+                 ingredients: dict[int, IngredientResult]) -> None:
+        """Конструктор снимка.
+
+        Args:
+            version: номер версии каталога, растет при каждой пересборке.
+            points: активные кофейные точки, отсортированные по названию.
+            drink_names: id точки -> список напитков точки.
+            drinks: id напитка -> карточка напитка.
+            ingredients: id ингредиента -> карточка ингредиента.
+        """
+        self.version = version
+        self.points = points
+        self.points_by_id: Mapping[int, CoffeePointResult] = MappingProxyType({p["id"]: p for p in points})
+        self.drink_names: Mapping[int, list[IngredientNamesHint]] = MappingProxyType(drink_names)
+        self.drinks: Mapping[int, DrinkResult] = MappingProxyType(drinks)
+        self.ingredients: Mapping[int, IngredientResult] = MappingProxyType(ingredients)
+
+
+class Catalog:
+    """Держит актуальный снимок каталога в памяти процесса.
+
+    Снимок собирается при старте бота и атомарно подменяется после записи админом.
+    Пока снимок не загружен, читатели ходят в БД как раньше.
+    """
+
+    def __init__(self) -> None:
+        """Конструктор каталога."""
+        self._snapshot: CatalogSnapshot | None = None
+        self._version = 0
+        self._lock = asyncio.Lock()
+        self._listeners: list[Callable[[], None]] = []
+        # оповещение других процессов о записи в каталог, ставит воркер шардинга. None - процесс один.
+        self.broadcast: Callable[[], None] | None = None
+
+    @property
+    def snapshot(self) -> CatalogSnapshot | None:
+        """Текущий снимок каталога или None, если он еще не загружен."""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """Версия текущего снимка. 0 - снимок не загружен."""
+        return self._snapshot.version if self._snapshot else 0
+
+    async def reload(self) -> CatalogSnapshot:
+        """Выгружаем каталог из БД и подменяем снимок одной операцией присваивания."""
+        async with self._lock:  # параллельные пересборки не нужны, достаточно одной.
+            data = await load_catalog()
+            self._version += 1
+            self._snapshot = CatalogSnapshot(self._version, **data)
+        logger.info(f"Catalog snapshot v{self._version} loaded: {len(data['points'])} points, "
+                    f"{len(data['drinks'])} drinks, {len(data['ingredients'])} ingredients")
+        self._notify()
+        return self._snapshot
+
+    async def refresh(self) -> None:
+        """Пересобираем снимок, при ошибке выгрузки отправляем читателей в БД."""
+        try:
+            await self.reload()
+        except Exception as e:
+            logger.error(f"Failed to reload catalog snapshot: {e}")
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        """Сбрасываем снимок, читатели вернутся к запросам в БД до следующей пересборки."""
+        self._snapshot = None
+        self._notify()
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Подписываем сброс кеша, собранного по данным каталога, на каждую смену снимка.
+
+        Args:
+            listener: функция сброса кеша.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self) -> None:
+        """Сбрасываем подписанные кеши."""
+        for listener in self._listeners:
+            listener()
+
+
+catalog = Catalog()
+
+
+def refresh_catalog(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+    """Декоратор для записи в каталог: после успешного коммита пересобираем снимок."""
+    async def inner(*args: P.args, **kwargs: P.kwargs) -> R:
+        result = await func(*args, **kwargs)
+        await catalog.refresh()  # запись уже прошла, поэтому ошибка пересборки не роняет хендлер.
+        if catalog.broadcast is not None:
+            catalog.broadcast()  # остальные воркеры пересоберут снимок перед следующим апдейтом.
+        return result
+    return inner
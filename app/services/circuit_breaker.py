@@ -0,0 +1,247 @@
+import asyncio
+import bisect
+import logging
+import time
+from collections.abc import Awaitable
+from typing import Callable, Literal, TypedDict, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+BREAKER_STATE = Literal["closed", "open", "half_open"]
+LATENCY_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0)  # границы гистограммы задержек, сек.
+
+
+class CircuitOpenError(Exception):
+    """Предохранитель разомкнут, запрос не выполнялся."""
+
+
+class GuardBusyError(Exception):
+    """Свободный слот не появился за queue_timeout, запрос не выполнялся."""
+
+
+class GuardStats(TypedDict):
+    """Хинт состояния защищенного вызова внешнего сервиса."""
+
+    state: BREAKER_STATE
+    in_flight: int
+    calls: int
+    failures: int
+    timeouts: int
+    rejected: int
+    busy: int
+    latency: dict[str, int]
+
+
+class CircuitBreaker:
+    """Предохранитель: после failure_threshold ошибок подряд размыкается на reset_timeout секунд.
+
+    По истечении reset_timeout пропускает один пробный запрос (half_open):
+    успех замыкает предохранитель, ошибка снова размыкает.
+    """
+
+    def __init__(self,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 60.0,
+                 timer: Callable[[], float] = time.monotonic) -> None:
+        """Конструктор предохранителя.
+
+        Args:
+            failure_threshold: сколько ошибок подряд размыкают предохранитель.
+            reset_timeout: сколько секунд предохранитель разомкнут до пробного запроса.
+            timer: источник монотонного времени.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._timer = timer
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> BREAKER_STATE:
+        """Текущее состояние предохранителя."""
+        if self._opened_at is None:
+            return "closed"
+        if self._timer() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Можно ли выполнить запрос. В half_open пропускаем только один пробный запрос."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Запрос прошел, замыкаем предохранитель."""
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Запрос упал или не уложился в таймаут."""
+        self._failures += 1
+        if self._probe_in_flight or self._failures >= self.failure_threshold:
+            if self._opened_at is None:
+                logger.warning(f"Circuit breaker opened after {self._failures} failures in a row")
+            self._opened_at = self._timer()
+        self._probe_in_flight = False
+
+    def release(self) -> None:
+        """Запрос отменили снаружи, результат неизвестен. Освобождаем место пробного запроса."""
+        self._probe_in_flight = False
+
+
+class GuardSlot:
+    """Занятый слот защищенного вызова. Держит место в ограничителе, пока запрос к сервису не закончен.
+
+    Итог запроса сообщается предохранителю при закрытии слота: close() без ошибки - успех.
+    Повторное закрытие ничего не делает. Как контекстный менеджер закрывается с ошибкой блока.
+    """
+
+    def __init__(self, guard: "GuardedCall") -> None:
+        """Конструктор слота.
+
+        Args:
+            guard: защищенный вызов, которому принадлежит слот.
+        """
+        self._guard = guard
+        self.deadline = asyncio.get_running_loop().time() + guard.timeout  # к этому времени запрос должен закончиться.
+        self._start = time.perf_counter()
+        self._closed = False
+
+    def close(self, error: BaseException | None = None) -> None:
+        """Освобождаем слот и сообщаем итог запроса предохранителю.
+
+        Args:
+            error: ошибка запроса, None - запрос прошел.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._guard._finish(time.perf_counter() - self._start, error)
+
+    def __enter__(self) -> "GuardSlot":
+        """Вход в блок запроса."""
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None, tb: object) -> None:
+        """Закрываем слот с ошибкой блока."""
+        self.close(exc)
+
+
+class GuardedCall:
+    """Защищенный вызов внешнего сервиса: ограничение одновременных запросов, таймаут и предохранитель.
+
+    Ожидание свободного слота и сам запрос ограничены отдельно. Предохранитель считает только ошибки
+    и таймауты сервиса: очередь у нас не значит, что сервис лежит. Запрос, который читается дольше
+    одного вызова (поток ответа), берет слот через acquire() и держит его до конца чтения.
+    """
+
+    def __init__(self,
+                 name: str,
+                 max_concurrency: int = 4,
+                 timeout: float = 30.0,
+                 queue_timeout: float = 10.0,
+                 breaker: CircuitBreaker | None = None) -> None:
+        """Конструктор защищенного вызова.
+
+        Args:
+            name: имя сервиса, для логов.
+            max_concurrency: сколько запросов к сервису выполняется одновременно.
+            timeout: бюджет времени на запрос к сервису, без ожидания свободного слота, сек.
+            queue_timeout: сколько ждем свободный слот, сек.
+            breaker: предохранитель, по умолчанию с настройками CircuitBreaker.
+        """
+        self.name = name
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.busy = 0
+        self._latency = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    @property
+    def stats(self) -> GuardStats:
+        """Состояние предохранителя, счетчики и гистограмма задержек успешных и упавших запросов."""
+        labels = [f"le_{bound:g}" for bound in LATENCY_BUCKETS] + ["inf"]
+        return {
+            "state": self.breaker.state,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "busy": self.busy,
+            "latency": dict(zip(labels, self._latency, strict=True)),
+        }
+
+    async def acquire(self) -> GuardSlot:
+        """Занимаем слот для запроса. Бюджет запроса timeout отсчитывается с этого момента (GuardSlot.deadline).
+
+        Raises:
+            CircuitOpenError: предохранитель разомкнут.
+            GuardBusyError: свободный слот не появился за queue_timeout.
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await self._semaphore.acquire()
+        except TimeoutError:
+            self.busy += 1
+            self.breaker.release()  # до сервиса запрос не дошел.
+            raise GuardBusyError(f"{self.name} has no free slot for {self.queue_timeout}s") from None
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        self.in_flight += 1
+        self.calls += 1
+        return GuardSlot(self)
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """Выполняем запрос через ограничитель, таймаут и предохранитель.
+
+        Args:
+            func: корутина-функция запроса.
+
+        Raises:
+            CircuitOpenError: предохранитель разомкнут.
+            GuardBusyError: свободный слот не появился за queue_timeout.
+            TimeoutError: запрос не уложился в таймаут.
+        """
+        with await self.acquire() as slot:
+            async with asyncio.timeout_at(slot.deadline):
+                return await func()
+
+    def _finish(self, seconds: float, error: BaseException | None) -> None:
+        """Слот закрыт: освобождаем место и учитываем итог запроса."""
+        self.in_flight -= 1
+        self._observe(seconds)
+        self._semaphore.release()
+        if error is None:
+            self.breaker.record_success()
+        elif isinstance(error, TimeoutError):
+            self.timeouts += 1
+            self.breaker.record_failure()
+        elif isinstance(error, Exception):
+            self.failures += 1
+            self.breaker.record_failure()
+        else:  # запрос отменили снаружи, результат неизвестен.
+            self.breaker.release()
+
+    def _observe(self, seconds: float) -> None:
+        """Добавляем задержку запроса в гистограмму."""
+        self._latency[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
@@ -0,0 +1,231 @@
+import contextvars
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any, TypedDict
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage
+
+from app.configs import FSM_REDIS_URL, FSM_STORAGE
+from app.database.requests.fsm import FSMStorageContext
+
+logger = logging.getLogger(__name__)
+
+UNSET: Any = object()  # маркер "колонку не меняем", None - валидное значение состояния.
+
+
+class CoalescingStats(TypedDict):
+    """Хинт счетчиков объединения записей FSM."""
+
+    updates: int
+    buffered_writes: int
+    storage_writes: int
+
+
+def _state_name(state: StateType) -> str | None:
+    """Имя состояния: State хранится строкой, как в MemoryStorage."""
+    return state.state if isinstance(state, State) else state
+
+
+class PostgresStorage(BaseStorage):
+    """Хранилище FSM в таблице fsm_storage через общий async engine.
+
+    Состояние и данные хранятся в одной строке, поэтому их можно записать одним запросом (set_record).
+    """
+
+    def __init__(self, key_builder: KeyBuilder | None = None) -> None:
+        """Конструктор хранилища.
+
+        Args:
+            key_builder: сборщик ключа строки, по умолчанию с id бота и destiny.
+        """
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        """Записываем состояние."""
+        await self.set_record(key, state=state)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        """Читаем состояние."""
+        record = await FSMStorageContext.get_record(self.key_builder.build(key))
+        return None if record is None else record["state"]
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        """Записываем данные."""
+        await self.set_record(key, data=data)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        """Читаем данные."""
+        record = await FSMStorageContext.get_record(self.key_builder.build(key))
+        return {} if record is None else record["data"]
+
+    async def set_record(self, key: StorageKey, state: StateType = UNSET, data: dict[str, Any] = UNSET) -> None:
+        """Записываем состояние и/или данные одним запросом. Пустую запись (как после clear) удаляем.
+
+        Args:
+            key: ключ FSM.
+            state: новое состояние, UNSET - не меняем.
+            data: новые данные, UNSET - не меняем.
+        """
+        storage_key = self.key_builder.build(key)
+        if state is None and data == {}:
+            await FSMStorageContext.delete_record(storage_key)
+            return
+        values: dict[str, Any] = {}
+        if state is not UNSET:
+            values["state"] = _state_name(state)
+        if data is not UNSET:
+            values["data"] = data
+        if values:
+            await FSMStorageContext.set_record(storage_key, values)
+
+    async def close(self) -> None:
+        """Engine общий для всего бота, закрывать нечего."""
+
+
+class _BufferedRecord:
+    """Состояние и данные ключа FSM в пределах одного апдейта."""
+
+    __slots__ = ("data", "dirty", "state")
+
+    def __init__(self) -> None:
+        """Конструктор записи буфера. UNSET - значение еще не читали и не писали."""
+        self.state: str | None = UNSET
+        self.data: dict[str, Any] = UNSET
+        self.dirty: set[str] = set()
+
+
+# буфер записей FSM текущего апдейта. Выставляется в CoalescingStorage.coalesce.
+_fsm_buffer: contextvars.ContextVar[dict[StorageKey, _BufferedRecord] | None] = contextvars.ContextVar(
+    "fsm_buffer", default=None,
+)
+
+
+class CoalescingStorage(BaseStorage):
+    """Обертка над хранилищем FSM, которая объединяет записи одного апдейта в одну.
+
+    Внутри coalesce() чтения кешируются, а set_state/set_data/update_data только меняют буфер.
+    На выходе из coalesce() каждый измененный ключ записывается один раз. Вне coalesce() вызовы
+    проходят в хранилище напрямую.
+    """
+
+    def __init__(self, storage: BaseStorage) -> None:
+        """Конструктор обертки.
+
+        Args:
+            storage: хранилище, в которое пишем.
+        """
+        self.storage = storage
+        self.updates = 0
+        self.buffered_writes = 0
+        self.storage_writes = 0
+
+    @property
+    def stats(self) -> CoalescingStats:
+        """Апдейты, записи в буфер и реальные записи в хранилище."""
+        return {"updates": self.updates, "buffered_writes": self.buffered_writes, "storage_writes": self.storage_writes}
+
+    @asynccontextmanager
+    async def coalesce(self) -> AsyncIterator[None]:
+        """Буферизуем записи FSM до выхода из блока, затем записываем их. Записываем и при ошибке хендлера.
+
+        Ошибка записи при ошибке хендлера только логируется, наружу уходит ошибка хендлера.
+        """
+        buffer: dict[StorageKey, _BufferedRecord] = {}
+        token = _fsm_buffer.set(buffer)
+        self.updates += 1
+        try:
+            yield
+        except BaseException:
+            _fsm_buffer.reset(token)
+            try:
+                await self._flush(buffer)
+            except Exception:
+                logger.exception("Failed to flush FSM writes after handler error")
+            raise
+        _fsm_buffer.reset(token)
+        await self._flush(buffer)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        """Записываем состояние в буфер апдейта."""
+        if (record := self._record(key)) is None:
+            self.storage_writes += 1
+            await self.storage.set_state(key, state)
+            return
+        self.buffered_writes += 1
+        record.state = _state_name(state)
+        record.dirty.add("state")
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        """Читаем состояние, в пределах апдейта - один раз."""
+        if (record := self._record(key)) is None:
+            return await self.storage.get_state(key)
+        if record.state is UNSET:
+            record.state = await self.storage.get_state(key)
+        return record.state
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        """Записываем данные в буфер апдейта."""
+        if (record := self._record(key)) is None:
+            self.storage_writes += 1
+            await self.storage.set_data(key, data)
+            return
+        self.buffered_writes += 1
+        record.data = data.copy()
+        record.dirty.add("data")
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        """Читаем данные, в пределах апдейта - один раз."""
+        if (record := self._record(key)) is None:
+            return await self.storage.get_data(key)
+        if record.data is UNSET:
+            record.data = await self.storage.get_data(key)
+        return record.data.copy()
+
+    async def close(self) -> None:
+        """Закрываем хранилище."""
+        await self.storage.close()
+
+    @staticmethod
+    def _record(key: StorageKey) -> _BufferedRecord | None:
+        """Запись буфера для ключа или None вне coalesce()."""
+        if (buffer := _fsm_buffer.get()) is None:
+            return None
+        if (record := buffer.get(key)) is None:
+            record = buffer[key] = _BufferedRecord()
+        return record
+
+    async def _flush(self, buffer: dict[StorageKey, _BufferedRecord]) -> None:
+        """Записываем измененные ключи: в PostgresStorage одним запросом, в остальные - по колонке."""
+        for key, record in buffer.items():
+            if not record.dirty:
+                continue
+            changes = {field: getattr(record, field) for field in record.dirty}
+            if isinstance(self.storage, PostgresStorage):
+                self.storage_writes += 1
+                await self.storage.set_record(key, **changes)
+                continue
+            for field, value in changes.items():
+                self.storage_writes += 1
+                if field == "state":
+                    await self.storage.set_state(key, value)
+                else:
+                    await self.storage.set_data(key, value)
+
+
+def create_fsm_storage() -> BaseStorage:
+    """Хранилище FSM по настройке FSM_STORAGE: memory, postgres или redis.
+
+    Постоянные хранилища оборачиваются в CoalescingStorage. Для redis подойдет любой сервер
+    с протоколом Redis (Redis, Valkey, KeyDB, Dragonfly).
+    """
+    if FSM_STORAGE == "postgres":
+        return CoalescingStorage(PostgresStorage())
+    if FSM_STORAGE == "redis":
+        return CoalescingStorage(RedisStorage.from_url(FSM_REDIS_URL))
+    if FSM_STORAGE != "memory":
+        logger.warning(f"Unknown FSM_STORAGE '{FSM_STORAGE}', using memory storage")
+    return MemoryStorage()
@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable
+from typing import Any, Callable, TypedDict, TypeVar
+
+from app.services.circuit_breaker import GuardedCall, GuardSlot
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ModelStats(TypedDict):
+    """Хинт счетчиков одной модели."""
+
+    requests: int
+    wins: int
+    failures: int
+    win_rate: float
+    p50_ms: float
+    p90_ms: float
+
+
+class _ModelCounters:
+    """Счетчики и окно задержек запросов к модели."""
+
+    __slots__ = ("failures", "latencies", "requests", "wins")
+
+    def __init__(self, window: int) -> None:
+        """Конструктор счетчиков.
+
+        Args:
+            window: сколько последних задержек храним для квантилей.
+        """
+        self.requests = 0
+        self.wins = 0
+        self.failures = 0
+        self.latencies: deque[float] = deque(maxlen=window)
+
+    def quantile(self, q: float) -> float | None:
+        """Квантиль задержки по окну или None, если ответов еще не было."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class HedgedRequest:
+    """Запрос с подстраховкой по упорядоченному списку моделей.
+
+    Сначала спрашиваем первую модель. Если она не ответила за задержку подстраховки (квантиль задержек
+    первой модели, пока ответов мало - initial_delay) или упала, параллельно спрашиваем следующую.
+    Берем первый успешный ответ, остальные запросы отменяем.
+
+    Отмененные и упавшие запросы тоже попадают в окно задержек, со временем, которое они успели выполняться,
+    иначе медленные ответы, которые мы не дождались, занижают квантиль. Для разных видов запросов
+    (полный ответ, первый токен потока) нужны отдельные экземпляры, их задержки не сравнимы.
+
+    Ответ, который читается и после возврата (поток), запрашиваем через run_held: слот guard победителя
+    остается занятым, пока вызывающий не дочитает ответ.
+    """
+
+    def __init__(self,
+                 models: list[str],
+                 initial_delay: float = 5.0,
+                 quantile: float = 0.9,
+                 min_samples: int = 10,
+                 window: int = 100,
+                 guard: GuardedCall | None = None) -> None:
+        """Конструктор.
+
+        Args:
+            models: модели в порядке приоритета.
+            initial_delay: задержка подстраховки, пока у первой модели мало ответов, сек.
+            quantile: по какому квантилю задержек первой модели считаем задержку подстраховки.
+            min_samples: со скольки ответов первой модели доверяем квантилю.
+            window: сколько последних задержек каждой модели храним.
+            guard: защищенный вызов сервиса, слот берет каждый запрос к модели отдельно.
+        """
+        if not models:
+            raise ValueError("At least one model is required")
+        self.models = models
+        self.initial_delay = initial_delay
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.guard = guard
+        self._counters = {model: _ModelCounters(window) for model in models}
+
+    @property
+    def hedge_delay(self) -> float:
+        """Через сколько секунд без ответа подключаем следующую модель."""
+        primary = self._counters[self.models[0]]
+        if len(primary.latencies) < self.min_samples:
+            return self.initial_delay
+        return primary.quantile(self.quantile) or self.initial_delay
+
+    @property
+    def stats(self) -> dict[str, ModelStats]:
+        """Запросы, победы, ошибки, доля побед и задержки по каждой модели."""
+        return {
+            model: {
+                "requests": counters.requests,
+                "wins": counters.wins,
+                "failures": counters.failures,
+                "win_rate": counters.wins / counters.requests if counters.requests else 0.0,
+                "p50_ms": (counters.quantile(0.5) or 0.0) * 1000,
+                "p90_ms": (counters.quantile(0.9) or 0.0) * 1000,
+            }
+            for model, counters in self._counters.items()
+        }
+
+    async def run(self,
+                  call: Callable[[str], Awaitable[T]],
+                  cleanup: Callable[[T], Awaitable[Any]] | None = None) -> T:
+        """Выполняем запрос с подстраховкой.
+
+        Args:
+            call: корутина-функция запроса к модели, принимает имя модели.
+            cleanup: освобождает лишний успешный ответ, например закрывает поток. Ответы могут прийти
+                одновременно, используем только первый.
+
+        Raises:
+            Exception: ошибка последней модели, если не ответила ни одна.
+        """
+        result, slot = await self._run(call, cleanup)
+        if slot is not None:
+            slot.close()
+        return result
+
+    async def run_held(self,
+                       call: Callable[[str], Awaitable[T]],
+                       cleanup: Callable[[T], Awaitable[Any]] | None = None) -> tuple[T, GuardSlot]:
+        """Выполняем запрос с подстраховкой, слот guard победившего запроса остается занятым.
+
+        Вызывающий закрывает слот, когда дочитал ответ: slot.close() или slot.close(error),
+        итог чтения учитывает предохранитель. Чтение укладываем в slot.deadline.
+
+        Args:
+            call: корутина-функция запроса к модели, принимает имя модели.
+            cleanup: освобождает лишний успешный ответ.
+
+        Raises:
+            ValueError: у запроса нет guard.
+            Exception: ошибка последней модели, если не ответила ни одна.
+        """
+        if self.guard is None:
+            raise ValueError("run_held requires a guard")
+        return await self._run(call, cleanup)  # type: ignore[return-value]
+
+    async def _run(self,
+                   call: Callable[[str], Awaitable[T]],
+                   cleanup: Callable[[T], Awaitable[Any]] | None) -> tuple[T, GuardSlot | None]:
+        """Запрос с подстраховкой. Возвращает ответ первой успешной модели и ее незакрытый слот."""
+        pending: dict[asyncio.Task[tuple[T, GuardSlot | None]], str] = {}
+        next_model = 0
+        last_error: BaseException | None = None
+        winner: asyncio.Task[tuple[T, GuardSlot | None]] | None = None
+        extra: list[tuple[T, GuardSlot | None]] = []
+
+        def start_next() -> None:
+            nonlocal next_model
+            model = self.models[next_model]
+            next_model += 1
+            self._counters[model].requests += 1
+            pending[asyncio.create_task(self._timed(model, call))] = model
+
+        start_next()
+        try:
+            try:
+                while pending and winner is None:
+                    can_hedge = next_model < len(self.models)
+                    done, _ = await asyncio.wait(pending,
+                                                 timeout=self.hedge_delay if can_hedge else None,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    if not done:  # модели думают дольше обычного, подключаем следующую.
+                        logger.info(f"Hedging AI request to {self.models[next_model]}")
+                        start_next()
+                        continue
+                    winner, last_error = self._settle(done, pending, extra, last_error)
+                    if winner is None and next_model < len(self.models):
+                        start_next()  # модель упала, не ждем задержку подстраховки.
+            finally:
+                await self._release(list(pending), extra, cleanup)
+        except BaseException:
+            if winner is not None:  # нас отменили, ответ победителя уже никто не прочитает.
+                await self._release([], [winner.result()], cleanup)
+            raise
+        if winner is not None:
+            return winner.result()
+        raise last_error  # type: ignore[misc]
+
+    def _settle(self,
+                done: set[asyncio.Task[tuple[T, GuardSlot | None]]],
+                pending: dict[asyncio.Task[tuple[T, GuardSlot | None]], str],
+                extra: list[tuple[T, GuardSlot | None]],
+                last_error: BaseException | None,
+                ) -> tuple[asyncio.Task[tuple[T, GuardSlot | None]] | None, BaseException | None]:
+        """Разбираем завершенные запросы: первый успешный - победитель, остальные успешные - в extra.
+
+        Returns:
+            победитель или None и последняя ошибка модели.
+        """
+        winner = None
+        for task in done:
+            model = pending.pop(task)
+            if (error := task.exception()) is None:
+                if winner is None:
+                    self._counters[model].wins += 1
+                    winner = task
+                else:
+                    extra.append(task.result())
+                continue
+            self._counters[model].failures += 1
+            last_error = error
+            logger.warning(f"AI model {model} failed: {error}")
+        return winner, last_error
+
+    async def _timed(self, model: str, call: Callable[[str], Awaitable[T]]) -> tuple[T, GuardSlot | None]:
+        """Выполняем запрос к модели в слоте guard и запоминаем его задержку.
+
+        Задержку считаем с момента, когда запрос получил слот: ожидание слота к модели не относится.
+        Слот упавшего запроса закрываем здесь, успешного - возвращаем вместе с ответом.
+        """
+        slot = await self.guard.acquire() if self.guard is not None else None
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout_at(slot.deadline if slot is not None else None):
+                result = await call(model)
+        except BaseException as e:
+            # ошибка или отмена проигравшего запроса: модель заняла не меньше этого времени.
+            self._counters[model].latencies.append(time.perf_counter() - start)
+            if slot is not None:
+                slot.close(e)
+            raise
+        self._counters[model].latencies.append(time.perf_counter() - start)
+        return result, slot
+
+    @staticmethod
+    async def _release(pending: list[asyncio.Task[tuple[T, GuardSlot | None]]],
+                       extra: list[tuple[T, GuardSlot | None]],
+                       cleanup: Callable[[T], Awaitable[Any]] | None) -> None:
+        """Отменяем незавершенные запросы, освобождаем лишние успешные ответы и их слоты."""
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        # запрос мог успеть ответить до отмены.
+        extra += [task.result() for task in pending if not task.cancelled() and task.exception() is None]
+        for result, slot in extra:
+            try:
+                if cleanup is not None:
+                    await cleanup(result)
+            except Exception as e:
+                logger.warning(f"Failed to clean up extra AI response: {e}")
+            finally:
+                if slot is not None:
+                    slot.close()
@@ -0,0 +1,63 @@
+from typing import Callable, Literal
+
+from aiogram.types import InlineKeyboardMarkup
+
+from app.services.catalog import catalog
+
+KEYBOARD_KIND = Literal["main", "point", "drinks", "back_to_drinks"]
+KeyboardKey = tuple[KEYBOARD_KIND, int | None, bool, int]
+
+
+class KeyboardCache:
+    """Кеш готовых inline клавиатур.
+
+    Клавиатура зависит только от списка точек, флага админа и id точки, поэтому
+    ключ - (вид, id точки, is_admin, версия каталога). При смене версии каталога кеш сбрасывается.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        """Конструктор кеша.
+
+        Args:
+            maxsize: максимальное количество клавиатур, сверх лимита клавиатуры собираются без кеширования.
+        """
+        self.maxsize = maxsize
+        self._version = 0
+        self._markups: dict[KeyboardKey, InlineKeyboardMarkup] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self,
+                     kind: KEYBOARD_KIND,
+                     build: Callable[[], InlineKeyboardMarkup],
+                     point_id: int | None = None,
+                     is_admin: bool = False) -> InlineKeyboardMarkup:
+        """Отдаем готовую клавиатуру, при промахе собираем ее через build.
+
+        Args:
+            kind: вид клавиатуры.
+            build: функция сборки клавиатуры.
+            point_id: id кофейной точки, если клавиатура от нее зависит.
+            is_admin: флаг админа.
+        """
+        if (version := catalog.version) != self._version:
+            self._markups.clear()  # клавиатуры старой версии каталога больше не понадобятся.
+            self._version = version
+
+        key: KeyboardKey = (kind, point_id, is_admin, version)
+        if (markup := self._markups.get(key)) is not None:
+            self.hits += 1
+            return markup
+
+        self.misses += 1
+        markup = build()
+        if len(self._markups) < self.maxsize:
+            self._markups[key] = markup
+        return markup
+
+    def clear(self) -> None:
+        """Сбрасываем кеш клавиатур."""
+        self._markups.clear()
+
+
+keyboard_cache = KeyboardCache()
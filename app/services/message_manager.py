@@ -1,13 +1,81 @@
+import asyncio
 import logging
+from functools import partial
 from threading import Lock
 from typing import Any, Optional
 
 from aiogram import Bot
-from aiogram.exceptions import TelegramBadRequest
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
 from aiogram.types import CallbackQuery, Message
 
+from app.configs import MESSAGE_REGISTRY_MAX_CHATS, MESSAGE_REGISTRY_MAX_PER_CHAT
+from app.services.message_registry import MessageRegistry, RegistryStats
+from app.services.outbound import OutboundScheduler, outbound_scheduler
+
 logger = logging.getLogger(__name__)
 
+DELETE_CHUNK_SIZE = 100  # максимум id в одном вызове deleteMessages.
+DELETE_FALLBACK_CONCURRENCY = 5  # одновременные одиночные удаления, если пакетное не прошло.
+
+
+async def delete_message_ids(bot: Bot,
+                             chat_id: int,
+                             message_ids: list[int],
+                             scheduler: OutboundScheduler = outbound_scheduler) -> list[int]:
+    """Удаляет сообщения пачками через deleteMessages.
+
+    Пачки идут через планировщик исходящих запросов: при flood wait он ждет и повторяет запрос.
+    Если пачка не удалилась по другой причине, ее сообщения удаляются по одному, параллельно, но не больше
+    DELETE_FALLBACK_CONCURRENCY запросов одновременно.
+
+    Args:
+        bot: Экземпляр бота.
+        chat_id: id чата.
+        message_ids: список id сообщений.
+        scheduler: планировщик исходящих запросов.
+
+    Returns:
+        id сообщений, которых в чате больше нет: удаленные сейчас или уже удаленные ранее.
+    """
+    unique_ids = list(dict.fromkeys(message_ids))
+    deleted: list[int] = []
+    for start in range(0, len(unique_ids), DELETE_CHUNK_SIZE):
+        chunk = unique_ids[start:start + DELETE_CHUNK_SIZE]
+        try:
+            # ненайденные сообщения телеграм пропускает сам.
+            await scheduler.submit(chat_id, partial(bot.delete_messages, chat_id, chunk))
+            deleted.extend(chunk)
+        except TelegramRetryAfter as e:
+            # повторы исчерпаны, одиночные удаления только усилят flood wait.
+            logger.warning(f"Bulk delete of {len(chunk)} messages in chat {chat_id} hit flood wait: {e}")
+        except Exception as e:
+            logger.warning(f"Bulk delete of {len(chunk)} messages in chat {chat_id} failed, deleting one by one: {e}")
+            deleted.extend(await _delete_one_by_one(bot, chat_id, chunk))
+    return deleted
+
+
+async def _delete_one_by_one(bot: Bot, chat_id: int, message_ids: list[int]) -> list[int]:
+    """Параллельно удаляет сообщения по одному с ограничением одновременных запросов."""
+    semaphore = asyncio.Semaphore(DELETE_FALLBACK_CONCURRENCY)
+
+    async def delete_one(msg_id: int) -> bool:
+        async with semaphore:
+            try:
+                await bot.delete_message(chat_id, msg_id)
+                return True
+            except TelegramBadRequest as e:
+                if "message to delete not found" in str(e).lower():
+                    logger.debug(f"Message {msg_id} already deleted")
+                    return True
+                logger.error(f"Failed to delete message {msg_id}: {e}")
+            except Exception as e:
+                logger.error(f"Unexpected error deleting message {msg_id}: {e}")
+            return False
+
+    results = await asyncio.gather(*(delete_one(msg_id) for msg_id in message_ids))
+    return [msg_id for msg_id, is_deleted in zip(message_ids, results, strict=True) if is_deleted]
+
+
 class MessageManager:
     """Сервис для управления сообщениями с безопасной обработкой ошибок."""
 
@@ -33,7 +101,10 @@ class MessageManager:
         if self._initialized:
             return
         self.bot = bot
-        self.message_registry: dict[int, list[int]] = {}
+        # все отправки и правки идут через общий планировщик с лимитами телеграм.
+        self.scheduler: OutboundScheduler = outbound_scheduler
+        self.message_registry = MessageRegistry(max_chats=MESSAGE_REGISTRY_MAX_CHATS,
+                                                max_messages_per_chat=MESSAGE_REGISTRY_MAX_PER_CHAT)
         self._initialized = True
         logger.info("MessageManager initialized")
 
@@ -42,25 +113,15 @@ class MessageManager:
             chat_id: int,
             message_ids: list[int]
             ) -> None:
-        """Удаляет несколько сообщений с обработкой ошибок.
+        """Удаляет несколько сообщений пачками с обработкой ошибок.
 
         Args:
             chat_id: id чата
             message_ids: спиоскк айдишников сообщений.
         """
-        for msg_id in message_ids:
-            try:
-                await self.bot.delete_message(chat_id, msg_id)
-                # Удаляем из реестра при успешном удалении
-                if chat_id in self.message_registry and msg_id in self.message_registry[chat_id]:
-                    self.message_registry[chat_id].remove(msg_id)
-            except TelegramBadRequest as e:
-                if "message to delete not found" in str(e).lower():
-                    logger.debug(f"Message {msg_id} already deleted")
-                else:
-                    logger.error(f"Failed to delete message {msg_id}: {e}")
-            except Exception as e:
-                logger.error(f"Unexpected error deleting message {msg_id}: {e}")
+        for msg_id in await delete_message_ids(self.bot, chat_id, message_ids, self.scheduler):
+            # Удаляем из реестра удаленные сообщения
+            self.message_registry.discard(chat_id, msg_id)
 
     async def safe_edit_reply_markup(
             self,
@@ -76,11 +137,12 @@ class MessageManager:
             reply_markup: схема телеграм клавиатуры.
         """
         try:
-            await self.bot.edit_message_reply_markup(
+            await self.scheduler.submit(chat_id, partial(
+                self.bot.edit_message_reply_markup,
                 chat_id=chat_id,
                 message_id=message_id,
                 reply_markup=reply_markup
-            )
+            ))
             return True
         except TelegramBadRequest as e:
             if "message is not modified" in str(e).lower():
@@ -99,10 +161,11 @@ class MessageManager:
             chat_id: id чата.
             message_id: id сообщения.
         """
-        if chat_id not in self.message_registry:
-            self.message_registry[chat_id] = []
-        if message_id not in self.message_registry[chat_id]:
-            self.message_registry[chat_id].append(message_id)
+        self.message_registry.add(chat_id, message_id)
+
+    def registry_stats(self) -> RegistryStats:
+        """Размер реестра сообщений и оценка занимаемой им памяти."""
+        return self.message_registry.stats
 
     async def safe_edit_text(
         self,
@@ -123,12 +186,13 @@ class MessageManager:
             True если редактирование успешно, False в противном случае
         """
         try:
-            await self.bot.edit_message_text(
+            await self.scheduler.submit(chat_id, partial(
+                self.bot.edit_message_text,
                 chat_id=chat_id,
                 message_id=message_id,
                 text=text,
                 **kwargs
-            )
+            ))
             return True
         except TelegramBadRequest as e:
             if "message is not modified" in str(e).lower():
@@ -167,28 +231,31 @@ class MessageManager:
         try:
             # Если нужно изменить и текст, и разметку
             if text is not None and reply_markup is not None:
-                await self.bot.edit_message_text(
+                await self.scheduler.submit(chat_id, partial(
+                    self.bot.edit_message_text,
                     chat_id=chat_id,
                     message_id=message_id,
                     text=text,
                     reply_markup=reply_markup,
                     **kwargs
-                )
+                ))
             # Если нужно изменить только текст
             elif text is not None:
-                await self.bot.edit_message_text(
+                await self.scheduler.submit(chat_id, partial(
+                    self.bot.edit_message_text,
                     chat_id=chat_id,
                     message_id=message_id,
                     text=text,
                     **kwargs
-                )
+                ))
             # Если нужно изменить только разметку
             elif reply_markup is not None:
-                await self.bot.edit_message_reply_markup(
+                await self.scheduler.submit(chat_id, partial(
+                    self.bot.edit_message_reply_markup,
                     chat_id=chat_id,
                     message_id=message_id,
                     reply_markup=reply_markup
-                )
+                ))
             else:
                 logger.warning("Nothing to edit - neither text nor reply_markup provided")
                 return False
@@ -214,9 +281,8 @@ class MessageManager:
         Args:
             chat_id: id чата
         """
-        if chat_id in self.message_registry:
-            await self.delete_messages(chat_id, self.message_registry[chat_id].copy())
-            self.message_registry[chat_id] = []
+        if message_ids := self.message_registry.pop(chat_id):
+            await self.delete_messages(chat_id, message_ids)
 
     async def safe_send_message(
             self,
@@ -232,7 +298,7 @@ class MessageManager:
             kwargs: кварги.
         """
         try:
-            message = await self.bot.send_message(chat_id, text, **kwargs)
+            message = await self.scheduler.submit(chat_id, partial(self.bot.send_message, chat_id, text, **kwargs))
             await self.track_message(chat_id, message.message_id)
             return message
         except Exception as e:
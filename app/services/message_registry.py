@@ -0,0 +1,157 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Callable, TypedDict
+
+# телеграм дает удалять сообщения бота только в течение 48 часов, старше отслеживать смысла нет.
+TELEGRAM_DELETE_WINDOW = 48 * 60 * 60
+
+
+class RegistryStats(TypedDict):
+    """Хинт счетчиков реестра сообщений."""
+
+    chats: int
+    messages: int
+    memory_bytes: int
+    evicted_chats: int
+    expired_messages: int
+
+
+class MessageRegistry:
+    """Ограниченный реестр отслеживаемых сообщений: чат -> упорядоченное множество id сообщений.
+
+    Проверка и удаление id за O(1). Чаты вытесняются по LRU при превышении max_chats,
+    сообщения старше ttl выбрасываются, т.к. удалить их телеграм уже не даст.
+    """
+
+    def __init__(self,
+                 max_chats: int = 10_000,
+                 max_messages_per_chat: int = 100,
+                 ttl: float = TELEGRAM_DELETE_WINDOW,
+                 purge_interval: float = 60 * 60,
+                 timer: Callable[[], float] = time.monotonic) -> None:
+        """Конструктор реестра.
+
+        Args:
+            max_chats: максимальное количество чатов, при переполнении вытесняется самый давний.
+            max_messages_per_chat: максимальное количество сообщений чата, лишние вытесняются с самых старых.
+            ttl: время жизни записи в секундах.
+            purge_interval: как часто, в секундах, чистим просроченные записи по всему реестру.
+            timer: источник монотонного времени.
+        """
+        self.max_chats = max_chats
+        self.max_messages_per_chat = max_messages_per_chat
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._timer = timer
+        self._last_purge = timer()
+        # сообщения чата хранятся в порядке добавления, значение - время добавления.
+        self._chats: OrderedDict[int, OrderedDict[int, float]] = OrderedDict()
+        self.evicted_chats = 0
+        self.expired_messages = 0
+
+    def __len__(self) -> int:
+        """Количество отслеживаемых чатов."""
+        return len(self._chats)
+
+    def __contains__(self, chat_id: object) -> bool:
+        """Отслеживается ли чат."""
+        return chat_id in self._chats
+
+    def add(self, chat_id: int, message_id: int) -> None:
+        """Добавляем сообщение в реестр.
+
+        Args:
+            chat_id: id чата.
+            message_id: id сообщения.
+        """
+        now = self._timer()
+        if now - self._last_purge >= self.purge_interval:
+            self.purge_expired()  # чаты, в которые больше не пишут, иначе дожидались бы вытеснения по LRU.
+        messages = self._chats.get(chat_id)
+        if messages is None:
+            messages = self._chats[chat_id] = OrderedDict()
+        else:
+            self._chats.move_to_end(chat_id)
+            self._expire(messages, now)
+        if message_id not in messages:
+            messages[message_id] = now
+            while len(messages) > self.max_messages_per_chat:
+                messages.popitem(last=False)
+        while len(self._chats) > self.max_chats:
+            self._chats.popitem(last=False)
+            self.evicted_chats += 1
+
+    def discard(self, chat_id: int, message_id: int) -> None:
+        """Убираем сообщение из реестра, если оно там есть.
+
+        Args:
+            chat_id: id чата.
+            message_id: id сообщения.
+        """
+        if (messages := self._chats.get(chat_id)) is not None:
+            messages.pop(message_id, None)
+            if not messages:
+                del self._chats[chat_id]
+
+    def get(self, chat_id: int) -> list[int]:
+        """Актуальные id сообщений чата в порядке добавления.
+
+        Args:
+            chat_id: id чата.
+        """
+        if (messages := self._chats.get(chat_id)) is None:
+            return []
+        self._expire(messages, self._timer())
+        return list(messages)
+
+    def pop(self, chat_id: int) -> list[int]:
+        """Забираем актуальные id сообщений чата и перестаем его отслеживать.
+
+        Args:
+            chat_id: id чата.
+        """
+        message_ids = self.get(chat_id)
+        self._chats.pop(chat_id, None)
+        return message_ids
+
+    def purge_expired(self) -> int:
+        """Выбрасываем просроченные сообщения и опустевшие чаты по всему реестру. Возвращаем кол-во удаленных."""
+        now = self._last_purge = self._timer()
+        expired_before = self.expired_messages
+        for chat_id in list(self._chats):
+            messages = self._chats[chat_id]
+            self._expire(messages, now)
+            if not messages:
+                del self._chats[chat_id]
+        return self.expired_messages - expired_before
+
+    def memory_usage(self) -> int:
+        """Примерный объем памяти реестра в байтах: контейнеры, ключи и время добавления."""
+        size = sys.getsizeof(self._chats)
+        for chat_id, messages in self._chats.items():
+            size += sys.getsizeof(chat_id) + sys.getsizeof(messages)
+            # int и float одного размера у всех записей, поэтому не обходим каждую.
+            size += len(messages) * (sys.getsizeof(2**40) + sys.getsizeof(0.0))
+        return size
+
+    @property
+    def stats(self) -> RegistryStats:
+        """Размер реестра, оценка памяти и счетчики вытеснений."""
+        return {
+            "chats": len(self._chats),
+            "messages": sum(len(messages) for messages in self._chats.values()),
+            "memory_bytes": self.memory_usage(),
+            "evicted_chats": self.evicted_chats,
+            "expired_messages": self.expired_messages,
+        }
+
+    def _expire(self, messages: OrderedDict[int, float], now: float) -> None:
+        """Выбрасываем просроченные сообщения чата. Они лежат в порядке добавления, поэтому смотрим только начало."""
+        deadline = now - self.ttl
+        while messages:
+            message_id, tracked_at = next(iter(messages.items()))
+            if tracked_at > deadline:
+                break
+            del messages[message_id]
+            self.expired_messages += 1
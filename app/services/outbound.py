@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable
+from typing import Callable, TypedDict, TypeVar
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from app.configs import OUTBOUND_CHAT_BURST, OUTBOUND_CHAT_RATE, OUTBOUND_GLOBAL_RATE, OUTBOUND_MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class OutboundStats(TypedDict):
+    """Хинт метрик исходящей очереди."""
+
+    queued: int
+    max_queued: int
+    sent: int
+    flood_waits: int
+    wait_total_ms: float
+    wait_max_ms: float
+    wait_avg_ms: float
+
+
+class TokenBucket:
+    """Token bucket с резервированием: токен можно взять в долг, взамен получаем время ожидания."""
+
+    __slots__ = ("_timer", "_tokens", "_updated_at", "capacity", "rate")
+
+    def __init__(self, rate: float, capacity: float, timer: Callable[[], float] = time.monotonic) -> None:
+        """Конструктор ведра.
+
+        Args:
+            rate: скорость пополнения, токенов в секунду.
+            capacity: размер ведра, допустимый всплеск запросов.
+            timer: источник монотонного времени.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._timer = timer
+        self._tokens = capacity
+        self._updated_at = timer()
+
+    def reserve(self) -> float:
+        """Забираем токен. Возвращаем, сколько секунд нужно подождать, прежде чем им воспользоваться."""
+        self._refill()
+        self._tokens -= 1
+        return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Не выдаем токены ближайшие seconds секунд, например после flood wait от телеграм."""
+        self._refill()
+        self._tokens = min(self._tokens, 1 - seconds * self.rate)
+
+    def _refill(self) -> None:
+        """Пополняем ведро за прошедшее время."""
+        now = self._timer()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    @property
+    def is_full(self) -> bool:
+        """Ведро полное, т.е. лимит давно не использовался."""
+        return self._tokens + (self._timer() - self._updated_at) * self.rate >= self.capacity
+
+
+class _ChatLane:
+    """Очередь исходящих запросов одного чата: FIFO блокировка и собственное ведро."""
+
+    __slots__ = ("bucket", "lock", "queued")
+
+    def __init__(self, bucket: TokenBucket) -> None:
+        """Конструктор очереди чата."""
+        self.bucket = bucket
+        self.lock = asyncio.Lock()  # asyncio.Lock отдает блокировку ожидающим в порядке очереди.
+        self.queued = 0
+
+
+class OutboundScheduler:
+    """Планировщик исходящих запросов к Bot API.
+
+    Соблюдает общий лимит бота и лимит на чат (token bucket), сохраняет порядок запросов внутри чата
+    и при TelegramRetryAfter ждет указанное телеграмом время и повторяет запрос, а не теряет сообщение.
+    Всплески превращаются в небольшие задержки.
+
+    Через планировщик идут отправки, правки, удаления и 'Печатает' в клиентских сценариях. Мимо него:
+    ответы на callback (это не сообщение в чат, и ответ нужен сразу, см. EarlyCallbackAnswerMiddleware),
+    админка и ответы формы обратной связи - редкие запросы, которые лимиты не нагружают.
+    """
+
+    def __init__(self,
+                 global_rate: float = 30.0,
+                 chat_rate: float = 1.0,
+                 chat_burst: float = 3.0,
+                 max_retries: int = 3,
+                 max_idle_lanes: int = 1024,
+                 timer: Callable[[], float] = time.monotonic) -> None:
+        """Конструктор планировщика.
+
+        Args:
+            global_rate: общий лимит запросов в секунду.
+            chat_rate: лимит запросов в секунду на один чат.
+            chat_burst: сколько запросов в чат можно отправить подряд без задержки.
+            max_retries: сколько раз повторяем запрос после flood wait.
+            max_idle_lanes: сколько простаивающих очередей чатов держим, прежде чем чистить.
+            timer: источник монотонного времени.
+        """
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.max_idle_lanes = max_idle_lanes
+        self._timer = timer
+        self._global = TokenBucket(global_rate, global_rate, timer)
+        self._lanes: OrderedDict[int, _ChatLane] = OrderedDict()
+        self.queued = 0
+        self.max_queued = 0
+        self.sent = 0
+        self.flood_waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @property
+    def stats(self) -> OutboundStats:
+        """Глубина очереди, количество flood wait и время ожидания отправки."""
+        return {
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "sent": self.sent,
+            "flood_waits": self.flood_waits,
+            "wait_total_ms": self.wait_total * 1000,
+            "wait_max_ms": self.wait_max * 1000,
+            "wait_avg_ms": self.wait_total / self.sent * 1000 if self.sent else 0.0,
+        }
+
+    async def submit(self, chat_id: int, call: Callable[[], Awaitable[T]]) -> T:
+        """Выполняем запрос к Bot API в очереди чата с соблюдением лимитов.
+
+        Args:
+            chat_id: id чата, в который уходит запрос.
+            call: функция, создающая корутину запроса. Вызывается заново при повторе.
+        """
+        lane = self._lane(chat_id)
+        lane.queued += 1
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        start = self._timer()
+        try:
+            async with lane.lock:
+                await self._wait(lane.bucket)
+                waited = self._timer() - start
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+                attempt = 0
+                while True:
+                    try:
+                        result = await call()
+                    except TelegramRetryAfter as e:
+                        self.flood_waits += 1
+                        if attempt >= self.max_retries:
+                            raise
+                        attempt += 1
+                        logger.warning(f"Flood wait {e.retry_after}s in chat {chat_id}, retry {attempt}")
+                        lane.bucket.pause(e.retry_after)
+                        await self._wait(lane.bucket)
+                        continue
+                    self.sent += 1
+                    return result
+        finally:
+            lane.queued -= 1
+            self.queued -= 1
+
+    async def _wait(self, chat_bucket: TokenBucket) -> None:
+        """Ждем токен чата, затем общий токен. Общий берем последним, что бы не занимать его во время ожидания."""
+        if delay := chat_bucket.reserve():
+            await asyncio.sleep(delay)
+        if delay := self._global.reserve():
+            await asyncio.sleep(delay)
+
+    def _lane(self, chat_id: int) -> _ChatLane:
+        """Очередь чата. Простаивающие очереди с полным ведром выбрасываем, их лимиты уже не важны."""
+        if (lane := self._lanes.get(chat_id)) is not None:
+            self._lanes.move_to_end(chat_id)
+            return lane
+        if len(self._lanes) >= self.max_idle_lanes:
+            for idle_chat_id in [i for i, idle in self._lanes.items() if not idle.queued and idle.bucket.is_full]:
+                del self._lanes[idle_chat_id]
+        lane = self._lanes[chat_id] = _ChatLane(TokenBucket(self.chat_rate, self.chat_burst, self._timer))
+        return lane
+
+
+outbound_scheduler = OutboundScheduler(global_rate=OUTBOUND_GLOBAL_RATE,
+                                       chat_rate=OUTBOUND_CHAT_RATE,
+                                       chat_burst=OUTBOUND_CHAT_BURST,
+                                       max_retries=OUTBOUND_MAX_RETRIES)
@@ -0,0 +1,86 @@
+import time
+from collections import OrderedDict, deque
+from typing import Callable, TypedDict
+
+
+class QuotaStats(TypedDict):
+    """Хинт счетчиков квоты."""
+
+    users: int
+    allowed: int
+    rejected: int
+    evicted: int
+
+
+class SlidingWindowQuota:
+    """Квота на пользователя: не больше limit действий за последние window секунд.
+
+    Храним времена действий пользователя в окне. Пользователи без действий в окне удаляются,
+    общее количество пользователей ограничено max_users (вытесняется самый давно активный).
+    """
+
+    def __init__(self,
+                 limit: int,
+                 window: float,
+                 max_users: int = 10_000,
+                 timer: Callable[[], float] = time.monotonic) -> None:
+        """Конструктор квоты.
+
+        Args:
+            limit: сколько действий разрешено за окно.
+            window: размер окна в секундах.
+            max_users: сколько пользователей храним одновременно.
+            timer: источник монотонного времени.
+        """
+        self.limit = limit
+        self.window = window
+        self.max_users = max_users
+        self._timer = timer
+        self._users: OrderedDict[int, deque[float]] = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    @property
+    def stats(self) -> QuotaStats:
+        """Количество отслеживаемых пользователей и счетчики решений."""
+        return {"users": len(self._users), "allowed": self.allowed, "rejected": self.rejected, "evicted": self.evicted}
+
+    def acquire(self, user_id: int) -> bool:
+        """Засчитываем действие, если квота пользователя не исчерпана.
+
+        Args:
+            user_id: tg id пользователя.
+
+        Returns:
+            True, если действие разрешено.
+        """
+        now = self._timer()
+        self._evict_idle(now)
+        hits = self._users.get(user_id)
+        if hits is None:
+            hits = self._users[user_id] = deque()
+        self._users.move_to_end(user_id)
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+        if len(hits) >= self.limit:
+            self.rejected += 1
+            return False
+        hits.append(now)
+        self.allowed += 1
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+            self.evicted += 1
+        return True
+
+    def _evict_idle(self, now: float) -> None:
+        """Удаляем пользователей, у которых последнее действие вышло из окна.
+
+        Пользователи упорядочены по последнему обращению, поэтому проверяем только начало.
+        """
+        while self._users:
+            user_id, hits = next(iter(self._users.items()))
+            if hits and hits[-1] > now - self.window:
+                break
+            del self._users[user_id]
+            self.evicted += 1
@@ -0,0 +1,292 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import secrets
+import signal
+from collections import deque
+from multiprocessing.context import SpawnProcess
+from multiprocessing.queues import Queue
+from multiprocessing.sharedctypes import Synchronized
+from typing import Any, Callable, TypedDict
+
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+
+from app.services.catalog import catalog
+
+logger = logging.getLogger(__name__)
+
+# фабрика воркера: создает бота и диспетчер с роутерами. Должна быть функцией уровня модуля,
+# воркер запускается через spawn и получает ее по имени.
+WorkerFactory = Callable[[], tuple[Bot, Dispatcher]]
+ShardItem = tuple[int, dict[str, Any]] | None  # (chat_id, апдейт) или None - сигнал остановки воркера.
+
+_spawn = multiprocessing.get_context("spawn")
+
+
+class ShardStats(TypedDict):
+    """Хинт счетчиков распределения апдейтов по воркерам."""
+
+    workers: int
+    alive: int
+    forwarded: list[int]
+    backlog: int
+    restarts: int
+
+
+def update_chat_id(update: dict[str, Any]) -> int:
+    """Чат апдейта по сырому json, без разбора в модели aiogram.
+
+    Для событий без чата (inline query и т.п.) берем id пользователя: его личный чат попадет в тот же воркер.
+
+    Args:
+        update: апдейт телеграм.
+    """
+    for name, event in update.items():
+        if name == "update_id" or not isinstance(event, dict):
+            continue
+        if (chat := event.get("chat")) is None and isinstance(message := event.get("message"), dict):
+            chat = message.get("chat")  # callback_query.
+        if chat is not None:
+            return chat["id"]
+        if (user := event.get("from") or event.get("user")) is not None:
+            return user["id"]
+    return 0
+
+
+def is_primary_process() -> bool:
+    """Процесс, который делает фоновую работу, общую для всего бота: единственный процесс или воркер 0."""
+    return multiprocessing.current_process().name in {"MainProcess", "worker-0"}
+
+
+def shard_for(chat_id: int, workers: int) -> int:
+    """Номер воркера для чата. Все апдейты чата всегда уходят в один воркер."""
+    return chat_id % workers
+
+
+def run_worker(index: int,
+               updates: "Queue[ShardItem]",
+               factory: WorkerFactory,
+               catalog_version: "Synchronized[int]") -> None:
+    """Точка входа процесса воркера."""
+    logging.basicConfig(level=logging.INFO)
+    # Ctrl+C и SIGTERM от systemd получает вся группа процессов, воркеры останавливает фронт, дождавшись апдейтов.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    asyncio.run(_serve_worker(index, updates, factory, catalog_version))
+
+
+async def _serve_worker(index: int,
+                        updates: "Queue[ShardItem]",
+                        factory: WorkerFactory,
+                        catalog_version: "Synchronized[int]") -> None:
+    """Обрабатываем апдейты из очереди тем же диспетчером, что и в одном процессе.
+
+    Задачи апдейтов создаются в порядке поступления, очередь чата держит ChatSerializationMiddleware диспетчера.
+    Сигнал остановки: дорабатываем принятые апдейты и выходим.
+
+    Запись админа в каталог увеличивает общий для воркеров счетчик catalog_version. Остальные воркеры
+    замечают это перед следующим апдейтом и пересобирают снимок каталога вместе с зависящими от него кешами.
+    """
+    bot, dispatcher = factory()
+    seen_version = catalog_version.value  # снимок, собранный на старте, уже учитывает эту версию.
+
+    def publish_catalog_change() -> None:
+        nonlocal seen_version
+        with catalog_version.get_lock():
+            catalog_version.value += 1
+            seen_version = catalog_version.value  # свой снимок этот воркер уже пересобрал.
+
+    catalog.broadcast = publish_catalog_change
+    workflow_data = {"dispatcher": dispatcher, "bots": [bot], **dispatcher.workflow_data}
+    await dispatcher.emit_startup(bot=bot, **workflow_data)
+    loop = asyncio.get_running_loop()
+    tasks: set[asyncio.Task[None]] = set()
+
+    async def process(update: dict[str, Any]) -> None:
+        try:
+            await dispatcher.feed_raw_update(bot, update)
+        except Exception:
+            logger.exception(f"Worker {index} failed to process update {update.get('update_id')}")
+
+    logger.info(f"Worker {index} started")
+    try:
+        while (item := await loop.run_in_executor(None, updates.get)) is not None:
+            if (version := catalog_version.value) != seen_version:  # каталог изменили в другом воркере.
+                seen_version = version
+                await catalog.refresh()
+            task = asyncio.create_task(process(item[1]))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        logger.info(f"Worker {index} draining {len(tasks)} updates")
+        await asyncio.gather(*tasks)
+    finally:
+        catalog.broadcast = None
+        await dispatcher.emit_shutdown(bot=bot, **workflow_data)
+        await bot.session.close()
+
+
+class ShardRouter:
+    """Фронт: раздает апдейты N процессам-воркерам по chat_id.
+
+    Каждый воркер держит свою очередь, поэтому порядок апдейтов чата сохраняется, а FSM и MessageManager
+    чата живут в одном процессе. При перезапуске воркер дорабатывает принятые апдейты, новые апдейты
+    его чатов на это время копятся во фронте.
+    """
+
+    def __init__(self, workers: int, factory: WorkerFactory) -> None:
+        """Конструктор фронта.
+
+        Args:
+            workers: количество процессов-воркеров.
+            factory: фабрика бота и диспетчера для воркера.
+        """
+        self.workers = workers
+        self.factory = factory
+        self._queues: list[Queue[ShardItem]] = [_spawn.Queue() for _ in range(workers)]
+        self._processes: list[SpawnProcess | None] = [None] * workers
+        # апдейты, накопленные на время перезапуска воркера. None - воркер не перезапускается.
+        self._backlogs: list[deque[tuple[int, dict[str, Any]]] | None] = [None] * workers
+        self.forwarded = [0] * workers
+        self.restarts = 0
+        self._catalog_version = _spawn.Value("q", 0)  # растет при записи админом в каталог в любом воркере.
+
+    @property
+    def stats(self) -> ShardStats:
+        """Воркеры, живые процессы, апдейты по воркерам, накопленные на время перезапуска и перезапуски."""
+        return {
+            "workers": self.workers,
+            "alive": sum(1 for process in self._processes if process is not None and process.is_alive()),
+            "forwarded": list(self.forwarded),
+            "backlog": sum(len(backlog) for backlog in self._backlogs if backlog is not None),
+            "restarts": self.restarts,
+        }
+
+    def start(self) -> None:
+        """Запускаем процессы воркеров."""
+        for index in range(self.workers):
+            self._spawn_worker(index)
+
+    def dispatch(self, update: dict[str, Any]) -> None:
+        """Отправляем апдейт воркеру его чата.
+
+        Args:
+            update: апдейт телеграм в виде json.
+        """
+        chat_id = update_chat_id(update)
+        index = shard_for(chat_id, self.workers)
+        if (backlog := self._backlogs[index]) is not None:
+            backlog.append((chat_id, update))
+            return
+        self.forwarded[index] += 1
+        self._queues[index].put((chat_id, update))
+
+    async def restart(self, index: int) -> None:
+        """Перезапускаем воркер: старый дорабатывает принятые апдейты, новые ждут во фронте.
+
+        Args:
+            index: номер воркера.
+        """
+        if self._backlogs[index] is not None:
+            return
+        self._backlogs[index] = deque()
+        try:
+            await self._stop_worker(index)
+            self._spawn_worker(index)
+            self.restarts += 1
+        finally:
+            backlog, self._backlogs[index] = self._backlogs[index], None
+            for chat_id, update in backlog or ():
+                self.forwarded[index] += 1
+                self._queues[index].put((chat_id, update))
+
+    async def restart_all(self) -> None:
+        """Перезапускаем воркеры по одному, остальные в это время работают."""
+        for index in range(self.workers):
+            await self.restart(index)
+
+    async def watch(self, interval: float = 1.0) -> None:
+        """Поднимаем упавшие воркеры. Апдейты, которые упавший воркер уже взял, теряются."""
+        while True:
+            await asyncio.sleep(interval)
+            for index, process in enumerate(self._processes):
+                if process is not None and not process.is_alive() and self._backlogs[index] is None:
+                    logger.error(f"Worker {index} exited with code {process.exitcode}, restarting")
+                    self._replace_queue(index)
+                    self._spawn_worker(index)
+                    self.restarts += 1
+
+    async def stop(self) -> None:
+        """Останавливаем воркеры, дождавшись обработки принятых апдейтов."""
+        await asyncio.gather(*(self._stop_worker(index) for index in range(self.workers)))
+
+    def _spawn_worker(self, index: int) -> None:
+        """Запускаем процесс воркера."""
+        process = _spawn.Process(target=run_worker,
+                                 args=(index, self._queues[index], self.factory, self._catalog_version),
+                                 name=f"worker-{index}")  # по имени процесса Logger выбирает файлы логов.
+        process.start()
+        self._processes[index] = process
+
+    def _replace_queue(self, index: int) -> None:
+        """Новая очередь для воркера, поднятого после падения.
+
+        Воркер, ждущий апдейт, держит блокировку чтения очереди. Если он упал, старую очередь не прочитать,
+        поэтому переносим из нее то, что забирается без ожидания.
+        """
+        old, new = self._queues[index], _spawn.Queue()
+        while True:
+            try:
+                item = old.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                new.put(item)
+        old.cancel_join_thread()  # не ждем при выходе запись в очередь, которую никто не читает.
+        old.close()
+        self._queues[index] = new
+
+    async def _stop_worker(self, index: int) -> None:
+        """Посылаем воркеру сигнал остановки и ждем завершения процесса."""
+        if (process := self._processes[index]) is None:
+            return
+        if process.is_alive():
+            self._queues[index].put(None)
+            await asyncio.to_thread(process.join)
+        self._processes[index] = None
+
+
+async def poll_updates(bot: Bot, router: ShardRouter, allowed_updates: list[str] | None = None) -> None:
+    """Фронт в режиме polling: забираем апдейты getUpdates и раздаем воркерам."""
+    offset: int | None = None
+    while True:
+        try:
+            updates = await bot.get_updates(offset=offset, timeout=30, allowed_updates=allowed_updates)
+        except Exception as e:
+            logger.warning(f"Failed to fetch updates: {e}")
+            await asyncio.sleep(1)
+            continue
+        for update in updates:
+            router.dispatch(update.model_dump(mode="json", by_alias=True, exclude_none=True))
+            offset = update.update_id + 1
+
+
+def build_front_app(router: ShardRouter, path: str, secret_token: str | None = None) -> web.Application:
+    """Фронт в режиме webhook: принимаем апдейт, отдаем воркеру и сразу отвечаем телеграм.
+
+    Args:
+        router: раздача апдейтов воркерам.
+        path: путь, на который телеграм присылает апдейты.
+        secret_token: секрет из заголовка X-Telegram-Bot-Api-Secret-Token.
+    """
+    async def handle(request: web.Request) -> web.Response:
+        received = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if secret_token and not secrets.compare_digest(received, secret_token):
+            return web.Response(body="Unauthorized", status=401)
+        router.dispatch(await request.json())
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_post(path, handle)
+    return app
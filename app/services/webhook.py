@@ -0,0 +1,154 @@
+import asyncio
+import contextvars
+import logging
+from typing import Any, TypedDict
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import AnswerCallbackQuery, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# методы, которые можно отдать в ответе на webhook, и результат, который получит вызывающий.
+# Ответ телеграм выполнит уже после нашего ответа, поэтому подходят только методы с заранее известным
+# результатом и без зависимости от порядка: send/edit возвращают Message, его id нужен вызывающим.
+WEBHOOK_REPLY_METHODS: dict[type[TelegramMethod[Any]], Any] = {AnswerCallbackQuery: True}
+
+
+class WebhookStats(TypedDict):
+    """Хинт счетчиков webhook."""
+
+    updates: int
+    replied: int
+    returned: int
+    timeouts: int
+
+
+class _ReplySlot:
+    """Место под метод, который уйдет в ответе на webhook. ready - ответ уже отдан или вот-вот будет отдан."""
+
+    __slots__ = ("method", "ready")
+
+    def __init__(self) -> None:
+        """Конструктор."""
+        self.method: TelegramMethod[Any] | None = None
+        self.ready = asyncio.Event()
+
+
+# место под ответ текущего апдейта. Выставляется в WebhookRequestHandler, задачи хендлера его наследуют.
+_reply_slot: contextvars.ContextVar[_ReplySlot | None] = contextvars.ContextVar("webhook_reply_slot", default=None)
+
+
+class WebhookReplyMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: первый подходящий вызов апдейта отдаем в ответе на webhook, без отдельного запроса."""
+
+    async def __call__(self,
+                       make_request: NextRequestMiddlewareType[TelegramType],
+                       bot: Bot,
+                       method: TelegramMethod[TelegramType]) -> Any:
+        """Вызов middleware."""
+        slot = _reply_slot.get()
+        if slot is None or slot.ready.is_set() or type(method) not in WEBHOOK_REPLY_METHODS:
+            return await make_request(bot, method)
+        slot.method = method
+        slot.ready.set()
+        return WEBHOOK_REPLY_METHODS[type(method)]
+
+
+class WebhookRequestHandler(SimpleRequestHandler):
+    """Обработчик webhook с быстрым ответом.
+
+    Апдейт обрабатывается в фоне. Отвечаем телеграм, как только хендлер сделал подходящий вызов
+    (он уходит в теле ответа), вернул метод или закончил работу, но не позже reply_timeout секунд.
+    Ждем только для callback: в ответе уходит answerCallbackQuery, на остальные апдейты отвечаем сразу.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, reply_timeout: float = 1.0, **kwargs: Any) -> None:
+        """Конструктор обработчика.
+
+        Args:
+            dispatcher: диспетчер с роутерами бота.
+            bot: бот.
+            reply_timeout: сколько секунд держим запрос телеграм в ожидании вызова для ответа.
+            kwargs: secret_token и данные для хендлеров, как у SimpleRequestHandler.
+        """
+        super().__init__(dispatcher, bot, handle_in_background=False, **kwargs)
+        self.reply_timeout = reply_timeout
+        self.updates = 0
+        self.replied = 0
+        self.returned = 0
+        self.timeouts = 0
+
+    @property
+    def stats(self) -> WebhookStats:
+        """Апдейты, ответы с методом (из них возвращенным хендлером) и ответы по таймауту."""
+        return {"updates": self.updates, "replied": self.replied, "returned": self.returned, "timeouts": self.timeouts}
+
+    async def close(self) -> None:
+        """Дожидаемся апдейтов в обработке и закрываем сессию бота."""
+        await asyncio.gather(*self._background_feed_update_tasks, return_exceptions=True)
+        await super().close()
+
+    async def _handle_request(self, bot: Bot, request: web.Request) -> web.Response:
+        """Запускаем обработку апдейта и отвечаем, как только известен ответ."""
+        update = await request.json(loads=bot.session.json_loads)
+        self.updates += 1
+        slot = _ReplySlot()
+        if "callback_query" not in update:
+            slot.ready.set()  # отдать в ответе нечего, телеграм не ждет обработку.
+        token = _reply_slot.set(slot)
+        try:
+            task = asyncio.create_task(self._feed_update(bot, update, slot))
+        finally:
+            _reply_slot.reset(token)
+        self._background_feed_update_tasks.add(task)
+        task.add_done_callback(self._background_feed_update_tasks.discard)
+        try:
+            async with asyncio.timeout(self.reply_timeout):
+                await slot.ready.wait()
+        except TimeoutError:
+            self.timeouts += 1
+        slot.ready.set()  # дальше все вызовы хендлера идут обычными запросами.
+        if slot.method is not None:
+            self.replied += 1
+        return web.Response(body=self._build_response_writer(bot=bot, result=slot.method))
+
+    async def _feed_update(self, bot: Bot, update: dict[str, Any], slot: _ReplySlot) -> None:
+        """Обрабатываем апдейт. Метод, возвращенный хендлером, отдаем в ответе, если он еще не ушел."""
+        try:
+            result = await self.dispatcher.feed_raw_update(bot=bot, update=update, **self.data)
+        except Exception:
+            logger.exception(f"Failed to process webhook update {update.get('update_id')}")
+            result = None
+        if isinstance(result, TelegramMethod):
+            if slot.ready.is_set():
+                await self.dispatcher.silent_call_request(bot=bot, result=result)
+            else:
+                slot.method = result
+                self.returned += 1
+        slot.ready.set()
+
+
+def build_webhook_app(dispatcher: Dispatcher,
+                      bot: Bot,
+                      path: str,
+                      secret_token: str | None = None,
+                      reply_timeout: float = 1.0) -> web.Application:
+    """Собираем aiohttp приложение webhook для того же диспетчера, что и в режиме polling.
+
+    Args:
+        dispatcher: диспетчер с роутерами бота.
+        bot: бот.
+        path: путь, на который телеграм присылает апдейты.
+        secret_token: секрет из заголовка X-Telegram-Bot-Api-Secret-Token.
+        reply_timeout: сколько секунд ждем вызов, который можно отдать в ответе.
+    """
+    bot.session.middleware(WebhookReplyMiddleware())
+    app = web.Application()
+    handler = WebhookRequestHandler(dispatcher, bot, reply_timeout=reply_timeout, secret_token=secret_token)
+    handler.register(app, path=path)
+    setup_application(app, dispatcher, bot=bot)
+    return app
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Awaitable
+from typing import Callable, TypedDict
+
+logger = logging.getLogger(__name__)
+
+
+class WishPoolStats(TypedDict):
+    """Хинт счетчиков пула пожеланий."""
+
+    ready: dict[str, int]
+    served: int
+    empty: int
+    generated: int
+    failed: int
+
+
+class WishPool:
+    """Пул заранее сгенерированных ИИ пожеланий, отдельно для каждого времени суток.
+
+    Нажатие кнопки забирает готовое пожелание без ожидания ИИ. Когда пожеланий становится меньше
+    watermark, пул фоном догенерирует их до size. Пустой пул означает, что вызывающий идет в ИИ сам.
+    """
+
+    def __init__(self,
+                 generate: Callable[[str], Awaitable[str]],
+                 size: int = 5,
+                 watermark: int = 2) -> None:
+        """Конструктор пула.
+
+        Args:
+            generate: корутина-функция, генерирующая пожелание для времени суток.
+            size: до скольки пожеланий пополняем пул каждого времени суток.
+            watermark: ниже какого количества пожеланий запускаем пополнение.
+        """
+        self.generate = generate
+        self.size = size
+        self.watermark = watermark
+        self._wishes: dict[str, deque[str]] = {}
+        self._refills: dict[str, asyncio.Task[None]] = {}
+        self.served = 0
+        self.empty = 0
+        self.generated = 0
+        self.failed = 0
+
+    @property
+    def stats(self) -> WishPoolStats:
+        """Готовые пожелания по времени суток и счетчики выдачи/генерации."""
+        return {
+            "ready": {time_of_day: len(wishes) for time_of_day, wishes in self._wishes.items()},
+            "served": self.served,
+            "empty": self.empty,
+            "generated": self.generated,
+            "failed": self.failed,
+        }
+
+    def take(self, time_of_day: str) -> str | None:
+        """Забираем готовое пожелание и при необходимости запускаем фоновое пополнение.
+
+        Args:
+            time_of_day: время суток, под которое написано пожелание.
+
+        Returns:
+            пожелание или None, если пул пуст.
+        """
+        wishes = self._wishes.setdefault(time_of_day, deque())
+        wish = wishes.popleft() if wishes else None
+        if wish is None:
+            self.empty += 1
+        else:
+            self.served += 1
+        if len(wishes) < self.watermark:
+            self.refill(time_of_day)
+        return wish
+
+    def refill(self, time_of_day: str) -> None:
+        """Запускаем фоновое пополнение пула, если оно еще не идет.
+
+        Args:
+            time_of_day: время суток.
+        """
+        if (task := self._refills.get(time_of_day)) is not None and not task.done():
+            return
+        self._refills[time_of_day] = asyncio.create_task(self._refill(time_of_day))
+
+    async def stop(self) -> None:
+        """Останавливаем фоновые пополнения."""
+        tasks = [task for task in self._refills.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refills.clear()
+
+    async def _refill(self, time_of_day: str) -> None:
+        """Генерируем пожелания по одному, пока пул не заполнится. При ошибке ИИ останавливаемся до следующей выдачи."""
+        wishes = self._wishes.setdefault(time_of_day, deque())
+        while len(wishes) < self.size:
+            try:
+                wish = await self.generate(time_of_day)
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"Failed to pre-generate wish for '{time_of_day}': {e}")
+                return
+            if not wish:
+                self.failed += 1
+                return
+            wishes.append(wish)
+            self.generated += 1
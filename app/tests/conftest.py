@@ -1,9 +1,12 @@
 from collections.abc import Generator
+from typing import Any
 from unittest.mock import AsyncMock
 
 import pytest
 from aiogram import Bot
+from aiogram.client.session.base import BaseSession
 from aiogram.fsm.context import FSMContext
+from aiogram.methods import TelegramMethod
 from aiogram.types import CallbackQuery, Chat, Message, User
 
 from app.logic.feedback import LogicFeedback
@@ -12,6 +15,27 @@ from app.services.message_manager import MessageManager
 AsyncMockGenerator = Generator[AsyncMock, None, None]
 
 
+class FakeSession(BaseSession):
+    """Сессия бота, которая вместо телеграм записывает запросы."""
+
+    def __init__(self) -> None:
+        """Конструктор сессии."""
+        super().__init__()
+        self.requests: list[TelegramMethod[Any]] = []
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[Any], timeout: int | None = None) -> Any:
+        """Записываем запрос и отвечаем как телеграм."""
+        self.requests.append(method)
+        return True
+
+    async def stream_content(self, *args: Any, **kwargs: Any) -> Any:
+        """Не используется."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Закрывать нечего."""
+
+
 @pytest.fixture(name="mock_chat")
 def f_mock_chat() -> AsyncMock:
     """Мокаем объект aiogram.types.Chat."""
@@ -1,5 +1,7 @@
+from collections.abc import Generator
+from contextlib import nullcontext
 from typing import Any, NotRequired, Required, TypedDict
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from aiogram.fsm.context import FSMContext
@@ -9,6 +11,7 @@ from app.handlers.feedback import NAME_FORM_MSG
 from app.keyboards import CALLBACK_COFFEE_POINT_PREFIX, CALLBACK_DRINKS, CALLBACK_ITEM_PREFIX
 from app.logic.feedback import ANSWER_MSG, FEEDBACK_STEPS_MSG, FEEDBACK_TYPES
 from app.logic.user_logic import UserLogic
+from app.models.user_model import known_tg_ids
 from app.services.message_manager import MessageManager
 from app.tests.conftest import AsyncMockGenerator
 
@@ -188,16 +191,18 @@ def mock_message_user_configure_for_cmd_start(mock_message: AsyncMock, test_data
     return mock_message
 
 @pytest.fixture()
-def mock_wait_typing():
-    """Мокаем wait_typing."""
-    with patch("app.logic.user_logic.wait_typing", new_callable=AsyncMock) as m:
+def mock_typing_indicator() -> Generator[MagicMock, None, None]:
+    """Мокаем typing_indicator, индикатор 'Печатает' не запускаем."""
+    with patch("app.logic.user_logic.typing_indicator", side_effect=lambda *args, **kwargs: nullcontext()) as m:
         yield m
 
 @pytest.fixture()
-def mock_set_user_to_db() -> AsyncMockGenerator:
-    """Мокаем UserContext.set_user."""
-    with patch.object(UserContext, "set_user_to_db", new_callable=AsyncMock) as mock:
+def mock_upsert_user() -> AsyncMockGenerator:
+    """Мокаем UserContext.upsert_user. Сбрасываем известные процессу tg id, что бы запись не пропускалась."""
+    known_tg_ids.clear()
+    with patch.object(UserContext, "upsert_user", new_callable=AsyncMock) as mock:
         yield mock
+    known_tg_ids.clear()
 
 @pytest.fixture()
 def mock_get_coffee_points_db(coffee_points: list[dict[str, Any]]) -> AsyncMockGenerator:
@@ -220,12 +225,6 @@ def mock_get_coffee_point_info_from_db(coffee_points: list[dict[str, Any]]) -> A
         mock.return_value = coffee_points[0]
         yield mock
 
-@pytest.fixture()
-def mock_get_user() -> AsyncMockGenerator:
-    """Мокаем функцию UserContext.get_user."""
-    with patch.object(UserContext, "get_user", new_callable=AsyncMock, return_value=None) as mock:
-        yield mock
-
 @pytest.fixture()
 def mock_safe_send_message(mock_message: AsyncMock) -> AsyncMockGenerator:
     """Мокаем функцию MessageManager.safe_send_message.
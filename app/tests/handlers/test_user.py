@@ -21,12 +21,11 @@ async def test_comand_start_points(
         test_user_logic: UserLogic,
         mock_fms_context_with_get_data: AsyncMock,
         mock_message_user_configure_for_cmd_start: AsyncMock,
-        mock_set_user_to_db: AsyncMock,
-        mock_wait_typing: MagicMock | AsyncMock,
+        mock_upsert_user: AsyncMock,
+        mock_typing_indicator: MagicMock,
         test_message_manager: MessageManager,
         mock_get_coffee_points_db: AsyncMock,
         mock_safe_send_message: AsyncMock,
-        mock_get_user: AsyncMock,
         ) -> None:
     """Тест хедлера command_start_points для администратора и нет.
 
@@ -37,12 +36,11 @@ async def test_comand_start_points(
         test_user_logic: Объект UserLogic.
         mock_fms_context_with_get_data: Мок get_data объекта FSMContext
         mock_message_user_configure_for_cmd_start: Мок с параметрами объект User, который принадлежит Message
-        mock_set_user_to_db: Мок UserContext.set_user.
-        mock_wait_typing: Мок wait_typing
+        mock_upsert_user: Мок UserContext.upsert_user.
+        mock_typing_indicator: Мок typing_indicator
         test_message_manager: Объект MessageManager.
         mock_get_coffee_points_db: Мок функции UserContext.get_coffee_points_db.
         mock_safe_send_message: Мок функции MessageManager.safe_send_message.
-        mock_get_user: Мок функции UserContext.get_user.
     """
     expected = test_data["expected"]
 
@@ -54,12 +52,11 @@ async def test_comand_start_points(
             )
 
     # 3. Проверки (Assertions):
-    mock_set_user_to_db.assert_awaited_once()  # проверяем вызов set_user
-    mock_get_user.assert_awaited_once()
+    mock_upsert_user.assert_awaited_once()  # проверяем вызов set_user
     mock_fms_context_with_get_data.get_data.assert_awaited_once()  # проверяем вызов get_data
     mock_fms_context_with_get_data.get_state.assert_awaited_once()
     mock_fms_context_with_get_data.clear.assert_awaited_once()
-    mock_wait_typing.assert_awaited_once()  # проверяем вызов метода wait_typing
+    mock_typing_indicator.assert_called_once()  # проверяем запуск индикатора 'Печатает'
     mock_get_coffee_points_db.assert_awaited_once()
     mock_safe_send_message.assert_awaited_once()
     _, kwargs = mock_safe_send_message.call_args  # Получаем именованные аргументы, переданные в safe_send_message
@@ -82,7 +79,7 @@ async def test_comand_start_points(
 async def test_coffee_point_handler(
         mock_calback_with_params: CallbackPointHint,
         test_user_logic: UserLogic,
-        mock_wait_typing: AsyncMock,
+        mock_typing_indicator: MagicMock,
         mock_message_manager: AsyncMock,
         mock_get_coffee_point_info_from_db: AsyncMock,
         ) -> None:
@@ -91,7 +88,7 @@ async def test_coffee_point_handler(
     Args:
         mock_calback_with_params: параметризированный мок CallbackQuery.
         test_user_logic: Объект UserLogic.
-        mock_wait_typing: Мок wait_typing
+        mock_typing_indicator: Мок typing_indicator
         mock_message_manager: Мок MessageManager.
         mock_get_coffee_point_info_from_db: Мок функцию UserContext.get_coffee_point_info_db.
     """
@@ -101,7 +98,7 @@ async def test_coffee_point_handler(
     await coffee_point_handler(mock_callback_query, test_user_logic, mock_message_manager)
 
     mock_get_coffee_point_info_from_db.assert_awaited_once_with(expected_point_id)
-    mock_wait_typing.assert_awaited_once()
+    mock_typing_indicator.assert_called_once()
     mock_message_manager.safe_callback_answer.assert_awaited_once()
     mock_message_manager.safe_edit_message.assert_awaited_once()
 
@@ -110,7 +107,7 @@ async def test_get_coffee_point_drinks(
         mock_calback_with_params_drinks_point: CallbackPointHint,
         mock_state_with_params: AsyncMock,
         test_user_logic: UserLogic,
-        mock_wait_typing: AsyncMock,
+        mock_typing_indicator: MagicMock,
         mock_message_manager: AsyncMock,
         mock_get_names_db: AsyncMock,
 ) -> None:
@@ -120,7 +117,7 @@ async def test_get_coffee_point_drinks(
         mock_calback_with_params_drinks_point: мок CallbackQuery с конфигурацией.
         mock_state_with_params: мок FSMContext с конфигурацией.
         test_user_logic: Объект UserLogic.
-        mock_wait_typing: Мок wait_typing
+        mock_typing_indicator: Мок typing_indicator
         mock_message_manager: Мок MessageManager.
         mock_get_names_db: Мок функцию UserContext.get_names_db.
     """
@@ -132,14 +129,14 @@ async def test_get_coffee_point_drinks(
     mock_message_manager.safe_edit_message.assert_awaited_once()
     mock_get_names_db.assert_awaited_once()
     mock_state_with_params.update_data.assert_awaited_once_with(point_id=expected_point_id)
-    mock_wait_typing.assert_awaited_once()
+    mock_typing_indicator.assert_called_once()
 
 @pytest.mark.asyncio()
 async def test_drink_item_handler(
         mock_calback_with_params_drink_item: CallbackItemHint,
         mock_state_with_params_coffee_item: AsyncMock,
         test_user_logic: UserLogic,
-        mock_wait_typing: AsyncMock,
+        mock_typing_indicator: MagicMock,
         mock_message_manager: AsyncMock,
         mock_get_drink_detail_db: AsyncMock,
 ) -> None:
@@ -149,7 +146,7 @@ async def test_drink_item_handler(
         mock_calback_with_params_drink_item: мок CallbackQuery с конфигурацией.
         mock_state_with_params_coffee_item: мок FSMContext с конфигурацией.
         test_user_logic: Объект UserLogic.
-        mock_wait_typing: Мок wait_typing
+        mock_typing_indicator: Мок typing_indicator
         mock_message_manager: Мок MessageManager.
         mock_get_drink_detail_db: Мок функцкию UserContext.get_drink_detail_db.
     """
@@ -160,7 +157,7 @@ async def test_drink_item_handler(
 
     mock_state_with_params_coffee_item.get_data.assert_awaited_once()
     mock_get_drink_detail_db.assert_awaited_once_with(item_id=expected_item_id)
-    mock_wait_typing.assert_awaited_once()
+    mock_typing_indicator.assert_called_once()
     mock_message_manager.safe_edit_message.assert_awaited_once()
 
 @pytest.mark.asyncio()
@@ -187,3 +184,21 @@ async def test_back_to_start(
     mock_state_with_params_coffee_item.clear.assert_awaited_once()
     mock_message_manager.safe_edit_message.assert_awaited_once()
     mock_get_coffee_points_db.assert_awaited_once()
+
+@pytest.mark.asyncio()
+async def test_set_user_known_tg_id(
+        test_user_logic: UserLogic,
+        mock_message_user_configure_for_cmd_start: AsyncMock,
+        mock_upsert_user: AsyncMock,
+) -> None:
+    """Повторный /start от уже записанного пользователя не ходит в БД.
+
+    Args:
+        test_user_logic: Объект UserLogic.
+        mock_message_user_configure_for_cmd_start: Мок с параметрами объект User, который принадлежит Message
+        mock_upsert_user: Мок UserContext.upsert_user.
+    """
+    await test_user_logic.set_user(mock_message_user_configure_for_cmd_start)
+    await test_user_logic.set_user(mock_message_user_configure_for_cmd_start)
+
+    mock_upsert_user.assert_awaited_once()
@@ -0,0 +1,128 @@
+import asyncio
+from collections.abc import AsyncIterator
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiogram.enums.parse_mode import ParseMode
+
+from app.logic.ai_gen_logic import FALLBACK_WISHES, WISH_PLACEHOLDER, AIGeneratorLogic
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.quota import SlidingWindowQuota
+
+
+class FakeStream:
+    """Поток чанков в формате OpenAI-совместимого API."""
+
+    def __init__(self, *parts: str) -> None:
+        """Конструктор потока.
+
+        Args:
+            parts: куски текста, которые придут от модели.
+        """
+        self.parts = parts
+        self.close = AsyncMock()
+
+    async def __aiter__(self) -> AsyncIterator[SimpleNamespace]:
+        """Отдаем чанки по одному."""
+        for part in self.parts:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))])
+
+    async def __aenter__(self) -> "FakeStream":
+        """Вход в контекст потока."""
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        """Закрываем поток."""
+        await self.close()
+
+
+@pytest.mark.asyncio()
+async def test_gpt_text_streams_when_pool_is_empty() -> None:
+    """Пустой пул: ответ ИИ показываем потоком в сообщении колбека, финальная правка с markdown и клавиатурой."""
+    ai_client = MagicMock()
+    ai_client.chat.completions.create = AsyncMock(return_value=FakeStream("Доброе ", "**утро**", "!"))
+    logic = AIGeneratorLogic(ai_client)
+    callback = AsyncMock()
+    callback.message.chat.id = 17
+    callback.message.message_id = 42
+    state = AsyncMock()
+    message_manager = AsyncMock()
+    message_manager.safe_edit_text.return_value = True
+
+    with patch.object(logic.wish_pool, "refill"), patch("app.logic.ai_gen_logic.AI_STREAM_EDIT_INTERVAL", 0):
+        await logic.gpt_text(callback, state, message_manager)
+
+    assert ai_client.chat.completions.create.call_args.kwargs["stream"] is True
+    edits = [call.args[2] for call in message_manager.safe_edit_text.await_args_list]
+    assert edits == [WISH_PLACEHOLDER, "Доброе", "Доброе **утро**", "Доброе **утро**!", "Доброе **утро**!"]
+    assert message_manager.safe_edit_text.await_args.kwargs["parse_mode"] == ParseMode.MARKDOWN
+    callback.message.delete.assert_not_awaited()
+    state.update_data.assert_awaited_once_with(msg_for_delete=[42])
+
+@pytest.mark.asyncio()
+async def test_gpt_text_fallback_when_breaker_open() -> None:
+    """Предохранитель разомкнут: в ИИ не ходим, отдаем заготовленное пожелание."""
+    ai_client = MagicMock()
+    ai_client.chat.completions.create = AsyncMock()
+    logic = AIGeneratorLogic(ai_client)
+    logic.ai_guard.breaker = CircuitBreaker(failure_threshold=1)
+    logic.ai_guard.breaker.record_failure()
+    callback = AsyncMock()
+    state = AsyncMock()
+
+    with (patch.object(logic.wish_pool, "refill"),
+          patch("app.logic.ai_gen_logic.get_time_of_day", return_value="утро")):
+        await logic.gpt_text(callback, state, AsyncMock())
+
+    ai_client.chat.completions.create.assert_not_called()
+    assert callback.message.answer.await_args.args[0] == FALLBACK_WISHES["утро"]
+
+@pytest.mark.asyncio()
+async def test_pool_wish_does_not_spend_quota() -> None:
+    """Пожелание из пула не тратит квоту: после него пользователь все еще может получить ответ ИИ."""
+    logic = AIGeneratorLogic(MagicMock())
+    logic.ai_quota = SlidingWindowQuota(limit=1, window=60)
+    callback = AsyncMock()
+    callback.from_user.id = 5
+
+    with patch.object(logic.wish_pool, "take", return_value="Хорошего дня!"):
+        await logic.send_wish(callback, AsyncMock(), AsyncMock())
+        await logic.send_wish(callback, AsyncMock(), AsyncMock())
+
+    assert callback.message.answer.await_args.args[0] == "Хорошего дня!"
+    assert logic.ai_quota.acquire(5)
+
+
+@pytest.mark.asyncio()
+async def test_stream_holds_guard_slot_until_read() -> None:
+    """Слот ИИ занят, пока поток читается, а обрыв потока после первого токена учитывает предохранитель."""
+    reading = asyncio.Event()
+
+    class BrokenStream(FakeStream):
+        """Поток, который обрывается после первого токена."""
+
+        async def __aiter__(self) -> AsyncIterator[SimpleNamespace]:
+            """Первый токен, затем обрыв соединения."""
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="Доброе "))])
+            await reading.wait()
+            raise ConnectionError("stream dropped")
+
+    ai_client = MagicMock()
+    ai_client.chat.completions.create = AsyncMock(return_value=BrokenStream())
+    logic = AIGeneratorLogic(ai_client)
+    callback = AsyncMock()
+
+    with patch.object(logic.wish_pool, "take", return_value=None), patch("app.logic.ai_gen_logic.AI_STREAM", True):
+        task = asyncio.create_task(logic.gpt_text(callback, AsyncMock(), AsyncMock()))
+        while not ai_client.chat.completions.create.await_count:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        in_flight = logic.ai_guard.in_flight
+        reading.set()
+        with pytest.raises(ConnectionError):
+            await task
+
+    assert in_flight == 1
+    assert logic.ai_guard.stats["in_flight"] == 0
+    assert logic.ai_guard.stats["failures"] == 1
@@ -0,0 +1,123 @@
+import asyncio
+from typing import Any
+
+import pytest
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.types import CallbackQuery
+
+from app.middlewares.callback_answer_middleware import (
+    EARLY_ANSWER_FLAG,
+    EarlyCallbackAnswerMiddleware,
+    RepeatedAnswerFilter,
+)
+from app.middlewares.chat_serialization_middleware import ChatSerializationMiddleware
+from app.middlewares.load_shedding_middleware import BUSY_TEXT
+from app.tests.conftest import FakeSession
+
+DELAY = 0.02
+
+
+def callback_update(update_id: int, data: str, message_id: int = 7) -> dict[str, Any]:
+    """Апдейт с нажатием кнопки."""
+    user = {"id": 3, "is_bot": False, "first_name": "Ваня"}
+    message = {"message_id": message_id, "date": 0, "chat": {"id": 3, "type": "private"}, "text": "Меню"}
+    callback = {"id": str(update_id), "from": user, "chat_instance": "1", "data": data, "message": message}
+    return {"update_id": update_id, "callback_query": callback}
+
+
+def make_dispatcher(router: Router,
+                    middleware: EarlyCallbackAnswerMiddleware,
+                    serialization: ChatSerializationMiddleware | None = None) -> Dispatcher:
+    """Диспетчер с ранним ответом, как в activate_middlewares."""
+    dispatcher = Dispatcher()
+    dispatcher.update.outer_middleware(middleware)
+    if serialization is not None:
+        dispatcher.update.outer_middleware(serialization)
+    dispatcher.callback_query.middleware(middleware)
+    dispatcher.include_router(router)
+    return dispatcher
+
+
+@pytest.mark.asyncio()
+async def test_early_answer_only_when_handler_is_slow() -> None:
+    """Быстрый ответ хендлера уходит как есть, медленный заменяется ранним, хендлер с флагом отвечает сам."""
+    session = FakeSession()
+    bot = Bot("42:TEST", session=session)
+    middleware = EarlyCallbackAnswerMiddleware(delay=DELAY)
+    session.middleware(RepeatedAnswerFilter(middleware))
+    router = Router()
+
+    @router.callback_query(F.data == "contacts")
+    async def contacts(callback: CallbackQuery) -> None:
+        await callback.answer("Вы выбрали контакты.")
+
+    @router.callback_query(F.data == "drinks")
+    async def drinks(callback: CallbackQuery) -> None:
+        await asyncio.sleep(DELAY * 3)  # запросы в БД.
+        await callback.answer("Вы выбрали напитки.")
+
+    @router.callback_query(F.data == "feedback", flags={EARLY_ANSWER_FLAG: False})
+    async def feedback(callback: CallbackQuery) -> None:
+        await asyncio.sleep(DELAY * 3)
+        await callback.answer("Вы выбрали 'Оставить отзыв/предложение'.")
+
+    dispatcher = make_dispatcher(router, middleware)
+    for update_id, data in enumerate(("contacts", "drinks", "feedback"), start=1):
+        await dispatcher.feed_raw_update(bot, callback_update(update_id, data))
+
+    assert [(method.callback_query_id, method.text) for method in session.requests] == [
+        ("1", "Вы выбрали контакты."), ("2", None), ("3", "Вы выбрали 'Оставить отзыв/предложение'."),
+    ]
+    assert middleware.stats == {"answered": 1, "preempted": 1, "opted_out": 1, "failed": 0, "dropped": 1}
+
+
+@pytest.mark.asyncio()
+async def test_callback_answered_while_chat_is_busy() -> None:
+    """Нажатие, ждущее очереди чата, получает ответ через задержку, а не когда до него дойдет очередь."""
+    session = FakeSession()
+    bot = Bot("42:TEST", session=session)
+    middleware = EarlyCallbackAnswerMiddleware(delay=DELAY)
+    session.middleware(RepeatedAnswerFilter(middleware))
+    release = asyncio.Event()
+    router = Router()
+
+    @router.callback_query()
+    async def slow(callback: CallbackQuery) -> None:
+        await release.wait()
+
+    dispatcher = make_dispatcher(router, middleware, ChatSerializationMiddleware())
+    tasks = [asyncio.create_task(dispatcher.feed_raw_update(bot, callback_update(i, "drinks", message_id=i)))
+             for i in (1, 2)]
+    await asyncio.sleep(DELAY * 3)
+    answered = [method.callback_query_id for method in session.requests]
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert answered == ["1", "2"]
+
+
+@pytest.mark.asyncio()
+async def test_shed_callback_keeps_busy_text() -> None:
+    """Отброшенное при полной очереди чата нажатие получает "попробуйте еще раз", а не пустой ранний ответ."""
+    session = FakeSession()
+    bot = Bot("42:TEST", session=session)
+    middleware = EarlyCallbackAnswerMiddleware(delay=DELAY)
+    session.middleware(RepeatedAnswerFilter(middleware))
+    release = asyncio.Event()
+    router = Router()
+
+    @router.callback_query()
+    async def slow(callback: CallbackQuery) -> None:
+        await release.wait()
+        await callback.answer("Вы выбрали напитки.")
+
+    dispatcher = make_dispatcher(router, middleware, ChatSerializationMiddleware(backlog=0))
+    first = asyncio.create_task(dispatcher.feed_raw_update(bot, callback_update(1, "drinks", message_id=1)))
+    await asyncio.sleep(0)
+    await dispatcher.feed_raw_update(bot, callback_update(2, "drinks", message_id=2))
+    release.set()
+    await first
+
+    assert [(method.callback_query_id, method.text) for method in session.requests] == [
+        ("2", BUSY_TEXT), ("1", "Вы выбрали напитки."),
+    ]
@@ -0,0 +1,139 @@
+import asyncio
+from typing import Any
+
+import pytest
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import CallbackQuery, Message
+
+from app.middlewares.chat_serialization_middleware import ChatSerializationMiddleware
+from app.middlewares.load_shedding_middleware import BUSY_TEXT
+from app.tests.conftest import FakeSession
+
+CHAT = {"id": 3, "type": "private"}
+USER = {"id": 3, "is_bot": False, "first_name": "Ваня"}
+
+
+class Form(StatesGroup):
+    """Тестовая форма."""
+
+    name = State()
+
+
+def callback_update(update_id: int, data: str, message_id: int = 7, user_id: int = 3) -> dict[str, Any]:
+    """Апдейт с нажатием кнопки."""
+    message = {"message_id": message_id, "date": 0, "chat": CHAT, "text": "Меню"}
+    user = USER | {"id": user_id}
+    callback = {"id": str(update_id), "from": user, "chat_instance": "1", "data": data, "message": message}
+    return {"update_id": update_id, "callback_query": callback}
+
+
+def make_dispatcher(router: Router, middleware: ChatSerializationMiddleware) -> Dispatcher:
+    """Диспетчер с middleware до FSM, как в activate_middlewares."""
+    dispatcher = Dispatcher(disable_fsm=True)
+    dispatcher.update.outer_middleware(middleware)
+    dispatcher.update.outer_middleware(dispatcher.fsm)
+    dispatcher.include_router(router)
+    return dispatcher
+
+
+@pytest.mark.asyncio()
+async def test_duplicate_taps_are_coalesced() -> None:
+    """Повторные нажатия той же кнопки во время обработки получают ответ без запуска хендлера."""
+    session = FakeSession()
+    bot = Bot("42:TEST", session=session)
+    calls: list[str] = []
+    router = Router()
+
+    @router.callback_query()
+    async def drink(callback: CallbackQuery) -> None:
+        calls.append(callback.data)
+        await asyncio.sleep(0.02)
+
+    middleware = ChatSerializationMiddleware()
+    dispatcher = make_dispatcher(router, middleware)
+    updates = [callback_update(1, "drink_item_5"), callback_update(2, "drink_item_5"),
+               callback_update(3, "drink_item_5"), callback_update(4, "contacts")]
+
+    await asyncio.gather(*(dispatcher.feed_raw_update(bot, update) for update in updates))
+
+    assert calls == ["drink_item_5", "contacts"]
+    assert [method.__api_method__ for method in session.requests] == ["answerCallbackQuery"] * 2
+    assert middleware.stats == {
+        "chats": 0, "queued": 0, "max_queued": 1, "coalesced": 2, "coalesced_by_data": {"drink_item_": 2},
+        "shed": 0,
+    }
+
+
+@pytest.mark.asyncio()
+async def test_same_data_on_other_message_or_user_is_handled() -> None:
+    """Та же кнопка на другом сообщении или от другого пользователя - не повтор, хендлер запускается."""
+    calls: list[tuple[int, int]] = []
+    router = Router()
+
+    @router.callback_query()
+    async def start(callback: CallbackQuery) -> None:
+        calls.append((callback.message.message_id, callback.from_user.id))
+        await asyncio.sleep(0.02)
+
+    middleware = ChatSerializationMiddleware()
+    dispatcher = make_dispatcher(router, middleware)
+    updates = [callback_update(1, "start"), callback_update(2, "start", message_id=8),
+               callback_update(3, "start", user_id=4)]
+
+    await asyncio.gather(*(dispatcher.feed_raw_update(Bot("42:TEST", session=FakeSession()), update)
+                           for update in updates))
+
+    assert calls == [(7, 3), (8, 3), (7, 4)]
+    assert middleware.stats["coalesced"] == 0
+
+
+@pytest.mark.asyncio()
+async def test_full_lane_sheds_updates() -> None:
+    """Сверх backlog ждущих апдейтов чата новые отбрасываются, на callback уходит ответ "попробуйте еще раз"."""
+    session = FakeSession()
+    bot = Bot("42:TEST", session=session)
+    calls: list[int] = []
+    router = Router()
+
+    @router.callback_query()
+    async def drink(callback: CallbackQuery) -> None:
+        calls.append(callback.message.message_id)
+        await asyncio.sleep(0.02)
+
+    middleware = ChatSerializationMiddleware(backlog=1)
+    dispatcher = make_dispatcher(router, middleware)
+    updates = [callback_update(i, "drink", message_id=i) for i in range(1, 5)]
+
+    await asyncio.gather(*(dispatcher.feed_raw_update(bot, update) for update in updates))
+
+    assert calls == [1, 2]
+    assert [getattr(method, "text", None) for method in session.requests] == [BUSY_TEXT, BUSY_TEXT]
+    assert middleware.stats["shed"] == 2
+
+
+@pytest.mark.asyncio()
+async def test_next_update_sees_state_of_previous() -> None:
+    """Второе сообщение чата ждет первое и фильтруется по состоянию, которое записало первое."""
+    bot = Bot("42:TEST", session=FakeSession())
+    handled: list[str] = []
+    router = Router()
+
+    @router.message(F.text == "/feedback")
+    async def start_form(message: Message, state: FSMContext) -> None:
+        await asyncio.sleep(0.02)
+        await state.set_state(Form.name)
+        handled.append("start")
+
+    @router.message(Form.name)
+    async def form_name(message: Message) -> None:
+        handled.append(f"name:{message.text}")
+
+    dispatcher = make_dispatcher(router, ChatSerializationMiddleware())
+    updates = [{"update_id": i, "message": {"message_id": i, "date": 0, "chat": CHAT, "from": USER, "text": text}}
+               for i, text in enumerate(("/feedback", "Ваня"), start=1)]
+
+    await asyncio.gather(*(dispatcher.feed_raw_update(bot, update) for update in updates))
+
+    assert handled == ["start", "name:Ваня"]
@@ -0,0 +1,65 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.requests.base import connection
+from app.middlewares.db_session_middleware import DatabaseSessionMiddleware
+
+
+@connection
+async def fake_query(session: AsyncSession, value: int) -> AsyncSession:
+    """Запрос-заглушка, возвращает сессию, в которой выполнился."""
+    return session
+
+
+@pytest.fixture(name="mock_session_cls")
+def f_mock_session_cls() -> MagicMock:
+    """Мокаем класс AsyncSession в декораторе connection."""
+    session = MagicMock(spec=AsyncSession)
+    session.begin = AsyncMock()
+    session.commit = AsyncMock()
+    session.rollback = AsyncMock()
+    session.close = AsyncMock()
+    with patch("app.database.requests.base.AsyncSession", return_value=session) as mock:
+        yield mock
+
+
+@pytest.mark.asyncio()
+async def test_one_session_per_update(mock_session_cls: MagicMock) -> None:
+    """Все запросы апдейта идут через одну сессию, коммит один раз в конце.
+
+    Args:
+        mock_session_cls: мок класса AsyncSession.
+    """
+    async def handler(event: object, data: dict) -> tuple[AsyncSession, AsyncSession]:
+        return await fake_query(1), await fake_query(2)
+
+    first, second = await DatabaseSessionMiddleware()(handler, MagicMock(), {})
+
+    assert first is second
+    mock_session_cls.assert_called_once()
+    first.commit.assert_awaited_once()
+    first.rollback.assert_not_awaited()
+    first.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio()
+async def test_lazy_session_and_rollback(mock_session_cls: MagicMock) -> None:
+    """Без запросов сессия не открывается, при ошибке хендлера транзакция откатывается.
+
+    Args:
+        mock_session_cls: мок класса AsyncSession.
+    """
+    await DatabaseSessionMiddleware()(AsyncMock(), MagicMock(), {})
+    mock_session_cls.assert_not_called()
+
+    async def failing_handler(event: object, data: dict) -> None:
+        await fake_query(1)
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        await DatabaseSessionMiddleware()(failing_handler, MagicMock(), {})
+    session = mock_session_cls.return_value
+    session.rollback.assert_awaited_once()
+    session.commit.assert_not_awaited()
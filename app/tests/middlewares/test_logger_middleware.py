@@ -0,0 +1,121 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.logger import Logger
+from app.middlewares.logger_middleware import LoggingMiddleware
+
+
+@pytest.mark.asyncio()
+async def test_log_context_isolated_between_updates(tmp_path: Path) -> None:
+    """Доп. сообщение и уровень одного апдейта не попадают в лог другого при параллельной обработке.
+
+    Args:
+        tmp_path: временная директория для логов.
+    """
+    logger = Logger(log_dir=str(tmp_path))
+    logger.create_log_context = AsyncMock()
+    records: list[tuple[str, str, str]] = []
+    logger._log = lambda message, level=None: records.append((message, logger.add_message, logger.level))
+    middleware = LoggingMiddleware(logger)
+
+    async def warning_handler(event: Any, data: dict[str, Any]) -> None:
+        data["logger"].add_message += "\nклиент отправил не текст."
+        data["logger"].level = "warning"
+        await asyncio.sleep(0.01)
+
+    async def info_handler(event: Any, data: dict[str, Any]) -> None:
+        await asyncio.sleep(0.02)
+
+    await asyncio.gather(
+        asyncio.create_task(middleware(warning_handler, MagicMock(), {})),
+        asyncio.create_task(middleware(info_handler, MagicMock(), {})),
+    )
+    logger.stop()
+
+    assert sorted(record[1:] for record in records) == [("", "info"), ("\nклиент отправил не текст.", "warning")]
+    assert logger.add_message == ""
+
+@pytest.mark.asyncio()
+async def test_log_context_is_lazy(tmp_path: Path, mock_callback: AsyncMock, mock_state: AsyncMock) -> None:
+    """При отключенном INFO контекст успешного апдейта не собирается, при включенном пишется одной строкой.
+
+    Args:
+        tmp_path: временная директория для логов.
+        mock_callback: Мок CallbackQuery.
+        mock_state: Мок FSMContext.
+    """
+    logger = Logger(log_dir=str(tmp_path))
+    middleware = LoggingMiddleware(logger)
+    mock_callback.data = "drink_item_1"
+    mock_callback.from_user.configure_mock(id=1, first_name="Test", last_name=None, username=None, full_name="Test")
+    mock_callback.message.configure_mock(message_id=12, text="Выберете напиток", reply_markup=None)
+    mock_state.get_data.reset_mock(return_value=True)
+    mock_state.get_data.return_value = {"point_id": 1}
+
+    logger.logger.setLevel("WARNING")
+    await middleware(AsyncMock(), mock_callback, {"state": mock_state})
+    mock_callback.model_dump.assert_not_called()
+    mock_state.get_data.assert_not_awaited()
+
+    logger.logger.setLevel("DEBUG")
+    await middleware(AsyncMock(), mock_callback, {"state": mock_state})
+    logger.stop()
+
+    line = next(line for line in (tmp_path / "bot.log").read_text().splitlines() if "Context:" in line)
+    assert '"data":"drink_item_1"' in line
+    assert '"state_data":{"point_id":1}' in line
+
+@pytest.mark.asyncio()
+async def test_sampled_json_success_logging(tmp_path: Path) -> None:
+    """Успешные апдейты сэмплируются, предупреждения и ошибки пишутся всегда, счетчики считают все апдейты.
+
+    Args:
+        tmp_path: временная директория для логов.
+    """
+    logger = Logger(log_dir=str(tmp_path), log_format="json", success_sample_rate=0)
+    middleware = LoggingMiddleware(logger)
+    handler_object = MagicMock()
+    handler_object.callback.__name__ = "drink_item_handler"
+
+    async def warning_handler(event: Any, data: dict[str, Any]) -> None:
+        data["logger"].level = "warning"
+
+    for _ in range(3):
+        await middleware(AsyncMock(), MagicMock(), {"handler": handler_object})
+    await middleware(warning_handler, MagicMock(), {"handler": handler_object})
+    with pytest.raises(ValueError):
+        await middleware(AsyncMock(side_effect=ValueError), MagicMock(), {"handler": handler_object})
+    logger.stop()
+
+    records = [json.loads(line) for line in (tmp_path / "bot.log").read_text().splitlines()]
+    assert [record["level"] for record in records] == ["WARNING", "INFO"]
+    assert records[-1]["context"] == {"drink_item_handler": {"success": 3, "warning": 1, "error": 1}}
+    error_records = [json.loads(line) for line in (tmp_path / "bot_error.log").read_text().splitlines()]
+    assert error_records[0]["level"] == "ERROR"
+    assert "ValueError" in error_records[0]["exc"]
+
+@pytest.mark.asyncio()
+async def test_error_log_has_state_before_handler(tmp_path: Path, mock_state: AsyncMock) -> None:
+    """В лог ошибки попадает состояние FSM, в котором пришел апдейт, а не выставленное хендлером.
+
+    Args:
+        tmp_path: временная директория для логов.
+        mock_state: Мок FSMContext.
+    """
+    logger = Logger(log_dir=str(tmp_path))
+    middleware = LoggingMiddleware(logger)
+    mock_state.get_data.return_value = {"point_id": 1}
+    mock_state.get_state.return_value = "FeedbackForm:text"
+
+    data = {"state": mock_state, "raw_state": "FeedbackForm:type"}
+
+    with pytest.raises(ValueError):
+        await middleware(AsyncMock(side_effect=ValueError), MagicMock(), data)
+    logger.stop()
+
+    assert '"state":"FeedbackForm:type"' in (tmp_path / "bot_error.log").read_text()
@@ -0,0 +1,42 @@
+from collections.abc import Generator
+from typing import Any
+
+import pytest
+
+from app.services.catalog import CatalogSnapshot, catalog
+
+
+class FakeTimer:
+    """Управляемые часы для проверки TTL."""
+
+    def __init__(self) -> None:
+        """Конструктор часов."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Текущее время."""
+        return self.now
+
+
+@pytest.fixture(name="catalog_data")
+def f_catalog_data() -> dict[str, Any]:
+    """Данные для снимка каталога. Эмитация выгрузки load_catalog."""
+    point = {"id": 1, "name": "Тест ТЦ на зеленом", "address": "Москва, Зелёный проспект, 83А", "metro_station": None}
+    return {
+        "points": [point],
+        "drink_names": {1: [{"id": 2, "name": "Американо"}, {"id": 1, "name": "Капучино"}]},
+        "drinks": {1: {"name": "Капучино", "description": "Кофе с молочной пенкой", "photos": [], "ingredients": []}},
+        "ingredients": {3: {"name": "Молоко", "description": "Коровье", "photos": [{"photo_string": "file_id"}]}},
+    }
+
+@pytest.fixture()
+def loaded_catalog(catalog_data: dict[str, Any]) -> Generator[CatalogSnapshot, None, None]:
+    """Подкладываем снимок в глобальный каталог и сбрасываем после теста.
+
+    Args:
+        catalog_data: данные для снимка каталога.
+    """
+    snapshot = CatalogSnapshot(1, **catalog_data)
+    catalog._snapshot = snapshot
+    yield snapshot
+    catalog.invalidate()
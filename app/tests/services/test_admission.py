@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionController
+
+
+@pytest.mark.asyncio()
+async def test_normal_updates_go_first_and_evict_low_priority() -> None:
+    """Освободившееся место получает навигация, при полной очереди отбрасывается пожелание ИИ."""
+    controller = AdmissionController(limit=1, backlog=2)
+    assert await controller.acquire()
+
+    wish = asyncio.create_task(controller.acquire(low_priority=True))
+    menu = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    late_wish = asyncio.create_task(controller.acquire(low_priority=True))  # очередь полна.
+    late_menu = asyncio.create_task(controller.acquire())  # очередь полна, вытесняет ждущее пожелание.
+    await asyncio.sleep(0)
+
+    assert not await late_wish
+    assert not await wish
+
+    controller.release()
+    assert await menu
+    controller.release()
+    assert await late_menu
+    controller.release()
+
+    assert controller.stats == {
+        "running": 0, "waiting": 0, "max_waiting": 2, "admitted": 3, "shed": 2, "shed_low_priority": 2,
+    }
+
+
+@pytest.mark.asyncio()
+async def test_cancelled_waiter_passes_its_slot_on() -> None:
+    """Отмененный апдейт не занимает место в очереди."""
+    controller = AdmissionController(limit=1, backlog=1)
+    assert await controller.acquire()
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+
+    controller.release()
+
+    assert controller.stats["running"] == 0
+    assert controller.stats["waiting"] == 0
@@ -0,0 +1,88 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services.cache import AsyncTTLCache, cached
+from app.tests.services.conftest import FakeTimer
+
+
+@pytest.mark.asyncio()
+async def test_cache_hit_miss_and_ttl() -> None:
+    """Повторная выборка берется из кеша, просроченная запись перезагружается."""
+    timer = FakeTimer()
+    cache: AsyncTTLCache[int, str] = AsyncTTLCache("test", maxsize=10, ttl=5, timer=timer)
+    loader = AsyncMock(return_value="капучино")
+
+    assert await cache.get_or_load(1, loader) == "капучино"
+    assert await cache.get_or_load(1, loader) == "капучино"
+    timer.now = 6
+    await cache.get_or_load(1, loader)
+
+    assert loader.await_count == 2
+    assert cache.stats == {"size": 1, "hits": 1, "misses": 2, "coalesced": 0, "evictions": 1}
+
+@pytest.mark.asyncio()
+async def test_cache_lru_eviction_and_invalidate() -> None:
+    """При переполнении вытесняется самый давний ключ, инвалидация удаляет запись."""
+    cache: AsyncTTLCache[int, int] = AsyncTTLCache("test", maxsize=2, ttl=60)
+    for key in (1, 2):
+        await cache.get_or_load(key, AsyncMock(return_value=key))
+    await cache.get_or_load(1, AsyncMock())  # 1 становится самым свежим.
+    await cache.get_or_load(3, AsyncMock(return_value=3))
+
+    loader = AsyncMock(return_value=2)
+    await cache.get_or_load(2, loader)
+    loader.assert_awaited_once()
+    assert cache.evictions == 2
+
+    cache.invalidate(2)
+    assert len(cache) == 1
+
+@pytest.mark.asyncio()
+async def test_cache_single_flight() -> None:
+    """Параллельные промахи по одному ключу выполняют один запрос."""
+    cache: AsyncTTLCache[int, str] = AsyncTTLCache("test")
+    calls = 0
+
+    @cached(cache, key=lambda item_id: item_id)
+    async def load(item_id: int) -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return f"drink_{item_id}"
+
+    results = await asyncio.gather(*(load(7) for _ in range(5)))
+
+    assert results == ["drink_7"] * 5
+    assert calls == 1
+    assert cache.coalesced == 4
+
+@pytest.mark.asyncio()
+async def test_cache_does_not_store_errors() -> None:
+    """Ошибка загрузки не кешируется и пробрасывается."""
+    cache: AsyncTTLCache[int, str] = AsyncTTLCache("test")
+    with pytest.raises(ValueError):
+        await cache.get_or_load(1, AsyncMock(side_effect=ValueError))
+    assert len(cache) == 0
+
+@pytest.mark.asyncio()
+async def test_cache_waiters_survive_leader_cancel() -> None:
+    """Отмена вызвавшего загрузку не отменяет ожидающих: они загружают значение сами."""
+    cache: AsyncTTLCache[int, str] = AsyncTTLCache("test")
+    started = asyncio.Event()
+
+    async def slow() -> str:
+        started.set()
+        await asyncio.sleep(10)
+        return "медленно"
+
+    leader = asyncio.create_task(cache.get_or_load(1, slow))
+    await started.wait()
+    waiter = asyncio.create_task(cache.get_or_load(1, AsyncMock(return_value="латте")))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await waiter == "латте"
+    assert leader.cancelled()
+    assert cache.stats["misses"] == 2
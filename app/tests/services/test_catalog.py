@@ -0,0 +1,51 @@
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.database.requests.user import UserContext
+from app.logic.user_logic import UserLogic
+from app.services.catalog import CatalogSnapshot, catalog, refresh_catalog
+
+
+@pytest.mark.asyncio()
+async def test_user_logic_reads_snapshot(loaded_catalog: CatalogSnapshot) -> None:
+    """При загруженном снимке меню отдается без запросов в БД.
+
+    Args:
+        loaded_catalog: снимок каталога.
+    """
+    user_logic = UserLogic()
+    with patch.object(UserContext, "get_coffee_points_db", new_callable=AsyncMock) as points_db, \
+            patch.object(UserContext, "get_names_db", new_callable=AsyncMock) as names_db, \
+            patch.object(UserContext, "get_drink_detail_db", new_callable=AsyncMock) as drink_db, \
+            patch.object(UserContext, "get_igredient_photo", new_callable=AsyncMock) as ingredient_db:
+        assert await user_logic.get_coffee_points() == loaded_catalog.points
+        assert (await user_logic.get_coffee_point_info_from_db(1))["name"] == "Тест ТЦ на зеленом"
+        assert await user_logic.get_coffee_point_info_from_db(100) is None
+        assert [n["id"] for n in await user_logic.get_names_from_db(1)] == [2, 1]
+        assert (await user_logic.get_drink_detail_from_db("drink_item_1"))["name"] == "Капучино"
+        assert (await user_logic.get_ingredient_from_db("ingredient_item_3"))["name"] == "Молоко"
+
+    points_db.assert_not_awaited()
+    names_db.assert_not_awaited()
+    drink_db.assert_not_awaited()
+    ingredient_db.assert_not_awaited()
+
+@pytest.mark.asyncio()
+async def test_refresh_catalog_swaps_snapshot(catalog_data: dict[str, Any]) -> None:
+    """После записи снимок пересобирается с новой версией, а при ошибке выгрузки сбрасывается.
+
+    Args:
+        catalog_data: данные для снимка каталога.
+    """
+    write = AsyncMock(return_value="ok")
+    with patch("app.services.catalog.load_catalog", new_callable=AsyncMock, return_value=catalog_data):
+        assert await refresh_catalog(write)() == "ok"
+        first_version = catalog.version
+        await refresh_catalog(write)()
+    assert catalog.version == first_version + 1
+
+    with patch("app.services.catalog.load_catalog", new_callable=AsyncMock, side_effect=RuntimeError):
+        await refresh_catalog(write)()
+    assert catalog.snapshot is None
@@ -0,0 +1,70 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError, GuardBusyError, GuardedCall
+from app.tests.services.conftest import FakeTimer
+
+
+@pytest.mark.asyncio()
+async def test_breaker_opens_and_recovers() -> None:
+    """После ошибок подряд запросы отклоняются, по истечении паузы пробный запрос замыкает предохранитель."""
+    timer = FakeTimer()
+    guard = GuardedCall("ai", breaker=CircuitBreaker(failure_threshold=2, reset_timeout=10, timer=timer))
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await guard.call(AsyncMock(side_effect=ValueError))
+
+    func = AsyncMock(return_value="ok")
+    with pytest.raises(CircuitOpenError):
+        await guard.call(func)
+    func.assert_not_awaited()
+    assert guard.stats["state"] == "open"
+
+    timer.now = 10
+    assert guard.stats["state"] == "half_open"
+    assert await guard.call(func) == "ok"
+    assert guard.stats["state"] == "closed"
+    assert guard.stats["rejected"] == 1
+    assert sum(guard.stats["latency"].values()) == 3
+
+@pytest.mark.asyncio()
+async def test_guard_timeout_and_concurrency() -> None:
+    """Запрос дольше таймаута прерывается, одновременно выполняется не больше max_concurrency запросов."""
+    guard = GuardedCall("ai", max_concurrency=1, timeout=0.05)
+    with pytest.raises(TimeoutError):
+        await guard.call(lambda: asyncio.sleep(1))
+    assert guard.stats["timeouts"] == 1
+
+    running = 0
+    peak = 0
+
+    async def request() -> None:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    await asyncio.gather(*(guard.call(request) for _ in range(3)))
+    assert peak == 1
+
+@pytest.mark.asyncio()
+async def test_guard_queue_wait_does_not_open_breaker() -> None:
+    """Ожидание слота не входит в таймаут запроса и не считается ошибкой сервиса."""
+    guard = GuardedCall("ai", max_concurrency=1, timeout=0.05, queue_timeout=1,
+                        breaker=CircuitBreaker(failure_threshold=1))
+    # второй запрос ждет слот 0.04 и выполняется 0.04: вместе дольше таймаута, но таймаут считается от слота.
+    await asyncio.gather(*(guard.call(lambda: asyncio.sleep(0.04)) for _ in range(2)))
+
+    guard.queue_timeout = 0.01
+    slow = asyncio.create_task(guard.call(lambda: asyncio.sleep(0.04)))
+    await asyncio.sleep(0)
+    with pytest.raises(GuardBusyError):
+        await guard.call(AsyncMock())
+    await slow
+
+    assert guard.stats["state"] == "closed"
+    assert guard.stats["busy"] == 1
+    assert guard.stats["timeouts"] == 0
@@ -0,0 +1,127 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage
+
+from app.services.fsm_storage import CoalescingStorage, PostgresStorage
+
+KEY = StorageKey(bot_id=1, chat_id=2, user_id=3)
+
+
+@pytest.mark.asyncio()
+async def test_update_data_calls_are_written_once() -> None:
+    """Несколько update_data за апдейт читают хранилище один раз и пишут один раз на выходе."""
+    inner = MemoryStorage()
+    await inner.set_data(KEY, {"point_id": 1})
+    inner.set_data = AsyncMock(wraps=inner.set_data)
+    storage = CoalescingStorage(inner)
+
+    async with storage.coalesce():
+        await storage.update_data(KEY, {"name": "латте"})
+        await storage.update_data(KEY, {"msg_id": 10})
+        await storage.set_state(KEY, State("waiting", "Form"))
+        assert await storage.get_data(KEY) == {"point_id": 1, "name": "латте", "msg_id": 10}
+        inner.set_data.assert_not_called()
+
+    inner.set_data.assert_called_once_with(KEY, {"point_id": 1, "name": "латте", "msg_id": 10})
+    assert await inner.get_state(KEY) == "Form:waiting"
+    assert storage.stats == {"updates": 1, "buffered_writes": 3, "storage_writes": 2}
+
+
+@pytest.mark.asyncio()
+async def test_postgres_storage_gets_single_record_write() -> None:
+    """Состояние и данные для PostgresStorage уходят одним set_record."""
+    inner = PostgresStorage()
+    inner.get_data = AsyncMock(return_value={})
+    inner.set_record = AsyncMock()
+    storage = CoalescingStorage(inner)
+
+    async with storage.coalesce():
+        await storage.set_state(KEY, "Form:name")
+        await storage.update_data(KEY, {"name": "Ваня"})
+        await storage.update_data(KEY, {"text": "вкусно"})
+
+    inner.set_record.assert_awaited_once_with(KEY, state="Form:name", data={"name": "Ваня", "text": "вкусно"})
+
+
+@pytest.mark.asyncio()
+async def test_writes_pass_through_outside_coalesce() -> None:
+    """Вне coalesce записи идут в хранилище сразу."""
+    inner = MemoryStorage()
+    storage = CoalescingStorage(inner)
+
+    await storage.update_data(KEY, {"a": 1})
+
+    assert await inner.get_data(KEY) == {"a": 1}
+
+
+@pytest.mark.asyncio()
+async def test_flush_error_does_not_hide_handler_error(caplog: pytest.LogCaptureFixture) -> None:
+    """Если хендлер упал и запись в хранилище тоже, наружу уходит ошибка хендлера, ошибка записи - в лог."""
+    inner = MemoryStorage()
+    inner.set_data = AsyncMock(side_effect=ConnectionError("storage is down"))
+    storage = CoalescingStorage(inner)
+
+    with pytest.raises(ValueError, match="handler"):
+        async with storage.coalesce():
+            await storage.update_data(KEY, {"a": 1})
+            raise ValueError("handler")
+
+    assert "Failed to flush FSM writes" in caplog.text
+
+
+class FakeRedisServer:
+    """Локальный сервер с протоколом Redis (RESP2): GET, SET, DEL и служебные команды клиента."""
+
+    def __init__(self) -> None:
+        """Конструктор сервера."""
+        self.values: dict[bytes, bytes] = {}
+        self.commands: list[str] = []
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Обрабатываем команды одного соединения."""
+        while line := await reader.readline():
+            args = []
+            for _ in range(int(line[1:])):  # *<кол-во аргументов>, затем $<длина> и значение.
+                size = int((await reader.readline())[1:])
+                args.append((await reader.readexactly(size + 2))[:-2])
+            command = args[0].decode().upper()
+            self.commands.append(command)
+            if command == "GET":
+                value = self.values.get(args[1])
+                writer.write(b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value))
+            elif command == "SET":
+                self.values[args[1]] = args[2]
+                writer.write(b"+OK\r\n")
+            elif command == "DEL":
+                writer.write(b":%d\r\n" % sum(self.values.pop(key, None) is not None for key in args[1:]))
+            else:  # CLIENT SETINFO и т.п.
+                writer.write(b"+OK\r\n")
+            await writer.drain()
+        writer.close()
+
+
+@pytest.mark.asyncio()
+async def test_redis_storage_over_redis_protocol() -> None:
+    """CoalescingStorage поверх RedisStorage пишет изменения апдейта в сервер Redis по одной команде на колонку."""
+    fake = FakeRedisServer()
+    server = await asyncio.start_server(fake.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    storage = CoalescingStorage(RedisStorage.from_url(f"redis://127.0.0.1:{port}/0"))
+    try:
+        async with storage.coalesce():
+            await storage.set_state(KEY, State("name", "Form"))
+            await storage.update_data(KEY, {"name": "Ваня"})
+            await storage.update_data(KEY, {"text": "вкусно"})
+
+        assert [command for command in fake.commands if command in ("GET", "SET")] == ["GET", "SET", "SET"]
+        assert await storage.get_state(KEY) == "Form:name"
+        assert await storage.get_data(KEY) == {"name": "Ваня", "text": "вкусно"}
+    finally:
+        await storage.close()
+        server.close()
+        await server.wait_closed()
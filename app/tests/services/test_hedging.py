@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from app.services.circuit_breaker import GuardedCall
+from app.services.hedging import HedgedRequest
+
+
+@pytest.mark.asyncio()
+async def test_hedged_request_backup_wins_and_primary_cancelled() -> None:
+    """Первая модель не ответила за задержку подстраховки: отвечает вторая, запрос к первой отменяется."""
+    hedger = HedgedRequest(["slow", "fast"], initial_delay=0.01)
+    cancelled: list[str] = []
+
+    async def call(model: str) -> str:
+        try:
+            await asyncio.sleep(1 if model == "slow" else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(model)
+            raise
+        return model
+
+    assert await hedger.run(call) == "fast"
+    assert cancelled == ["slow"]
+    assert hedger.stats["fast"]["win_rate"] == 1.0
+    assert hedger.stats["slow"]["wins"] == 0
+    assert hedger.stats["slow"]["requests"] == 1
+    assert hedger.stats["slow"]["p90_ms"] >= 10  # отмененный запрос тоже учитывается в задержках.
+
+@pytest.mark.asyncio()
+async def test_hedged_request_failover_and_all_failed() -> None:
+    """Ошибка модели сразу подключает следующую, если упали все - пробрасываем ошибку."""
+    hedger = HedgedRequest(["broken", "ok"], initial_delay=10)
+
+    async def call(model: str) -> str:
+        if model == "broken":
+            raise RuntimeError(model)
+        return model
+
+    assert await asyncio.wait_for(hedger.run(call), timeout=1) == "ok"
+    assert hedger.stats["broken"]["failures"] == 1
+
+    async def fail(model: str) -> str:
+        raise RuntimeError(model)
+
+    with pytest.raises(RuntimeError, match="ok"):
+        await hedger.run(fail)
+
+@pytest.mark.asyncio()
+async def test_hedged_request_guard_per_attempt_and_cleanup() -> None:
+    """Слот защищенного вызова берет каждый запрос к модели, лишний одновременный ответ освобождается."""
+    guard = GuardedCall("ai", max_concurrency=2)
+    hedger = HedgedRequest(["a", "b", "c"], initial_delay=0.01, guard=guard)
+    answer = asyncio.Event()
+    peak = 0
+    cleaned: list[str] = []
+
+    async def call(model: str) -> str:
+        nonlocal peak
+        peak = max(peak, guard.in_flight)
+        await (asyncio.sleep(10) if model == "c" else answer.wait())  # a и b отвечают одновременно.
+        return model
+
+    async def cleanup(result: str) -> None:
+        cleaned.append(result)
+
+    task = asyncio.create_task(hedger.run(call, cleanup=cleanup))
+    while not hedger.stats["c"]["requests"]:  # третья модель ждет свободный слот.
+        await asyncio.sleep(0.01)
+    answer.set()
+    winner = await task
+
+    assert sorted([winner, *cleaned]) == ["a", "b"]
+    assert peak == 2
@@ -0,0 +1,50 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.configs import ADMIN_IDS
+from app.logic.user_logic import UserLogic
+from app.services.catalog import CatalogSnapshot, catalog
+from app.services.keyboard_cache import KeyboardCache, keyboard_cache
+
+
+def test_keyboard_cache_reset_on_catalog_version(loaded_catalog: CatalogSnapshot) -> None:
+    """Клавиатура собирается один раз на версию каталога.
+
+    Args:
+        loaded_catalog: снимок каталога.
+    """
+    cache = KeyboardCache()
+    build = MagicMock()
+
+    first = cache.get_or_build("point", build, point_id=1)
+    assert cache.get_or_build("point", build, point_id=1) is first
+    cache.get_or_build("point", build, point_id=2)
+    assert build.call_count == 2
+
+    catalog._snapshot = CatalogSnapshot(loaded_catalog.version + 1, [], {}, {}, {})
+    cache.get_or_build("point", build, point_id=1)
+    assert build.call_count == 3
+    assert (cache.hits, cache.misses) == (1, 3)
+
+@pytest.mark.skipif(not ADMIN_IDS, reason="нужен хотя бы один id в ADMIN_IDS")
+@pytest.mark.asyncio()
+async def test_main_keyboard_cached_per_admin_flag(loaded_catalog: CatalogSnapshot, mock_message: AsyncMock) -> None:
+    """Главная клавиатура из снимка кешируется отдельно для админа и клиента.
+
+    Args:
+        loaded_catalog: снимок каталога.
+        mock_message: Мок Message.
+    """
+    keyboard_cache.clear()
+    user_logic = UserLogic()
+    mock_message.from_user.id = max(ADMIN_IDS) + 1  # не админ.
+    points = await user_logic.get_coffee_points()
+
+    user_kb = await user_logic.get_main_keyboard(mock_message, points)
+    assert await user_logic.get_main_keyboard(mock_message, points) is user_kb
+
+    mock_message.from_user.id = ADMIN_IDS[0]
+    admin_kb = await user_logic.get_main_keyboard(mock_message, points)
+    assert admin_kb is not user_kb
+    assert admin_kb.inline_keyboard[-1][0].text == "Admin"
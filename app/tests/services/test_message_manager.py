@@ -0,0 +1,54 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.methods import DeleteMessage, DeleteMessages
+
+from app.services.message_manager import delete_message_ids
+from app.services.outbound import OutboundScheduler
+
+
+@pytest.mark.asyncio()
+async def test_delete_message_ids_in_chunks() -> None:
+    """Сообщения удаляются пачками по 100 id, дубли отбрасываются."""
+    bot = AsyncMock()
+    message_ids = [*range(250), 1]
+
+    deleted = await delete_message_ids(bot, 1, message_ids, OutboundScheduler())
+
+    assert [len(call.args[1]) for call in bot.delete_messages.await_args_list] == [100, 100, 50]
+    assert deleted == list(range(250))
+    bot.delete_message.assert_not_awaited()
+
+@pytest.mark.asyncio()
+async def test_delete_message_ids_fallback() -> None:
+    """Если пачка не удалилась, сообщения удаляются по одному, ненайденные считаются удаленными."""
+    bot = AsyncMock()
+    bot.delete_messages.side_effect = TelegramBadRequest(DeleteMessages(chat_id=1, message_ids=[1]),
+                                                         "message can't be deleted")
+
+    async def delete_message(chat_id: int, message_id: int) -> bool:
+        if message_id == 2:
+            raise TelegramBadRequest(DeleteMessage(chat_id=chat_id, message_id=message_id), "message can't be deleted")
+        if message_id == 3:
+            raise TelegramBadRequest(DeleteMessage(chat_id=chat_id, message_id=message_id),
+                                     "message to delete not found")
+        return True
+
+    bot.delete_message.side_effect = delete_message
+
+    assert await delete_message_ids(bot, 1, [1, 2, 3], OutboundScheduler()) == [1, 3]
+    assert bot.delete_message.await_count == 3
+
+@pytest.mark.asyncio()
+async def test_delete_message_ids_flood_wait() -> None:
+    """При flood wait пачка повторяется после ожидания, одиночные удаления не запускаются."""
+    bot = AsyncMock()
+    flood_wait = TelegramRetryAfter(DeleteMessages(chat_id=1, message_ids=[1]), "Flood control exceeded", 0)
+    bot.delete_messages.side_effect = [flood_wait, True, flood_wait, flood_wait]
+    scheduler = OutboundScheduler(chat_rate=100, max_retries=1)
+
+    assert await delete_message_ids(bot, 1, [1, 2], scheduler) == [1, 2]
+    assert await delete_message_ids(bot, 1, [3], scheduler) == []
+    bot.delete_message.assert_not_awaited()
+    assert scheduler.flood_waits == 3
@@ -0,0 +1,41 @@
+from app.services.message_registry import MessageRegistry
+from app.tests.services.conftest import FakeTimer
+
+
+def test_registry_lru_chats_and_message_limit() -> None:
+    """При переполнении вытесняется самый давний чат и самые старые сообщения чата, дубли не добавляются."""
+    registry = MessageRegistry(max_chats=2, max_messages_per_chat=3)
+    registry.add(1, 10)
+    registry.add(2, 20)
+    registry.add(1, 11)  # чат 1 становится самым свежим.
+    registry.add(3, 30)
+
+    assert 2 not in registry
+    assert registry.evicted_chats == 1
+
+    for message_id in (11, 12, 13, 14):
+        registry.add(1, message_id)
+    assert registry.get(1) == [12, 13, 14]
+
+    registry.discard(1, 13)
+    assert registry.pop(1) == [12, 14]
+    assert len(registry) == 1
+
+def test_registry_ttl_and_memory_usage() -> None:
+    """Сообщения старше окна удаления выбрасываются, в том числе в чатах, куда больше не пишут."""
+    timer = FakeTimer()
+    registry = MessageRegistry(ttl=100, purge_interval=50, timer=timer)
+    registry.add(1, 10)
+    registry.add(2, 20)
+    timer.now = 60
+    registry.add(1, 11)
+    empty_usage = MessageRegistry().memory_usage()
+    assert registry.memory_usage() > empty_usage
+
+    timer.now = 130
+    assert registry.get(1) == [11]
+
+    registry.add(3, 30)  # прошел purge_interval, чистим весь реестр.
+    assert 2 not in registry
+    assert registry.stats["messages"] == 2
+    assert registry.stats["expired_messages"] == 2
@@ -0,0 +1,54 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from app.services.outbound import OutboundScheduler, TokenBucket
+from app.tests.services.conftest import FakeTimer
+
+
+def test_token_bucket_reserve_and_pause() -> None:
+    """Всплеск в пределах ведра без задержки, дальше задержка растет, пауза откладывает следующий токен."""
+    timer = FakeTimer()
+    bucket = TokenBucket(rate=1, capacity=2, timer=timer)
+
+    assert [bucket.reserve() for _ in range(4)] == [0, 0, 1, 2]
+    timer.now = 10
+    assert bucket.is_full
+    bucket.pause(5)
+    assert bucket.reserve() == 5
+
+@pytest.mark.asyncio()
+async def test_scheduler_keeps_chat_order() -> None:
+    """Запросы одного чата выполняются в порядке поступления, даже если ждут лимит."""
+    scheduler = OutboundScheduler(global_rate=1000, chat_rate=200, chat_burst=1)
+    sent: list[int] = []
+
+    async def send(number: int) -> int:
+        sent.append(number)
+        return number
+
+    results = await asyncio.gather(*(scheduler.submit(1, lambda n=n: send(n)) for n in range(5)))
+
+    assert results == sent == [0, 1, 2, 3, 4]
+    assert scheduler.stats["sent"] == 5
+    assert scheduler.stats["queued"] == 0
+    assert scheduler.stats["max_queued"] > 1
+    assert scheduler.stats["wait_max_ms"] > 0
+
+@pytest.mark.asyncio()
+async def test_scheduler_retries_after_flood_wait() -> None:
+    """После TelegramRetryAfter запрос повторяется, а не теряется."""
+    scheduler = OutboundScheduler(max_retries=1)
+    flood_wait = TelegramRetryAfter(SendMessage(chat_id=1, text="привет"), "Flood control exceeded", retry_after=0)
+    call = AsyncMock(side_effect=[flood_wait, "ok"])
+
+    assert await scheduler.submit(1, call) == "ok"
+    assert scheduler.flood_waits == 1
+
+    call = AsyncMock(side_effect=flood_wait)
+    with pytest.raises(TelegramRetryAfter):
+        await scheduler.submit(1, call)
+    assert call.await_count == 2
@@ -0,0 +1,22 @@
+from app.services.quota import SlidingWindowQuota
+from app.tests.services.conftest import FakeTimer
+
+
+def test_quota_sliding_window_and_idle_eviction() -> None:
+    """Не больше limit действий за окно, старые действия выходят из окна, неактивные пользователи удаляются."""
+    timer = FakeTimer()
+    quota = SlidingWindowQuota(limit=2, window=10, timer=timer)
+
+    assert quota.acquire(1)
+    timer.now = 5
+    assert quota.acquire(1)
+    assert not quota.acquire(1)
+    assert quota.acquire(2)
+
+    timer.now = 11  # первое действие пользователя 1 вышло из окна.
+    assert quota.acquire(1)
+    assert not quota.acquire(1)
+
+    timer.now = 30
+    assert quota.acquire(3)
+    assert quota.stats == {"users": 1, "allowed": 5, "rejected": 2, "evicted": 2}
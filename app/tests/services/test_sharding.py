@@ -0,0 +1,151 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message
+
+from app.middlewares.chat_serialization_middleware import ChatSerializationMiddleware
+from app.services import sharding
+from app.services.catalog import catalog, refresh_catalog
+from app.services.sharding import ShardRouter, shard_for, update_chat_id
+
+
+def make_update(update_id: int, chat_id: int, text: str) -> dict[str, Any]:
+    """Апдейт с текстовым сообщением."""
+    chat = {"id": chat_id, "type": "private"}
+    return {"update_id": update_id, "message": {"message_id": update_id, "date": 0, "chat": chat, "text": text}}
+
+
+def record_worker() -> tuple[Bot, Dispatcher]:
+    """Фабрика воркера для ShardRouter: пишет текст сообщений в файл SHARD_TEST_OUTPUT."""
+    router = Router()
+
+    @router.message()
+    async def record(message: Message) -> None:
+        with open(os.environ["SHARD_TEST_OUTPUT"], "a", encoding="utf-8") as output:
+            output.write(f"{message.text}\n")
+
+    dispatcher = Dispatcher()
+    dispatcher.update.outer_middleware(ChatSerializationMiddleware())
+    dispatcher.include_router(router)
+    return Bot("42:TEST"), dispatcher
+
+
+def test_update_chat_id() -> None:
+    """Чат берется из сообщения, из сообщения callback, для событий без чата - id пользователя."""
+    user = {"id": 5, "is_bot": False, "first_name": "Ваня"}
+    callback = {"id": "1", "from": user, "chat_instance": "1", "message": {"message_id": 1, "chat": {"id": -100}}}
+
+    assert update_chat_id(make_update(1, 3, "/start")) == 3
+    assert update_chat_id({"update_id": 2, "callback_query": callback}) == -100
+    assert update_chat_id({"update_id": 3, "inline_query": {"id": "1", "from": user, "query": ""}}) == 5
+    assert shard_for(-100, 3) == shard_for(-100, 3) < 3
+
+
+@pytest.mark.asyncio()
+async def test_worker_keeps_chat_order_and_drains() -> None:
+    """Апдейты одного чата обрабатываются по очереди, сигнал остановки дожидается принятых апдейтов."""
+    handled: list[str] = []
+    router = Router()
+
+    @router.message()
+    async def echo(message: Message) -> None:
+        if message.text == "медленно":
+            await asyncio.sleep(0.05)
+        handled.append(f"{message.chat.id}:{message.text}")
+
+    dispatcher = Dispatcher()
+    dispatcher.update.outer_middleware(ChatSerializationMiddleware())
+    dispatcher.include_router(router)
+    updates: queue.Queue[sharding.ShardItem] = queue.Queue()
+    for update in (make_update(1, 1, "медленно"), make_update(2, 1, "быстро"), make_update(3, 2, "другой чат")):
+        updates.put((update_chat_id(update), update))
+    updates.put(None)
+
+    await sharding._serve_worker(0, updates, lambda: (Bot("42:TEST"), dispatcher), multiprocessing.Value("q", 0))
+
+    assert handled == ["2:другой чат", "1:медленно", "1:быстро"]
+
+@pytest.mark.asyncio()
+async def test_worker_reloads_catalog_changed_by_other_worker(catalog_data: dict[str, Any]) -> None:
+    """Запись админа в другом воркере пересобирает снимок перед следующим апдейтом, своя - только один раз.
+
+    Args:
+        catalog_data: данные для снимка каталога.
+    """
+    handled: list[str] = []
+    router = Router()
+
+    @router.message()
+    async def handle(message: Message) -> None:
+        if message.text == "админ":
+            await refresh_catalog(AsyncMock())()
+        handled.append(message.text)
+
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+    catalog_version = multiprocessing.Value("q", 0)
+    updates: queue.Queue[sharding.ShardItem] = queue.Queue()
+
+    async def feed(update_id: int, text: str) -> None:
+        updates.put((1, make_update(update_id, 1, text)))
+        while len(handled) < update_id:
+            await asyncio.sleep(0.01)
+
+    with patch("app.services.catalog.load_catalog", new_callable=AsyncMock, return_value=catalog_data) as load:
+        worker = asyncio.create_task(
+            sharding._serve_worker(0, updates, lambda: (Bot("42:TEST"), dispatcher), catalog_version),
+            )
+        await feed(1, "до записи")
+        catalog_version.value += 1  # запись админа в другом воркере.
+        await feed(2, "после чужой записи")
+        await feed(3, "админ")
+        await feed(4, "после своей записи")
+        updates.put(None)
+        await worker
+
+    assert load.await_count == 2
+    assert catalog_version.value == 2
+    assert catalog.broadcast is None
+    catalog.invalidate()
+
+@pytest.mark.asyncio()
+async def test_restart_keeps_updates_and_order(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Перезапуск воркера посреди потока и подъем упавшего воркера не теряют и не переставляют апдейты.
+
+    Args:
+        tmp_path: временная директория для вывода воркеров.
+        monkeypatch: фикстура для переменных окружения.
+    """
+    output = tmp_path / "handled.txt"
+    monkeypatch.setenv("SHARD_TEST_OUTPUT", str(output))
+    router = ShardRouter(1, record_worker)
+    router.start()
+    try:
+        for update_id in range(1, 6):
+            router.dispatch(make_update(update_id, 1, str(update_id)))
+        restart = asyncio.create_task(router.restart(0))
+        await asyncio.sleep(0)  # перезапуск начался, новые апдейты копятся во фронте.
+        for update_id in range(6, 11):
+            router.dispatch(make_update(update_id, 1, str(update_id)))
+        assert router.stats["backlog"] == 5
+        await restart
+        while len(output.read_text().split()) < 10:  # новый воркер дорабатывает накопленное.
+            await asyncio.sleep(0.05)
+
+        router._processes[0].kill()  # воркер упал без апдейтов в работе.
+        watch = asyncio.create_task(router.watch(interval=0.05))
+        while router.stats["restarts"] < 2:
+            await asyncio.sleep(0.05)
+        watch.cancel()
+        router.dispatch(make_update(11, 1, "11"))
+    finally:
+        await router.stop()
+
+    assert output.read_text().split() == [str(update_id) for update_id in range(1, 12)]
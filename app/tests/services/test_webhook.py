@@ -0,0 +1,98 @@
+import asyncio
+from typing import Any
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import CallbackQuery, Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from app.services.webhook import build_webhook_app
+from app.tests.conftest import FakeSession
+
+CALLBACK_UPDATE = {
+    "update_id": 1,
+    "callback_query": {
+        "id": "42",
+        "from": {"id": 3, "is_bot": False, "first_name": "Ваня"},
+        "chat_instance": "1",
+        "data": "contacts",
+        "message": {"message_id": 7, "date": 0, "chat": {"id": 3, "type": "private"}, "text": "Меню"},
+    },
+}
+
+
+async def post_update(dispatcher: Dispatcher, bot: Bot, update: dict[str, Any]) -> str:
+    """Фейковый телеграм: отправляем апдейт на webhook и возвращаем тело ответа."""
+    app = build_webhook_app(dispatcher, bot, "/webhook", reply_timeout=0.5)
+    async with TestClient(TestServer(app)) as client:
+        response = await client.post("/webhook", json=update)
+        assert response.ok
+        body = await response.text()
+        await asyncio.sleep(0.05)  # даем хендлеру закончить после ответа.
+        return body
+
+
+@pytest.mark.asyncio()
+async def test_callback_answer_is_returned_in_webhook_response() -> None:
+    """Ответ на callback уходит в теле ответа на webhook, остальные вызовы - обычными запросами."""
+    session = FakeSession()
+    bot = Bot("42:TEST", session=session)
+    router = Router()
+
+    @router.callback_query()
+    async def contacts(callback: CallbackQuery) -> None:
+        assert await callback.answer("Вы выбрали контакты.") is True
+        await callback.message.edit_text("Контакты")
+
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+
+    body = await post_update(dispatcher, bot, CALLBACK_UPDATE)
+
+    assert "answerCallbackQuery" in body
+    assert "Вы выбрали контакты." in body
+    assert [method.__api_method__ for method in session.requests] == ["editMessageText"]
+
+
+@pytest.mark.asyncio()
+async def test_send_message_is_not_deferred() -> None:
+    """Вызов sendMessage возвращает Message, который нужен хендлеру, поэтому идет обычным запросом."""
+    session = FakeSession()
+    bot = Bot("42:TEST", session=session)
+    router = Router()
+
+    @router.message()
+    async def help_command(message: Message) -> None:
+        await message.answer("Помощь")
+
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+    chat = {"id": 3, "type": "private"}
+    update = {"update_id": 2, "message": {"message_id": 1, "date": 0, "chat": chat, "text": "/help"}}
+
+    body = await post_update(dispatcher, bot, update)
+
+    assert "sendMessage" not in body
+    assert [method.__api_method__ for method in session.requests] == ["sendMessage"]
+
+@pytest.mark.asyncio()
+async def test_message_update_is_answered_without_waiting() -> None:
+    """На апдейт без callback отвечаем сразу, не дожидаясь хендлера и reply_timeout."""
+    release = asyncio.Event()
+    router = Router()
+
+    @router.message()
+    async def slow_handler(message: Message) -> None:
+        await release.wait()
+
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+    app = build_webhook_app(dispatcher, Bot("42:TEST", session=FakeSession()), "/webhook", reply_timeout=5)
+    chat = {"id": 3, "type": "private"}
+    update = {"update_id": 3, "message": {"message_id": 1, "date": 0, "chat": chat, "text": "Привет"}}
+    async with TestClient(TestServer(app)) as client:
+        try:
+            response = await asyncio.wait_for(client.post("/webhook", json=update), timeout=1)
+        finally:
+            release.set()  # иначе закрытие приложения ждет хендлер вечно.
+        assert response.ok
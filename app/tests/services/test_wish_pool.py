@@ -0,0 +1,36 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services.wish_pool import WishPool
+
+
+@pytest.mark.asyncio()
+async def test_wish_pool_refills_below_watermark() -> None:
+    """Пустой пул отдает None и пополняется фоном, дальше пожелания выдаются из пула."""
+    generate = AsyncMock(side_effect=[f"пожелание {i}" for i in range(10)])
+    pool = WishPool(generate, size=3, watermark=2)
+
+    assert pool.take("утро") is None
+    await asyncio.sleep(0)
+    assert pool.stats["ready"] == {"утро": 3}
+
+    assert pool.take("утро") == "пожелание 0"
+    assert pool.take("утро") == "пожелание 1"  # осталось меньше watermark, запускаем пополнение.
+    await asyncio.sleep(0)
+    assert pool.stats["ready"] == {"утро": 3}
+    assert pool.take("вечер") is None  # у каждого времени суток свой пул.
+
+    await pool.stop()
+    assert generate.await_count == 5
+
+@pytest.mark.asyncio()
+async def test_wish_pool_stops_on_error() -> None:
+    """Ошибка ИИ останавливает пополнение до следующей выдачи."""
+    pool = WishPool(AsyncMock(side_effect=RuntimeError), size=3)
+
+    assert pool.take("день") is None
+    await asyncio.sleep(0)
+    assert pool.stats["failed"] == 1
+    assert pool.stats["ready"] == {"день": 0}
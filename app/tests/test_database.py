@@ -0,0 +1,27 @@
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.util import greenlet_spawn
+
+from app.database.base import InstrumentedQueuePool
+
+
+@pytest.mark.asyncio()
+async def test_pool_accounts_checkout_wait() -> None:
+    """Пул считает выдачи соединений, время ожидания свободного соединения и пик занятых."""
+    pool = InstrumentedQueuePool(MagicMock, pool_size=1, max_overflow=0, timeout=0.05)
+
+    def checkout() -> None:
+        first = pool.connect()
+        with pytest.raises(exc.TimeoutError):
+            pool.connect()  # пул занят, ждем pool_timeout.
+        first.close()
+        pool.connect().close()
+
+    await greenlet_spawn(checkout)
+
+    assert pool.checkouts == 3
+    assert pool.wait_max >= 0.05
+    assert pool.wait_total >= pool.wait_max
+    assert pool.peak_checked_out == 1
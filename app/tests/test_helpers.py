@@ -0,0 +1,23 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.helpers import typing_indicator
+
+
+@pytest.mark.asyncio()
+async def test_typing_indicator_only_for_slow_work() -> None:
+    """Быстрая работа обходится без 'Печатает', долгая показывает его фоном."""
+    callback = MagicMock()
+    callback.bot = AsyncMock()
+    callback.from_user.id = 17
+
+    async with typing_indicator(callback, threshold=0.05):
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.1)
+    callback.bot.send_chat_action.assert_not_awaited()
+
+    async with typing_indicator(callback, threshold=0.01):
+        await asyncio.sleep(0.05)
+    callback.bot.send_chat_action.assert_awaited_once()
@@ -0,0 +1,25 @@
+from pathlib import Path
+
+from app.logger import Logger
+
+
+def test_logger_writes_through_queue(tmp_path: Path) -> None:
+    """Записи уходят в файлы через фоновый поток и дописываются при остановке.
+
+    Args:
+        tmp_path: временная директория для логов.
+    """
+    logger = Logger(log_dir=str(tmp_path))
+    logger.log("успешное событие", level="info")
+    logger.log_error("ошибка события")
+    logger.stop()
+
+    assert "успешное событие" in (tmp_path / "bot.log").read_text()
+    error_log = (tmp_path / "bot_error.log").read_text()
+    assert "ошибка события" in error_log
+    assert "успешное событие" not in error_log
+
+    stats = logger.blocking_stats()
+    assert stats["calls"] == 2
+    assert stats["queue_size"] == 0
+    assert stats["max_ms"] >= stats["avg_ms"] > 0
@@ -1,32 +1,131 @@
 import asyncio
 import logging
 import os
+import signal
 
 from aiogram import Bot, Dispatcher
+from aiohttp import web
 from dotenv import load_dotenv
 
 from app import handlers as routers
-from app.middlewares.base import activate_middlewares
+from app.configs import (
+    SHARD_WORKERS,
+    WEBHOOK_HOST,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+    WEBHOOK_REPLY_TIMEOUT,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+)
+from app.database.base import get_pool_stats
+from app.helpers import get_time_of_day
+from app.middlewares.base import (
+    activate_middlewares,
+    ai_generator_logic,
+    chat_serialization_middleware,
+    early_callback_answer_middleware,
+    logger,
+)
+from app.middlewares.callback_answer_middleware import RepeatedAnswerFilter
+from app.services.catalog import catalog
+from app.services.fsm_storage import create_fsm_storage
+from app.services.sharding import ShardRouter, build_front_app, is_primary_process, poll_updates
+from app.services.webhook import build_webhook_app
 
 load_dotenv()
 
 
-async def main() -> None:
+def create_worker() -> tuple[Bot, Dispatcher]:
+    """Бот и диспетчер с роутерами. Используется и в одном процессе, и в воркерах."""
     bot = Bot(token=os.getenv("TG_TOKEN", "default"))
-    dp = Dispatcher()
+    # на callback отвечает EarlyCallbackAnswerMiddleware, повторные ответы хендлеров не отправляем.
+    bot.session.middleware(RepeatedAnswerFilter(early_callback_answer_middleware))
+    dp = Dispatcher(storage=create_fsm_storage(), disable_fsm=True)  # FSM подключается в activate_middlewares.
 
     dp.startup.register(startup)
+    dp.shutdown.register(shutdown)
     dp.include_routers(routers.admin_router, routers.feedback_router, routers.user_router, routers.ai_router)
+    return bot, dp
 
-    await dp.start_polling(bot)
-    dp.shutdown.register(shutdown)
+async def main() -> None:
+    if SHARD_WORKERS > 1:
+        await run_front()
+        return
+
+    bot, dp = create_worker()
+    if WEBHOOK_URL:
+        app = build_webhook_app(dp, bot, WEBHOOK_PATH, secret_token=WEBHOOK_SECRET, reply_timeout=WEBHOOK_REPLY_TIMEOUT)
+        await serve_webhook(app, bot, dp.resolve_used_update_types())
+    else:
+        await bot.delete_webhook()  # пока webhook установлен, getUpdates не работает.
+        await dp.start_polling(bot)
+
+async def run_front() -> None:
+    """Фронт: принимаем апдейты и раздаем их SHARD_WORKERS процессам по chat_id.
+
+    SIGHUP перезапускает воркеры. SIGINT и SIGTERM останавливают фронт, воркеры дорабатывают принятые апдейты.
+    """
+    bot, dp = create_worker()  # диспетчер фронта апдейты не обрабатывает, нужен только список их типов.
+    shard_router = ShardRouter(SHARD_WORKERS, create_worker)
+    shard_router.start()
+    background = {asyncio.create_task(shard_router.watch())}
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGHUP, lambda: background.add(asyncio.create_task(shard_router.restart_all())))
+    try:
+        if WEBHOOK_URL:
+            app = build_front_app(shard_router, WEBHOOK_PATH, secret_token=WEBHOOK_SECRET)
+            await serve_webhook(app, bot, dp.resolve_used_update_types())
+        else:
+            await bot.delete_webhook()
+            background.add(asyncio.create_task(poll_updates(bot, shard_router, dp.resolve_used_update_types())))
+            await wait_stop_signal()
+    finally:
+        for task in background:
+            task.cancel()
+        await shard_router.stop()  # воркеры дорабатывают принятые апдейты.
+        await bot.session.close()
+
+async def serve_webhook(app: web.Application, bot: Bot, allowed_updates: list[str]) -> None:
+    """Запускаем aiohttp сервер webhook и регистрируем адрес в телеграм."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+        await bot.set_webhook(WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+                              secret_token=WEBHOOK_SECRET,
+                              allowed_updates=allowed_updates)
+        await wait_stop_signal()
+    finally:
+        await runner.cleanup()
+
+async def wait_stop_signal() -> None:
+    """Ждем SIGINT или SIGTERM: systemd и docker останавливают процесс SIGTERM, дорабатываем так же, как на Ctrl+C."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
 
 async def startup(dispatcher: Dispatcher) -> None:
     logging.info("start up ...")
     activate_middlewares(dispatcher, routers)
+    try:
+        await catalog.reload()  # меню отдаем из памяти, без похода в БД.
+    except Exception:
+        logging.exception("Catalog snapshot is not loaded, menu will be read from DB")
+    if is_primary_process():  # остальные воркеры наполнят пулы по мере спроса.
+        ai_generator_logic.wish_pool.refill(get_time_of_day())  # готовим пожелания фоном, старт не ждет ИИ.
 
 async def shutdown(dispatcher: Dispatcher) -> None:
     logging.info("Shutting down ...")
+    await ai_generator_logic.wish_pool.stop()
+    logging.info(f"DB pool stats: {get_pool_stats()}")
+    logging.info(f"Chat serialization stats: {chat_serialization_middleware.stats}")
+    logging.info(f"AI guard stats: {ai_generator_logic.ai_guard.stats}")
+    logging.info(f"AI hedging stats: {ai_generator_logic.hedger.stats}")
+    logging.info(f"AI stream hedging stats: {ai_generator_logic.stream_hedger.stats}")
+    logging.info(f"Logger blocking stats: {logger.blocking_stats()}")
+    logger.stop()  # дописываем очередь логов на диск.
 
 
 if __name__ == "__main__":